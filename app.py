@@ -15,11 +15,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import core logic (try/except to handle potential import errors gracefully in UI)
 try:
-    from main import run_full_pipeline
+    from main import run_full_pipeline, submit_final_render, final_renders, final_render_failed
     import config
     from trend_researcher import research_before_creating
     from gemini_integration import generate_carousel_content, TEMAS_POR_NICHO
-    from carousel_generator import generate_carousel
+    from carousel_generator import generate_carousel, render_carousel_preview
 except ImportError as e:
     st.error(f"Erro crítico ao importar módulos do projeto: {e}")
     st.stop()
@@ -204,6 +204,12 @@ with tab_gen:
         5. 🎥 Edição e Renderização
         """, unsafe_allow_html=True)
         
+        v_draft = st.checkbox("⚡ Rascunho rápido (540p, 15 fps, sem música)", value=False,
+                              help="Confere o ritmo em segundos; a versão 1920x1080 sai após a aprovação.")
+        v_background = st.checkbox("⏳ Renderizar versão final em segundo plano", value=False,
+                                   disabled=not v_draft,
+                                   help="Já começa a versão final enquanto você revisa os rascunhos.")
+        
         start_btn = st.button("🚀 INICIAR AUTOMAÇÃO", type="primary", use_container_width=True)
 
     with col_act2:
@@ -233,7 +239,9 @@ with tab_gen:
                 
                 start_time = time.time()
                 videos = loop.run_until_complete(
-                    run_full_pipeline(num_videos, use_trends, niche=final_niche)
+                    run_full_pipeline(num_videos, use_trends, niche=final_niche,
+                                      profile="draft" if v_draft else "final",
+                                      background_final=v_draft and v_background)
                 )
                 end_time = time.time()
                 
@@ -244,14 +252,59 @@ with tab_gen:
                 st.success(f"🎉 Sucesso! {len(videos)} vídeos gerados em {end_time - start_time:.1f}s")
                 st.balloons()
                 
+                if v_draft:
+                    # Rascunhos ficam na sessão até a aprovação (lista abaixo)
+                    st.session_state["video_drafts"] = videos
+                
                 # Quick Preview
-                if videos:
+                elif videos:
                     st.subheader("🎥 Visualização Rápida")
                     cols = st.columns(3)
                     for i, v in enumerate(videos):
                          with cols[i % 3]:
                             st.video(v)
             
+            except Exception as e:
+                status_container.update(label="❌ Erro na Geração", state="error")
+                st.error(str(e))
+        
+        drafts = st.session_state.get("video_drafts")
+        if drafts:
+            st.subheader("🎥 Rascunhos (540p, sem música)")
+            cols = st.columns(3)
+            for i, v in enumerate(drafts):
+                with cols[i % 3]:
+                    st.video(v)
+                    future = final_renders.get(v)
+                    # Sem final ainda ou final com erro: mostra os botões (aprovar de novo = nova tentativa)
+                    can_submit = future is None or final_render_failed(future)
+                    if future is not None and future.done():
+                        if can_submit:
+                            st.error(f"Erro na versão final: {future.exception() if not future.cancelled() else 'cancelada'}")
+                        else:
+                            st.success(f"Final pronta: {os.path.basename(future.result())}")
+                    elif future is not None:
+                        st.caption("⏳ Versão final renderizando em segundo plano...")
+                    
+                    col_ok, col_bg = st.columns(2)
+                    with col_ok:
+                        if can_submit and st.button("✅ APROVAR", key=f"approve_{i}", use_container_width=True):
+                            with st.spinner("Renderizando versão final 1920x1080..."):
+                                try:
+                                    final_path = submit_final_render(v).result()
+                                    st.success(f"Final pronta: {os.path.basename(final_path)}")
+                                except Exception as e:
+                                    st.error(f"Erro na versão final: {e}")
+                    with col_bg:
+                        if can_submit and st.button("⏳ Final em 2º plano", key=f"background_{i}",
+                                                    use_container_width=True):
+                            submit_final_render(v)
+                            st.rerun()
+            
+            if st.button("🧹 Limpar rascunhos", use_container_width=True):
+                del st.session_state["video_drafts"]
+                st.rerun()
+
 # -----------------------------------------------------------------------------
 # TAB: CAROUSEL GENERATOR
 # -----------------------------------------------------------------------------
@@ -266,6 +319,8 @@ with tab_carousel:
         c_topic = st.text_input("Tema Específico", placeholder="Ex: A Farsa da Faculdade")
         c_slides = st.slider("Qtd Slides", 3, 10, 5)
         c_style = st.selectbox("Estilo Visual", ["caverna", "dark_purple", "dark_gold"])
+        c_preview = st.checkbox("⚡ Preview rápido (baixa resolução)", value=True,
+                                help="Confere o layout em segundos; a versão 1080x1350 é gerada só quando você pedir.")
         
         gen_c_btn = st.button("🎡 GERAR CARROSSEL", type="primary", use_container_width=True)
         
@@ -277,24 +332,45 @@ with tab_carousel:
                     status.write("✍️ Criando roteiro estratégico...")
                     slides_data = generate_carousel_content(c_topic if c_topic else "Mentalidade", c_nicho, c_slides)
                     
-                    # 2. Gerar Imagens
-                    status.write("🎨 Renderizando slides premium...")
-                    folder_name = f"{c_nicho}_{datetime.now().strftime('%H%M%S')}"
-                    paths = generate_carousel(slides_data, c_style, folder_name)
-                    
-                    status.update(label="✅ Carrossel Pronto!", state="complete")
-                    st.success(f"Carrossel gerado com {len(paths)} slides!")
-                    
-                    # Preview
-                    st.subheader("🖼️ Preview dos Slides")
-                    c_cols = st.columns(3)
-                    for i, p in enumerate(paths):
-                        with c_cols[i % 3]:
-                            st.image(p)
+                    if c_preview:
+                        # Só o preview agora; a renderização em alta fica para o botão abaixo
+                        st.session_state["carousel_draft"] = {"slides": slides_data, "style": c_style, "nicho": c_nicho}
+                        status.update(label="✅ Preview Pronto!", state="complete")
+                    else:
+                        # 2. Gerar Imagens
+                        status.write("🎨 Renderizando slides premium...")
+                        st.session_state.pop("carousel_draft", None)
+                        folder_name = f"{c_nicho}_{datetime.now().strftime('%H%M%S')}"
+                        paths = generate_carousel(slides_data, c_style, folder_name)
+                        
+                        status.update(label="✅ Carrossel Pronto!", state="complete")
+                        st.success(f"Carrossel gerado com {len(paths)} slides!")
+                        
+                        # Preview
+                        st.subheader("🖼️ Preview dos Slides")
+                        c_cols = st.columns(3)
+                        for i, p in enumerate(paths):
+                            with c_cols[i % 3]:
+                                st.image(p)
                             
                 except Exception as e:
                     status.update(label="❌ Erro na Geração", state="error")
                     st.error(str(e))
+        
+        draft = st.session_state.get("carousel_draft")
+        if draft:
+            st.subheader("🖼️ Preview dos Slides (baixa resolução)")
+            c_cols = st.columns(3)
+            for i, (_, webp) in enumerate(render_carousel_preview(draft["slides"], draft["style"])):
+                with c_cols[i % 3]:
+                    st.image(webp)
+            
+            if st.button("🎨 GERAR EM ALTA RESOLUÇÃO", use_container_width=True):
+                with st.spinner("Renderizando slides premium..."):
+                    folder_name = f"{draft['nicho']}_{datetime.now().strftime('%H%M%S')}"
+                    paths = generate_carousel(draft["slides"], draft["style"], folder_name)
+                del st.session_state["carousel_draft"]
+                st.success(f"Carrossel gerado com {len(paths)} slides em {folder_name}!")
 
 # -----------------------------------------------------------------------------
 # TAB 2: TREND ANALYSIS
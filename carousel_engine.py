@@ -3,16 +3,29 @@ Carousel Engine - LAYOUT REVOLUTION (v7.0)
 Suporta Layouts Dinâmicos: Checklist (Diagnóstico) e Versus (Conflito).
 """
 
-from PIL import Image, ImageDraw, ImageFont, ImageChops, ImageFilter
+from PIL import Image, ImageDraw, ImageFont, ImageFilter
 import os
-import random
 import textwrap
+from functools import lru_cache
+from post_processing import apply_post_processing as _post_processing, downscale
+from font_registry import font_registry
+import text_layout
+from text_sprites import draw_text, text_bbox
+from render_pool import run_jobs
+from encoders import DEFAULT_PROFILE, PREVIEW_PROFILE, encode, encoder_stage, output_path_for, save_image, write_bytes, zip_buffers
+from render_cache import make_key, render_cache, seed_for
+
+# Versão do renderer (entra na chave do render_cache; incremente ao mudar o visual)
+RENDERER_VERSION = "7.1"
 
 # Configurações 4:5
 IMG_WIDTH = 1080
 IMG_HEIGHT = 1350
 SIZE = (IMG_WIDTH, IMG_HEIGHT)
 
+# Escala do modo preview (layout completo, saída 270x338)
+PREVIEW_SCALE = 0.25
+
 # Cores Caverna v4
 THEMES = {
     "empire": {
@@ -41,19 +54,31 @@ def detect_theme(content_data):
         return THEMES["alert"]
     return THEMES["empire"]
 
+BEBAS_PATH = os.path.join(os.path.dirname(__file__), "assets", "fonts", "BebasNeue-Regular.ttf")
+SYSTEM_FONTS = ["C:/Windows/Fonts/montserrat.ttf", "C:/Windows/Fonts/arialbd.ttf", "C:/Windows/Fonts/arial.ttf"]
+
+# Tamanhos de projeto (máximos quando o texto é ajustado com fit_font)
+FONT_SIZES = {
+    "title": 200, "subtitle": 50, "header": 110,
+    "body": 60, "cta": 140, "big_num": 600, "footer": 28, "micro_hook": 35
+}
+
+def font_candidates(condensada=False):
+    return tuple(([BEBAS_PATH] if condensada else []) + SYSTEM_FONTS)
+
 def get_font(size_key="medium", bold=False, condensada=False):
-    sizes = {
-        "title": 200, "subtitle": 50, "header": 110,
-        "body": 60, "cta": 140, "big_num": 600, "footer": 28, "micro_hook": 35
-    }
-    size = sizes.get(size_key, 60)
-    bebas_path = "assets/fonts/BebasNeue-Regular.ttf"
-    if condensada and os.path.exists(bebas_path): return ImageFont.truetype(bebas_path, size)
-    
-    candidates = ["C:/Windows/Fonts/montserrat.ttf", "C:/Windows/Fonts/arialbd.ttf", "C:/Windows/Fonts/arial.ttf"]
-    for path in candidates:
-        if os.path.exists(path): return ImageFont.truetype(path, size)
-    return ImageFont.load_default()
+    size = FONT_SIZES.get(size_key, 60)
+    return font_registry.load(font_candidates(condensada), size)
+
+def fit_font(size_key, text, box, condensada=False, min_size=None, line_height=None, max_lines=None):
+    """
+    Ajusta o texto à caixa (w, h): tamanho de projeto de size_key como máximo,
+    reduzindo por busca binária só quando o texto transborda (text_layout.fit_text).
+    """
+    max_size = FONT_SIZES.get(size_key, 60)
+    return text_layout.fit_text(text, font_candidates(condensada), box, max_size,
+                                min_size=min_size or max_size // 2, line_height=line_height,
+                                max_lines=max_lines)
 
 def draw_icon(draw, icon_type, xy, size, color):
     """Desenha ícones vetoriais simples (Check ou X)."""
@@ -73,7 +98,8 @@ def draw_icon(draw, icon_type, xy, size, color):
 def draw_checklist_layout(draw, slide, theme):
     """Layout específico para listas de verificação."""
     # Título do Slide
-    font_head = get_font("header", condensada=True)
+    font_head = fit_font("header", slide["title"].upper(), (IMG_WIDTH - 160, FONT_SIZES["header"]),
+                         condensada=True, max_lines=1).font
     draw.text((80, 150), slide["title"].upper(), font=font_head, fill=theme["accent"])
     
     # Itens do Checklist (Parsing manual do texto)
@@ -105,7 +131,8 @@ def draw_versus_layout(draw, slide, theme):
     draw.line([(mid, 150), (mid, 1100)], fill=theme["text"], width=2)
     
     # Título (Centralizado no Topo)
-    font_head = get_font("header", condensada=True)
+    font_head = fit_font("header", slide["title"].upper(), (IMG_WIDTH - 160, FONT_SIZES["header"]),
+                         condensada=True, max_lines=1).font
     w = draw.textbbox((0,0), slide["title"], font=font_head)[2]
     draw.text(((IMG_WIDTH-w)//2, 80), slide["title"].upper(), font=font_head, fill=theme["accent"])
     
@@ -120,7 +147,7 @@ def draw_versus_layout(draw, slide, theme):
     font_body = get_font("body", bold=True)
     
     # Lado Esquerdo (O Fraco/Erro)
-    draw.text((mid - 300, 400), "ELES (FRACOS)", font=font_body, fill=(100,100,100))
+    draw_text(draw, (mid - 300, 400), "ELES (FRACOS)", font_body, (100,100,100))
     left_lines = textwrap.wrap(left_text, width=15)
     y = 500
     for line in left_lines:
@@ -129,150 +156,214 @@ def draw_versus_layout(draw, slide, theme):
         y += 70
         
     # Lado Direito (O Forte/Você)
-    draw.text((mid + 40, 400), "VOCÊ (TOPO)", font=font_body, fill=theme["accent"])
+    draw_text(draw, (mid + 40, 400), "VOCÊ (TOPO)", font_body, theme["accent"])
     right_lines = textwrap.wrap(right_text, width=15)
     y = 500
     for line in right_lines:
         draw.text((mid + 40, y), line, font=font_body, fill=theme["text"]) # Texto brilhante
         y += 70
 
-def apply_post_processing(img):
-    """Textura + Vignette + Glitch"""
-    # Noise
-    noise = Image.new('L', SIZE)
-    noise.putdata([random.randint(0, 15) for _ in range(IMG_WIDTH * IMG_HEIGHT)])
-    base_pixels = img.load()
-    noise_pixels = noise.load()
-    for x in range(IMG_WIDTH):
-        for y in range(IMG_HEIGHT):
-            r, g, b = base_pixels[x,y]
-            n = noise_pixels[x,y]
-            base_pixels[x,y] = (min(255, r+n), min(255, g+n), min(255, b+n))
-            
-    # Vignette
-    overlay = Image.new('RGBA', SIZE, (0,0,0,0))
-    draw = ImageDraw.Draw(overlay)
-    for i in range(150):
-        alpha = int(180 * (1 - (i/150)))
-        draw.rectangle([i, i, IMG_WIDTH-i, IMG_HEIGHT-i], outline=(0,0,0,alpha))
-    img = Image.alpha_composite(img.convert('RGBA'), overlay).convert('RGB')
-    
-    # Glitch
-    r, g, b = img.split()
-    r = ImageChops.offset(r, -3, 0)
-    b = ImageChops.offset(b, 3, 0)
-    return Image.merge("RGB", (r, g, b)).crop((3, 0, IMG_WIDTH-3, IMG_HEIGHT)).resize(SIZE)
+def apply_post_processing(img, seed=None, preview_scale=None):
+    """
+    Textura + Vignette + Glitch (vetorizado em post_processing). seed=None mantém o grão aleatório.
+    preview_scale: reduz a imagem e aplica só a vignette (grão e glitch somem nessa escala).
+    """
+    if preview_scale:
+        return _post_processing(downscale(img, preview_scale), grain=False, glitch=False, scale=preview_scale)
+    return _post_processing(img, seed=seed)
 
 def wrap_text(text, font, max_width):
-    words = text.split()
-    lines = []
-    current_line = []
-    dummy = ImageDraw.Draw(Image.new('RGB', (1, 1)))
-    for word in words:
-        current_line.append(word)
-        line_str = ' '.join(current_line)
-        bbox = dummy.textbbox((0, 0), line_str, font=font)
-        if bbox[2] - bbox[0] > max_width:
-            current_line.pop()
-            lines.append(' '.join(current_line))
-            current_line = [word]
-    if current_line: lines.append(' '.join(current_line))
-    return lines
-
-def generate_carousel_images(content_data, output_dir="output/carousel"):
+    """Quebra por largura real da fonte (avanços cacheados em text_layout)."""
+    return text_layout.wrap_text(text, font, max_width)
+
+def theme_name(theme):
+    """Nome do tema em THEMES (chave estável para caches)."""
+    return next((name for name, t in THEMES.items() if t == theme), "empire")
+
+@lru_cache(maxsize=16)
+def _render_theme_base(name, slide_type, size):
+    """Fundo + barra do footer + @MODOCAVERNA (+ moldura no CTA): iguais em todos os slides do tema."""
+    theme = THEMES[name]
+    width, height = size
+    img = Image.new('RGB', size, theme["bg_base"])
+    draw = ImageDraw.Draw(img)
+    
+    if slide_type == "cta":
+        m = 60
+        draw.rectangle([m, m, width-m, height-m], outline=theme["accent"], width=8)
+    
+    draw.rectangle([0, height - 25, width, height], fill=theme["bar_bg"])
+    draw_text(draw, (50, height - 65), "@MODOCAVERNA", get_font("footer"), (100,100,100))
+    return img
+
+def get_theme_base(theme, slide_type, size=SIZE):
+    """Cópia da camada estática pré-renderizada por (tema, tipo de slide, tamanho)."""
+    return _render_theme_base(theme_name(theme), slide_type if slide_type == "cta" else "default", tuple(size)).copy()
+
+def render_slide(slide, i, total_slides, theme, template_type="standard", seed=None, preview_scale=None):
+    """
+    Renderiza um slide (1-indexado) e devolve a imagem já pós-processada (seed fixa o grão).
+    preview_scale: devolve a versão reduzida sem grão/glitch (ex: 0.25 para a galeria).
+    """
+    # Base cacheada: fundo, footer e moldura já desenhados
+    img = get_theme_base(theme, slide["type"])
+    draw = ImageDraw.Draw(img)
+
+    # SLIDE CAPA (Padrão para todos)
+    if slide["type"] == "cover":
+        # Títulos longos encolhem até caber (no máximo 4 linhas no tamanho de projeto)
+        fit = fit_font("title", slide["title"].upper(), (IMG_WIDTH - 60, 700), condensada=True, line_height=165)
+        font_title = fit.font
+        start_y = (IMG_HEIGHT - fit.height) // 2 - 100
+        for line in (box.text for box in fit.lines):
+            bbox = text_bbox(line, font_title)
+            w = bbox[2] - bbox[0]
+            x = (IMG_WIDTH - w) // 2
+            # Sombra e texto saem da mesma máscara (text_sprites)
+            draw_text(draw, (x, start_y), line, font_title, theme["text"], shadow=(0,0,0), shadow_offset=(10, 10))
+            start_y += fit.line_height
+        if "subtitle" in slide:
+            font_sub = get_font("subtitle", bold=True)
+            sub_lines = wrap_text(slide["subtitle"].upper(), font_sub, IMG_WIDTH - 200)
+            start_y += 30
+            for line in sub_lines:
+                bbox = draw.textbbox((0, 0), line, font=font_sub)
+                w = bbox[2] - bbox[0]
+                x = (IMG_WIDTH - w) // 2
+                # Box Highlight
+                pad=10
+                draw.rectangle([x-pad, start_y+5, x+w+pad, start_y+50+15], fill=theme["accent"])
+                draw.text((x, start_y), line, font=font_sub, fill=(0,0,0))
+                start_y += 70
+
+    # SLIDE CONTEÚDO (LAYOUT DINÂMICO)
+    elif slide["type"] == "content":
+        # Escolhe o renderizador baseado no template
+        if template_type == "checklist":
+            draw_checklist_layout(draw, slide, theme)
+        elif template_type == "versus":
+            draw_versus_layout(draw, slide, theme)
+        else:
+            # Layout Standard (Padrão)
+            font_big = get_font("big_num", condensada=True)
+            draw_text(draw, (-50, -80), str(i-1), font_big, theme["geom_color"])
+
+            font_head = fit_font("header", slide["title"].upper(), (IMG_WIDTH - 160, FONT_SIZES["header"]),
+                                 condensada=True, max_lines=1).font
+            draw.text((80, 180), slide["title"].upper(), font=font_head, fill=theme["accent"])
+            draw.rectangle([80, 290, 150, 310], fill=theme["text"])
+
+            # Corpo entre o título e o footer
+            fit = fit_font("body", slide["text"], (IMG_WIDTH - 160, IMG_HEIGHT - 380 - 100), line_height=80)
+            y = 380
+            for box in fit.lines:
+                draw.text((80, y), box.text, font=fit.font, fill=theme["text"])
+                y += fit.line_height
+
+    # SLIDE CTA
+    elif slide["type"] == "cta":
+        # Dentro da moldura do CTA
+        fit = fit_font("cta", slide["text"].upper(), (IMG_WIDTH - 100, IMG_HEIGHT - 300), condensada=True, line_height=110)
+        font_cta = fit.font
+        start_y = (IMG_HEIGHT - fit.height) // 2
+        for line in (box.text for box in fit.lines):
+            bbox = text_bbox(line, font_cta)
+            w = bbox[2] - bbox[0]
+            x = (IMG_WIDTH - w) // 2
+            draw_text(draw, (x, start_y), line, font_cta, theme["text"], shadow=(0,0,0), shadow_offset=(8, 8))
+            start_y += fit.line_height
+
+    # Footer (barra e @ já vêm na base; só o progresso é dinâmico)
+    bar_y = IMG_HEIGHT - 25
+    progress_w = int((i / total_slides) * IMG_WIDTH)
+    draw.rectangle([0, bar_y, progress_w, IMG_HEIGHT], fill=theme["accent"])
+
+    return apply_post_processing(img, seed=seed, preview_scale=preview_scale)
+
+def slide_cache_key(slide, i, total_slides, theme, template_type, profile=DEFAULT_PROFILE, max_bytes=None):
+    """Chave do render_cache: tudo que muda os pixels ou os bytes de saída."""
+    return make_key(
+        renderer="carousel_engine", version=RENDERER_VERSION, slide=slide, index=i,
+        total=total_slides, theme=theme_name(theme), template_type=template_type,
+        profile=profile, max_bytes=max_bytes,
+    )
+
+def _render_slide_file(slide, i, total_slides, theme, template_type, filename,
+                       profile=DEFAULT_PROFILE, max_bytes=None, background=False, use_cache=True):
+    """Job do pool: renderiza e salva um slide (função de módulo para ser picklable)."""
+    key = slide_cache_key(slide, i, total_slides, theme, template_type, profile, max_bytes) if use_cache else None
+    if key:
+        cached = render_cache.get(key)
+        if cached is not None:
+            return write_bytes(cached, output_path_for(filename, profile))
+    
+    img = render_slide(slide, i, total_slides, theme, template_type, seed=seed_for(key) if key else None)
+    if background:
+        return encoder_stage.submit(img, filename, profile, max_bytes, cache_key=key)
+    return save_image(img, filename, profile, max_bytes, cache_key=key)
+
+def generate_carousel_images(content_data, output_dir="output/carousel", parallel=False,
+                             profile=DEFAULT_PROFILE, max_bytes=None, use_cache=True):
+    """
+    Renderiza todos os slides em output_dir.
+    parallel=True distribui os slides pelo render_pool (um processo por núcleo);
+    a ordem dos caminhos retornados é sempre a ordem dos slides.
+    profile/max_bytes: perfil de encoders (instagram_jpeg, webp, ...) e orçamento por slide.
+    Em série, a codificação roda em segundo plano enquanto o próximo slide é desenhado.
+    use_cache: slides idênticos vêm do render_cache (o grão é semeado pela chave).
+    """
     os.makedirs(output_dir, exist_ok=True)
-    images = []
     theme = detect_theme(content_data)
     template_type = content_data.get("template_type", "standard")
     total_slides = len(content_data["slides"])
     
     print(f"🎨 Renderizando com Layout: {template_type.upper()} | Tema: {'ALERTA' if theme==THEMES['alert'] else 'IMPÉRIO'}")
     
-    for i, slide in enumerate(content_data["slides"], 1):
-        img = Image.new('RGB', SIZE, theme["bg_base"])
-        draw = ImageDraw.Draw(img)
-        
-        # SLIDE CAPA (Padrão para todos)
-        if slide["type"] == "cover":
-            font_title = get_font("title", condensada=True)
-            lines = wrap_text(slide["title"].upper(), font_title, IMG_WIDTH - 60)
-            total_h = len(lines) * 165
-            start_y = (IMG_HEIGHT - total_h) // 2 - 100
-            for line in lines:
-                bbox = draw.textbbox((0, 0), line, font=font_title)
-                w = bbox[2] - bbox[0]
-                x = (IMG_WIDTH - w) // 2
-                draw.text((x+10, start_y+10), line, font=font_title, fill=(0,0,0))
-                draw.text((x, start_y), line, font=font_title, fill=theme["text"])
-                start_y += 165
-            if "subtitle" in slide:
-                font_sub = get_font("subtitle", bold=True)
-                sub_lines = wrap_text(slide["subtitle"].upper(), font_sub, IMG_WIDTH - 200)
-                start_y += 30
-                for line in sub_lines:
-                    bbox = draw.textbbox((0, 0), line, font=font_sub)
-                    w = bbox[2] - bbox[0]
-                    x = (IMG_WIDTH - w) // 2
-                    # Box Highlight
-                    pad=10
-                    draw.rectangle([x-pad, start_y+5, x+w+pad, start_y+50+15], fill=theme["accent"])
-                    draw.text((x, start_y), line, font=font_sub, fill=(0,0,0))
-                    start_y += 70
-
-        # SLIDE CONTEÚDO (LAYOUT DINÂMICO)
-        elif slide["type"] == "content":
-            # Escolhe o renderizador baseado no template
-            if template_type == "checklist":
-                draw_checklist_layout(draw, slide, theme)
-            elif template_type == "versus":
-                draw_versus_layout(draw, slide, theme)
-            else:
-                # Layout Standard (Padrão)
-                font_big = get_font("big_num", condensada=True)
-                draw.text((-50, -80), str(i-1), font=font_big, fill=theme["geom_color"])
-                
-                font_head = get_font("header", condensada=True)
-                draw.text((80, 180), slide["title"].upper(), font=font_head, fill=theme["accent"])
-                draw.rectangle([80, 290, 150, 310], fill=theme["text"])
-                
-                font_body = get_font("body")
-                body_lines = wrap_text(slide["text"], font_body, IMG_WIDTH - 160)
-                y = 380
-                for line in body_lines:
-                    draw.text((80, y), line, font=font_body, fill=theme["text"])
-                    y += 80
-
-        # SLIDE CTA
-        elif slide["type"] == "cta":
-            font_cta = get_font("cta", condensada=True)
-            lines = wrap_text(slide["text"].upper(), font_cta, IMG_WIDTH - 100)
-            start_y = (IMG_HEIGHT - (len(lines)*110)) // 2
-            m = 60
-            draw.rectangle([m, m, IMG_WIDTH-m, IMG_HEIGHT-m], outline=theme["accent"], width=8)
-            for line in lines:
-                bbox = draw.textbbox((0, 0), line, font=font_cta)
-                w = bbox[2] - bbox[0]
-                x = (IMG_WIDTH - w) // 2
-                draw.text((x+8, start_y+8), line, font=font_cta, fill=(0,0,0))
-                draw.text((x, start_y), line, font=font_cta, fill=theme["text"])
-                start_y += 110
-
-        # Footer
-        bar_y = IMG_HEIGHT - 25
-        draw.rectangle([0, bar_y, IMG_WIDTH, IMG_HEIGHT], fill=theme["bar_bg"])
-        progress_w = int((i / total_slides) * IMG_WIDTH)
-        draw.rectangle([0, bar_y, progress_w, IMG_HEIGHT], fill=theme["accent"])
-        font_f = get_font("footer")
-        draw.text((50, IMG_HEIGHT - 65), "@MODOCAVERNA", font=font_f, fill=(100,100,100))
-        
-        img = apply_post_processing(img)
-        filename = os.path.join(output_dir, f"slide_{i}.jpg")
-        img.save(filename, quality=100, subsampling=0)
-        images.append(filename)
+    jobs = [
+        {
+            "slide": slide, "i": i, "total_slides": total_slides, "theme": theme,
+            "template_type": template_type, "filename": os.path.join(output_dir, f"slide_{i}.jpg"),
+            "profile": profile, "max_bytes": max_bytes, "background": not parallel,
+            "use_cache": use_cache,
+        }
+        for i, slide in enumerate(content_data["slides"], 1)
+    ]
+    images = run_jobs(_render_slide_file, jobs, parallel=parallel)
+    for i, filename in enumerate(images, 1):
         print(f"👁️ Slide {i} [{template_type.upper()}] gerado: {filename}")
         
     return images
 
+def render_carousel_bytes(content_data, profile=DEFAULT_PROFILE, max_bytes=None):
+    """Gera (nome_do_arquivo, bytes) por slide sem gravar nada no disco."""
+    theme = detect_theme(content_data)
+    template_type = content_data.get("template_type", "standard")
+    total_slides = len(content_data["slides"])
+    for i, slide in enumerate(content_data["slides"], 1):
+        key = slide_cache_key(slide, i, total_slides, theme, template_type, profile, max_bytes)
+        data = render_cache.get(key)
+        if data is None:
+            img = render_slide(slide, i, total_slides, theme, template_type, seed=seed_for(key))
+            data = encode(img, profile, max_bytes)
+            render_cache.put(key, data)
+        yield output_path_for(f"slide_{i}.jpg", profile), data
+
+def render_carousel_zip(content_data, profile=DEFAULT_PROFILE, max_bytes=None):
+    """ZIP em memória com todos os slides (io.BytesIO pronto para send_file)."""
+    return zip_buffers(render_carousel_bytes(content_data, profile, max_bytes))
+
+def render_carousel_preview(content_data, scale=PREVIEW_SCALE):
+    """
+    Previews rápidos (nome, bytes WebP) para conferir o layout.
+    Sem grão/glitch e sem render_cache; a versão final só é renderizada no download/publicação.
+    """
+    theme = detect_theme(content_data)
+    template_type = content_data.get("template_type", "standard")
+    total_slides = len(content_data["slides"])
+    for i, slide in enumerate(content_data["slides"], 1):
+        img = render_slide(slide, i, total_slides, theme, template_type, preview_scale=scale)
+        yield output_path_for(f"slide_{i}.jpg", PREVIEW_PROFILE), encode(img, PREVIEW_PROFILE)
+
 if __name__ == "__main__":
     # Teste de Checklist
     test = {
@@ -7,9 +7,25 @@ Formato: 1080x1350 (ideal para Instagram/TikTok)
 
 from PIL import Image, ImageDraw, ImageFont
 import os
-from typing import List, Dict, Optional
+import io
+import json
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
 from logger import get_logger
+from gradients import get_gradient
+from font_registry import font_registry
+import text_layout
+from text_sprites import draw_text
+from render_pool import RenderError, get_render_pool, replace_render_pool, run_jobs
+from post_processing import downscale
+from encoders import (PREVIEW_PROFILE, encode, encoder_stage, output_path_for, patch_zip, save_image,
+                      write_bytes, write_zip, zip_buffers)
+from error_handler import ImageGenerationError
+from render_cache import file_signature, make_key, render_cache
 
 logger = get_logger()
 
@@ -24,6 +40,20 @@ if IS_SERVERLESS:
 else:
     OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output", "carousels")
 
+# Versão do renderer (entra na chave do render_cache; incremente ao mudar o visual)
+RENDERER_VERSION = "6.1"
+
+# Perfil de saída padrão (PNG, paletizado quando o slide cabe em 256 cores sem perdas)
+SLIDE_PROFILE = "png_auto"
+
+# Escala do modo preview (270x338)
+PREVIEW_SCALE = 0.25
+
+# Arquivos de cada pasta de carrossel: slides, manifesto (para edições) e ZIP cacheado
+SLIDE_EXTENSIONS = ('.png', '.jpg', '.webp')
+MANIFEST_NAME = "carousel.json"
+ZIP_NAME = "carousel.zip"
+
 # Templates de estilo
 STYLES = {
     "dark_purple": {"bg": (25, 15, 45), "accent": (180, 100, 255), "text": (255, 255, 255)},
@@ -33,84 +63,86 @@ STYLES = {
     "caverna": {"bg": (0, 0, 0), "accent": (255, 215, 0), "text": (255, 255, 255), "font_bold": True},
 }
 
-def get_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
-    """Carrega fonte com prioridade para assets locais, depois sistema."""
-    
-    # 1. Tentar fonte bundled (Ideal para Vercel)
-    local_font = os.path.join(os.path.dirname(__file__), "assets", "fonts", "BebasNeue-Regular.ttf")
-    if os.path.exists(local_font):
-        try:
-            return ImageFont.truetype(local_font, size)
-        except Exception as e:
-            logger.warning(f"Erro ao carregar fonte local: {e}")
-
-    # 2. Fontes do Sistema (Fallback)
-    font_paths = [
-        # Windows
+def font_candidates(bold: bool = False) -> Tuple[str, ...]:
+    """Fontes candidatas: assets locais primeiro, depois sistema."""
+    return (
+        # 1. Fonte bundled (Ideal para Vercel)
+        os.path.join(os.path.dirname(__file__), "assets", "fonts", "BebasNeue-Regular.ttf"),
+        # 2. Fontes do Sistema (Fallback) - Windows
         "C:/Windows/Fonts/segoeuib.ttf" if bold else "C:/Windows/Fonts/segoeui.ttf",
         "C:/Windows/Fonts/arialbd.ttf" if bold else "C:/Windows/Fonts/arial.ttf",
         # Linux (Vercel/AWS)
         "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-    ]
-    
-    for path in font_paths:
-        if os.path.exists(path):
-            try:
-                return ImageFont.truetype(path, size)
-            except Exception:
-                continue
-    
-    # 3. Fallback final
-    return ImageFont.load_default()
+    )
+
+def get_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
+    """Carrega fonte (resolvida uma vez no font_registry; fallback final load_default)."""
+    return font_registry.load(font_candidates(bold), size)
 
 def create_gradient_bg(size: tuple, color_start: tuple, color_end: tuple) -> Image.Image:
-    """Cria background com gradiente vertical."""
-    img = Image.new('RGB', size, color_start)
-    for y in range(size[1]):
-        ratio = y / size[1]
-        r = int(color_start[0] + (color_end[0] - color_start[0]) * ratio)
-        g = int(color_start[1] + (color_end[1] - color_start[1]) * ratio)
-        b = int(color_start[2] + (color_end[2] - color_start[2]) * ratio)
-        for x in range(size[0]):
-            img.putpixel((x, y), (r, g, b))
+    """Cria background com gradiente vertical (cacheado em gradients)."""
+    return get_gradient(size, color_start, color_end)
+
+@lru_cache(maxsize=8)
+def _render_caverna_base(size: tuple) -> Image.Image:
+    """Fundo preto + degradê sombrio da área de imagem (60% superior), usado quando não há capa."""
+    colors = STYLES["caverna"]
+    img = Image.new('RGB', size, colors["bg"])
+    img_height = int(size[1] * 0.6)
+    img.paste(get_gradient((size[0], img_height), (30, 30, 30), (0, 0, 0)), (0, 0))
     return img
 
-def wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: int, draw: ImageDraw.Draw) -> List[str]:
-    """Quebra texto em linhas que cabem na largura máxima."""
-    words = text.split()
-    lines = []
-    current_line = ""
-    
-    for word in words:
-        test_line = current_line + " " + word if current_line else word
-        bbox = draw.textbbox((0, 0), test_line, font=font)
-        if bbox[2] - bbox[0] < max_width:
-            current_line = test_line
-        else:
-            if current_line:
-                lines.append(current_line)
-            current_line = word
-    if current_line:
-        lines.append(current_line)
+def get_caverna_base(size: tuple = CAROUSEL_SIZE) -> Image.Image:
+    """Cópia da base Modo Caverna pré-renderizada."""
+    return _render_caverna_base(tuple(size)).copy()
+
+@lru_cache(maxsize=32)
+def _load_fitted_cover(path: str, mtime_ns: int, box: tuple) -> Image.Image:
+    """
+    Decodifica, redimensiona preenchendo (crop center) e guarda a capa pronta para colar.
+    JPEG usa draft (decodifica já em 1/2, 1/4 ou 1/8); os demais formatos passam por
+    reduce antes do LANCZOS final (reducing_gap).
+    """
+    box_w, box_h = box
+    with Image.open(path) as src:
+        overlay_ratio = src.width / src.height
+        if overlay_ratio > box_w / box_h: # Imagem mais larga
+            new_h = box_h
+            new_w = int(new_h * overlay_ratio)
+        else: # Imagem mais alta
+            new_w = box_w
+            new_h = int(new_w / overlay_ratio)
+        
+        src.draft("RGB", (new_w, new_h))
+        overlay_img = src.convert("RGB").resize((new_w, new_h), Image.Resampling.LANCZOS, reducing_gap=3.0)
     
-    return lines
+    left = (new_w - box_w) // 2
+    top = (new_h - box_h) // 2
+    return overlay_img.crop((left, top, left + box_w, top + box_h))
 
-def create_slide(
+def get_fitted_cover(path: str, box: tuple) -> Image.Image:
+    """Capa ajustada à área (cache por caminho + mtime + caixa). Não modifique a imagem retornada."""
+    return _load_fitted_cover(os.path.abspath(path), os.stat(path).st_mtime_ns, tuple(box))
+
+def wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: int, draw: ImageDraw.Draw = None) -> List[str]:
+    """Quebra texto em linhas que cabem na largura máxima (draw mantido por compatibilidade)."""
+    return text_layout.wrap_text(text, font, max_width)
+
+def render_slide_image(
     text: str,
     slide_number: int,
     total_slides: int,
     style: str = "dark_purple",
-    output_path: str = None,
     image_path: str = None
-) -> str:
-    """Cria um slide individual do carrossel."""
+) -> Image.Image:
+    """Desenha um slide e devolve a imagem em memória (sem tocar no disco)."""
     
     colors = STYLES.get(style, STYLES["dark_purple"])
     font_bold_needed = colors.get("font_bold", False)
     
     # Criar gradiente ou fundo sólido
     if style == "caverna":
-        img = Image.new('RGB', CAROUSEL_SIZE, colors["bg"])
+        img = get_caverna_base(CAROUSEL_SIZE)
     else:
         bg_end = tuple(min(c + 20, 255) for c in colors["bg"])
         img = create_gradient_bg(CAROUSEL_SIZE, colors["bg"], bg_end)
@@ -123,104 +155,137 @@ def create_slide(
         img_height = int(CAROUSEL_SIZE[1] * 0.6)
         if image_path and os.path.exists(image_path):
             try:
-                overlay_img = Image.open(image_path).convert("RGB")
-                # Redimensionar preenchendo (crop center)
-                img_ratio = CAROUSEL_SIZE[0] / img_height
-                overlay_ratio = overlay_img.width / overlay_img.height
-                
-                if overlay_ratio > img_ratio: # Imagem mais larga
-                    new_h = img_height
-                    new_w = int(new_h * overlay_ratio)
-                    overlay_img = overlay_img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                    left = (new_w - CAROUSEL_SIZE[0]) // 2
-                    overlay_img = overlay_img.crop((left, 0, left + CAROUSEL_SIZE[0], img_height))
-                else: # Imagem mais alta
-                    new_w = CAROUSEL_SIZE[0]
-                    new_h = int(new_w / overlay_ratio)
-                    overlay_img = overlay_img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                    top = (new_h - img_height) // 2
-                    overlay_img = overlay_img.crop((0, top, CAROUSEL_SIZE[0], top + img_height))
-                
+                overlay_img = get_fitted_cover(image_path, (CAROUSEL_SIZE[0], img_height))
                 img.paste(overlay_img, (0, 0))
             except Exception as e:
                 logger.error(f"Erro ao carregar imagem {image_path}: {e}")
                 draw.rectangle([0, 0, CAROUSEL_SIZE[0], img_height], fill=(20, 20, 20))
-        else:
-            # Fallback visual se não houver imagem: degradê sombrio
-            for y in range(img_height):
-                intensity = int(30 * (1 - y/img_height))
-                draw.line([(0, y), (CAROUSEL_SIZE[0], y)], fill=(intensity, intensity, intensity))
+        # Sem imagem: o degradê sombrio de fallback já vem na base cacheada
 
         # Texto na parte de baixo (40% da tela)
-        font_main = get_font(85 if slide_number == 1 else 65, bold=font_bold_needed)
         margin = 80
         max_width = CAROUSEL_SIZE[0] - (margin * 2)
         
         # Se for Slide 1, texto em CAIXA ALTA
         display_text = text.upper() if slide_number == 1 else text
-        lines = wrap_text(display_text, font_main, max_width, draw)
-        
-        line_height = 100 if slide_number == 1 else 80
-        total_text_height = len(lines) * line_height
+        # 85/65 são os tamanhos máximos; textos longos encolhem até caber acima do indicador
+        fit = text_layout.fit_text(
+            display_text, font_candidates(font_bold_needed), (max_width, CAROUSEL_SIZE[1] - img_height - 120),
+            max_size=85 if slide_number == 1 else 65, min_size=36,
+            line_height=100 if slide_number == 1 else 80, align="center",
+        )
+        font_main = fit.font
+        boxes = fit.lines
+        total_text_height = fit.height
         
         # Centralizar texto no espaço restante
         remaining_center_y = img_height + (CAROUSEL_SIZE[1] - img_height) // 2
-        curr_y = remaining_center_y - total_text_height // 2
+        start_y = remaining_center_y - total_text_height // 2
         
-        for line in lines:
-            bbox = draw.textbbox((0, 0), line, font=font_main)
-            tw = bbox[2] - bbox[0]
-            curr_x = (CAROUSEL_SIZE[0] - tw) // 2
-            
-            # Cor: Destaque no slide 1, branco nos outros
-            fill_color = colors["accent"] if slide_number == 1 else colors["text"]
-            draw.text((curr_x, curr_y), line, font=font_main, fill=fill_color)
-            curr_y += line_height
+        # Cor: Destaque no slide 1, branco nos outros
+        fill_color = colors["accent"] if slide_number == 1 else colors["text"]
+        for box in boxes:
+            draw.text((margin + box.x, start_y + box.y), box.text, font=font_main, fill=fill_color)
             
     else:
         # Layout Clássico
-        font_main = get_font(72, bold=font_bold_needed)
         margin = 100
         max_width = CAROUSEL_SIZE[0] - (margin * 2)
-        lines = wrap_text(text.upper(), font_main, max_width, draw)
-        
-        line_height = 100
-        total_height = len(lines) * line_height
-        start_y = (CAROUSEL_SIZE[1] - total_height) // 2
+        fit = text_layout.fit_text(
+            text.upper(), font_candidates(font_bold_needed), (max_width, CAROUSEL_SIZE[1] - 300),
+            max_size=72, min_size=36, line_height=100, align="center",
+        )
+        start_y = (CAROUSEL_SIZE[1] - fit.height) // 2
         
-        for i, line in enumerate(lines):
-            bbox = draw.textbbox((0, 0), line, font=font_main)
-            tw = bbox[2] - bbox[0]
-            x = (CAROUSEL_SIZE[0] - tw) // 2
-            y = start_y + i * line_height
-            draw.text((x, y), line, font=font_main, fill=colors["text"])
+        for box in fit.lines:
+            draw.text((margin + box.x, start_y + box.y), box.text, font=fit.font, fill=colors["text"])
 
     # Elementos comuns (Indicador e Barra)
     font_small = get_font(30)
     indicator = f"{slide_number}/{total_slides}"
-    draw.text((CAROUSEL_SIZE[0] - 120, 50), indicator, font=font_small, fill=(150, 150, 150))
+    draw_text(draw, (CAROUSEL_SIZE[0] - 120, 50), indicator, font_small, (150, 150, 150))
     
     # Barra de progresso no fundo
     progress_w = int((slide_number / total_slides) * (CAROUSEL_SIZE[0] - 200))
     draw.line([(100, CAROUSEL_SIZE[1] - 80), (100 + progress_w, CAROUSEL_SIZE[1] - 80)], 
               fill=colors["accent"], width=8)
 
-    # Salvar
+    return img
+
+def slide_cache_key(text: str, slide_number: int, total_slides: int, style: str,
+                    image_path: str = None, profile: str = SLIDE_PROFILE, max_bytes: int = None) -> str:
+    """Chave do render_cache (a capa entra por caminho + mtime + tamanho)."""
+    return make_key(
+        renderer="carousel_generator", version=RENDERER_VERSION, text=text, index=slide_number,
+        total=total_slides, style=style, image=file_signature(image_path),
+        profile=profile, max_bytes=max_bytes,
+    )
+
+def create_slide(
+    text: str,
+    slide_number: int,
+    total_slides: int,
+    style: str = "dark_purple",
+    output_path: str = None,
+    image_path: str = None,
+    profile: str = SLIDE_PROFILE,
+    max_bytes: int = None,
+    background: bool = False,
+    use_cache: bool = True
+) -> str:
+    """
+    Cria um slide individual do carrossel.
+    profile/max_bytes: perfil de encoders e orçamento em bytes (a extensão segue o perfil).
+    background=True devolve um Future do encoder_stage em vez do caminho.
+    use_cache: slides idênticos (texto, posição, estilo, capa, perfil) saem do render_cache.
+    """
     if output_path is None:
         os.makedirs(OUTPUT_DIR, exist_ok=True)
         output_path = os.path.join(OUTPUT_DIR, f"slide_{slide_number}.png")
     
-    img.save(output_path, quality=95)
-    return output_path
+    key = slide_cache_key(text, slide_number, total_slides, style, image_path, profile, max_bytes) if use_cache else None
+    if key:
+        cached = render_cache.get(key)
+        if cached is not None:
+            return write_bytes(cached, output_path_for(output_path, profile))
+    
+    img = render_slide_image(text, slide_number, total_slides, style, image_path)
+    if background:
+        return encoder_stage.submit(img, output_path, profile, max_bytes, cache_key=key)
+    return save_image(img, output_path, profile, max_bytes, cache_key=key)
+
+def _slide_jobs(slides_data: List[Dict], theme: str, carousel_dir: str, profile: str,
+                max_bytes: Optional[int], background: bool) -> List[Dict]:
+    """kwargs de create_slide para cada slide do carrossel."""
+    total = len(slides_data)
+    return [
+        {
+            "text": slide["text"],
+            "slide_number": i,
+            "total_slides": total,
+            "style": theme,
+            "output_path": os.path.join(carousel_dir, f"{i:02d}_slide.png"),
+            "image_path": slide.get("image_path"),
+            "profile": profile,
+            "max_bytes": max_bytes,
+            "background": background,
+        }
+        for i, slide in enumerate(slides_data, 1)
+    ]
 
 def generate_carousel(
     slides_data: List[Dict],
     theme: str = "caverna",
-    name: str = None
+    name: str = None,
+    parallel: bool = False,
+    profile: str = SLIDE_PROFILE,
+    max_bytes: int = None
 ) -> List[str]:
     """
     Gera um carrossel completo.
     slides_data: Lista de {"text": "...", "image_path": "..." (opcional)}
+    parallel: Renderiza os slides no render_pool (um processo por núcleo), mantendo a ordem
+    profile/max_bytes: Perfil de saída (encoders.PROFILES) e orçamento por slide
     """
     if name is None:
         name = datetime.now().strftime("carousel_%Y%m%d_%H%M%S")
@@ -228,24 +293,261 @@ def generate_carousel(
     carousel_dir = os.path.join(OUTPUT_DIR, name)
     os.makedirs(carousel_dir, exist_ok=True)
     
-    total = len(slides_data)
-    generated = []
+    jobs = _slide_jobs(slides_data, theme, carousel_dir, profile, max_bytes, background=not parallel)
+    generated = run_jobs(create_slide, jobs, parallel=parallel)
     
-    for i, slide in enumerate(slides_data, 1):
-        output_path = os.path.join(carousel_dir, f"{i:02d}_slide.png")
-        create_slide(
-            text=slide["text"],
-            slide_number=i,
-            total_slides=total,
-            style=theme,
-            output_path=output_path,
-            image_path=slide.get("image_path")
-        )
-        generated.append(output_path)
-        logger.info(f"✅ Slide {i}/{total} criado: {output_path}")
+    for i, output_path in enumerate(generated, 1):
+        logger.info(f"✅ Slide {i}/{len(generated)} criado: {output_path}")
     
+    _write_manifest(carousel_dir, slides_data, theme, profile, max_bytes, generated)
     return generated
 
+def _slide_keys(slides_data: List[Dict], theme: str, profile: str, max_bytes: Optional[int]) -> List[str]:
+    """Chave de cada slide: muda quando o texto, a capa, o índice ou o total de slides mudam."""
+    total = len(slides_data)
+    return [slide_cache_key(slide["text"], i, total, theme, slide.get("image_path"), profile, max_bytes)
+            for i, slide in enumerate(slides_data, 1)]
+
+def _write_manifest(carousel_dir: str, slides_data: List[Dict], theme: str, profile: str,
+                    max_bytes: Optional[int], paths: List[str], keep_zip: bool = False):
+    """Guarda o conteúdo do carrossel ao lado dos slides; sem keep_zip, o ZIP de uma geração anterior é apagado."""
+    manifest = {
+        "theme": theme, "profile": profile, "max_bytes": max_bytes,
+        "slides": slides_data,
+        "files": [os.path.basename(p) for p in paths],
+        "keys": _slide_keys(slides_data, theme, profile, max_bytes),
+    }
+    with open(os.path.join(carousel_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    zip_path = os.path.join(carousel_dir, ZIP_NAME)
+    if not keep_zip and os.path.exists(zip_path):
+        os.remove(zip_path)
+
+def load_manifest(name: str) -> Dict:
+    """Manifesto de um carrossel gerado (ImageGenerationError se a pasta não tiver um)."""
+    path = os.path.join(OUTPUT_DIR, name, MANIFEST_NAME)
+    if not os.path.exists(path):
+        raise ImageGenerationError(f"Carrossel '{name}' sem {MANIFEST_NAME}; gere novamente para poder editar.")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def get_carousel_zip(name: str) -> str:
+    """Caminho do ZIP cacheado do carrossel (montado na primeira chamada, depois só remendado)."""
+    carousel_dir = os.path.join(OUTPUT_DIR, name)
+    zip_path = os.path.join(carousel_dir, ZIP_NAME)
+    if not os.path.exists(zip_path):
+        def read_slides():
+            for file in sorted(os.listdir(carousel_dir)):
+                if file.endswith(SLIDE_EXTENSIONS):
+                    with open(os.path.join(carousel_dir, file), "rb") as f:
+                        yield file, f.read()
+        write_zip(read_slides(), zip_path)
+    return zip_path
+
+def edit_carousel(name: str, slides_data: List[Dict], parallel: bool = False) -> List[str]:
+    """
+    Aplica um novo conteúdo a um carrossel já gerado, renderizando só o necessário.
+
+    Só os slides cuja chave mudou são refeitos: o texto/capa editado e, se o número de
+    slides mudar, todos (indicador "n/total" e barra de progresso dependem do total).
+    Arquivos que sobrarem são removidos e o ZIP cacheado é remendado, não reconstruído.
+    """
+    manifest = load_manifest(name)
+    theme, profile, max_bytes = manifest["theme"], manifest["profile"], manifest["max_bytes"]
+    carousel_dir = os.path.join(OUTPUT_DIR, name)
+    
+    old_files = manifest["files"]
+    old_keys = manifest["keys"]
+    new_keys = _slide_keys(slides_data, theme, profile, max_bytes)
+    changed = [
+        i for i, key in enumerate(new_keys)
+        if i >= len(old_keys) or key != old_keys[i]
+        or not os.path.exists(os.path.join(carousel_dir, old_files[i]))
+    ]
+    
+    jobs = _slide_jobs(slides_data, theme, carousel_dir, profile, max_bytes, background=not parallel)
+    paths = [output_path_for(job["output_path"], profile) for job in jobs]
+    run_jobs(create_slide, [jobs[i] for i in changed], parallel=parallel)
+    
+    files = [os.path.basename(p) for p in paths]
+    removed = [f for f in old_files if f not in files]
+    for file in removed:
+        try:
+            os.remove(os.path.join(carousel_dir, file))
+        except OSError:
+            pass
+    
+    _write_manifest(carousel_dir, slides_data, theme, profile, max_bytes, paths, keep_zip=True)
+    zip_path = os.path.join(carousel_dir, ZIP_NAME)
+    if os.path.exists(zip_path):
+        changes: Dict[str, Optional[bytes]] = {file: None for file in removed}
+        for i in changed:
+            with open(paths[i], "rb") as f:
+                changes[files[i]] = f.read()
+        patch_zip(zip_path, changes)
+    
+    logger.info(f"✏️ Carrossel {name}: {len(changed)}/{len(paths)} slides re-renderizados")
+    return paths
+
+def edit_slide(name: str, index: int, text: str = None, image_path: str = None,
+               parallel: bool = False) -> List[str]:
+    """Troca o texto e/ou a capa do slide index (1-indexado) e re-renderiza só ele."""
+    slides = [dict(slide) for slide in load_manifest(name)["slides"]]
+    if not 1 <= index <= len(slides):
+        raise ImageGenerationError(f"Slide {index} fora do carrossel '{name}' (1..{len(slides)}).")
+    if text is not None:
+        slides[index - 1]["text"] = text
+    if image_path is not None:
+        slides[index - 1]["image_path"] = image_path
+    return edit_carousel(name, slides, parallel=parallel)
+
+@dataclass
+class BatchResult:
+    """Resultado de um carrossel do lote: caminhos na ordem dos slides ou o erro."""
+    name: str
+    paths: List[Optional[str]]
+    error: Optional[Exception] = None
+
+def generate_carousel_batch(
+    specs: Iterable[Dict],
+    parallel: bool = True,
+    profile: str = SLIDE_PROFILE,
+    max_bytes: int = None
+) -> Iterator[BatchResult]:
+    """
+    Renderiza muitos carrosséis em um único job no render_pool aquecido.
+
+    specs: Iterável (pode ser um gerador preguiçoso) de
+           {"name": "...", "slides": [{"text": ..., "image_path": ...}], "theme": "caverna"}
+    Os slides de todos os carrosséis entram no mesmo pool assim que cada spec chega,
+    e cada BatchResult é emitido quando o seu carrossel termina (não na ordem de entrada).
+    Fontes, fundos e render_cache ficam quentes nos workers entre um carrossel e outro.
+    Se um worker morrer (OOM, segfault), o pool é recriado como no run_jobs e cada slide
+    afetado é tentado mais uma vez (em série, se não houver como recriar o pool).
+    """
+    pool = get_render_pool() if parallel else None
+    pending: Dict[Future, Tuple[int, int, object]] = {}
+    state: Dict[int, Dict] = {}
+    
+    def submit(job_id: int, index: int):
+        nonlocal pool
+        job = state[job_id]["jobs"][index]
+        if pool is not None:
+            try:
+                pending[pool.submit(create_slide, **job)] = (job_id, index, pool)
+                return
+            except BrokenProcessPool:
+                logger.warning("⚠️ Pool de processos quebrado. Recriando.")
+                pool = replace_render_pool(pool)
+                if pool is not None:
+                    pending[pool.submit(create_slide, **job)] = (job_id, index, pool)
+                    return
+        # Sem pool: renderiza aqui mesmo (o job foi montado sem codificação em segundo plano)
+        future = Future()
+        try:
+            future.set_result(create_slide(**job))
+        except Exception as e:
+            future.set_exception(e)
+        pending[future] = (job_id, index, None)
+    
+    def collect(done) -> Iterator[BatchResult]:
+        nonlocal pool
+        for future in done:
+            job_id, index, used = pending.pop(future)
+            entry = state[job_id]
+            try:
+                entry["paths"][index] = future.result()
+            except BrokenProcessPool as e:
+                if index not in entry["retried"]:
+                    entry["retried"].add(index)
+                    if pool is used:
+                        logger.warning("⚠️ Pool de processos quebrado. Recriando e repetindo os slides afetados.")
+                        pool = replace_render_pool(used)
+                    submit(job_id, index)
+                    continue
+                entry["errors"][index] = e
+            except Exception as e:
+                entry["errors"][index] = e
+            entry["remaining"] -= 1
+            if entry["remaining"] == 0:
+                del state[job_id]
+                error = RenderError(entry["errors"], entry["paths"]) if entry["errors"] else None
+                if error is None:
+                    _write_manifest(entry["dir"], entry["slides"], entry["theme"], profile, max_bytes, entry["paths"])
+                yield BatchResult(entry["name"], entry["paths"], error)
+    
+    for job_id, spec in enumerate(specs):
+        name = spec["name"]
+        carousel_dir = os.path.join(OUTPUT_DIR, name)
+        os.makedirs(carousel_dir, exist_ok=True)
+        theme = spec.get("theme", "caverna")
+        jobs = _slide_jobs(spec["slides"], theme, carousel_dir, profile, max_bytes, background=pool is None)
+        
+        if pool is None or not jobs:
+            try:
+                paths = run_jobs(create_slide, jobs, parallel=False)
+            except RenderError as e:
+                yield BatchResult(name, e.results, e)
+                continue
+            _write_manifest(carousel_dir, spec["slides"], theme, profile, max_bytes, paths)
+            yield BatchResult(name, paths)
+            continue
+        
+        state[job_id] = {"name": name, "dir": carousel_dir, "slides": spec["slides"], "theme": theme, "jobs": jobs,
+                         "paths": [None] * len(jobs), "errors": {}, "remaining": len(jobs), "retried": set()}
+        for index in range(len(jobs)):
+            submit(job_id, index)
+        
+        # Emite o que já terminou sem bloquear a chegada do próximo spec
+        yield from collect([f for f in list(pending) if f.done()])
+    
+    while pending:
+        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+        yield from collect(done)
+
+def render_carousel_bytes(
+    slides_data: List[Dict],
+    theme: str = "caverna",
+    profile: str = SLIDE_PROFILE,
+    max_bytes: int = None
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Renderiza o carrossel inteiro em memória.
+    Gera (nome_do_arquivo, bytes) por slide, na ordem; nada é gravado em OUTPUT_DIR.
+    """
+    total = len(slides_data)
+    for i, slide in enumerate(slides_data, 1):
+        key = slide_cache_key(slide["text"], i, total, theme, slide.get("image_path"), profile, max_bytes)
+        data = render_cache.get(key)
+        if data is None:
+            img = render_slide_image(slide["text"], i, total, theme, slide.get("image_path"))
+            data = encode(img, profile, max_bytes)
+            render_cache.put(key, data)
+        yield output_path_for(f"{i:02d}_slide.png", profile), data
+
+def render_carousel_zip(
+    slides_data: List[Dict],
+    theme: str = "caverna",
+    profile: str = SLIDE_PROFILE,
+    max_bytes: int = None
+) -> io.BytesIO:
+    """ZIP do carrossel montado direto da memória (serverless: sem ida e volta pelo /tmp)."""
+    return zip_buffers(render_carousel_bytes(slides_data, theme, profile, max_bytes))
+
+def render_carousel_preview(
+    slides_data: List[Dict],
+    theme: str = "caverna",
+    scale: float = PREVIEW_SCALE
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Previews rápidos (nome, bytes WebP) para conferir o layout antes de gerar em alta.
+    Não usa render_cache nem grava nada; a capa sai do cache de get_fitted_cover.
+    """
+    total = len(slides_data)
+    for i, slide in enumerate(slides_data, 1):
+        img = downscale(render_slide_image(slide["text"], i, total, theme, slide.get("image_path")), scale)
+        yield output_path_for(f"{i:02d}_slide.png", PREVIEW_PROFILE), encode(img, PREVIEW_PROFILE)
+
 if __name__ == "__main__":
     test_data = [
         {"text": "A Matrix está te observando."},
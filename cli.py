@@ -22,6 +22,11 @@ HELP = """
 📋 COMANDOS DISPONÍVEIS:
 
   generate [n]      Gera [n] vídeos (padrão: 5)
+                    --draft: rascunhos 540p/15fps sem música
+                    --background-final: finais em segundo plano
+  approve <mp4>     Renderiza a versão final de um rascunho
+  thumbnail <título|mp4>  Gera thumbnail
+                    --platforms[=tiktok,youtube,...]: uma por plataforma
   test              Gera 1 vídeo de teste
   schedule          Gerencia scheduler
   post              Gerencia postagens
@@ -33,6 +38,7 @@ HELP = """
 📌 EXEMPLOS:
 
   python cli.py generate 10     Gera 10 vídeos
+  python cli.py generate 3 --draft   Gera 3 rascunhos rápidos
   python cli.py test            Testa o sistema
   python cli.py schedule start  Inicia scheduler
   python cli.py analytics       Mostra dashboard
@@ -42,22 +48,52 @@ HELP = """
 
 def cmd_generate(args: list):
     """Comando para gerar vídeos."""
-    num = int(args[0]) if args else 5
+    num = int(args[0]) if args and args[0].isdigit() else 5
     use_trends = "--no-trends" not in args
+    profile = "draft" if "--draft" in args else "final"
+    background_final = "--background-final" in args
     
     print(f"\n🎬 Gerando {num} vídeos...")
-    print(f"   Trends: {'Sim' if use_trends else 'Não'}\n")
+    print(f"   Trends: {'Sim' if use_trends else 'Não'}")
+    print(f"   Perfil: {profile}{' (finais em segundo plano)' if background_final else ''}\n")
     
     async def run():
         from main import run_full_pipeline
-        return await run_full_pipeline(num, use_trends)
+        return await run_full_pipeline(num, use_trends, profile=profile, background_final=background_final)
     
     videos = asyncio.run(run())
     
+    if background_final:
+        from main import final_renders
+        from logger import get_logger
+        logger = get_logger()
+        print(f"⏳ Aguardando {len(final_renders)} versões finais...")
+        for future in list(final_renders.values()):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"❌ Erro na renderização final: {e}")
+    
     print(f"\n✅ {len(videos)} vídeos gerados!")
     return videos
 
 
+def cmd_approve(args: list):
+    """Comando para aprovar rascunhos e renderizar as versões finais."""
+    if not args:
+        print("Uso: python cli.py approve <rascunho.mp4> [...]")
+        return []
+    
+    async def run():
+        from main import render_final
+        return [await render_final(path) for path in args]
+    
+    videos = asyncio.run(run())
+    for path in videos:
+        print(f"✅ Final: {path}")
+    return videos
+
+
 def cmd_test(args: list):
     """Comando para testar o sistema."""
     print("\n🔬 Executando teste rápido...\n")
@@ -161,8 +197,18 @@ def cmd_thumbnail(args: list):
     """Comando para gerar thumbnails."""
     from thumbnail_generator import thumbnail_gen
     
+    platforms = next((a for a in args if a.startswith("--platforms")), None)
+    args = [a for a in args if a != platforms]
+    
     if args and args[0].endswith(".mp4"):
         thumb = thumbnail_gen.create_from_video(args[0])
+    elif platforms:
+        # Todas as plataformas de SIZES (ou só as pedidas), com um render por proporção
+        title = " ".join(args) if args else "Video Viral"
+        names = [p for p in platforms.partition("=")[2].split(",") if p] or None
+        for platform, path in thumbnail_gen.create_platform_set(title, platforms=names).items():
+            print(f"✅ Thumbnail {platform}: {path}")
+        return
     else:
         title = " ".join(args) if args else "Video Viral"
         thumb = thumbnail_gen.create_viral_thumbnail(title)
@@ -172,6 +218,7 @@ def cmd_thumbnail(args: list):
 
 COMMANDS = {
     "generate": cmd_generate,
+    "approve": cmd_approve,
     "test": cmd_test,
     "schedule": cmd_schedule,
     "post": cmd_post,
@@ -14,6 +14,9 @@ VIDEO_WIDTH = 1920
 VIDEO_HEIGHT = 1080
 FPS = 30
 
+# Cards do vídeo passam em memória para o video_engine; ARCHIVE_CARDS=true também grava os PNGs
+ARCHIVE_CARDS = os.getenv("ARCHIVE_CARDS", "false").lower() == "true"
+
 # Configurações de TTS
 TTS_VOICE = "pt-BR-FranciscaNeural"
 TTS_RATE = "+15%"
@@ -0,0 +1,214 @@
+"""
+Encoders - Etapa de codificação de saída com perfis nomeados
+JPEG Instagram, JPEG progressivo otimizado, WebP e PNG paletizado, com orçamento de bytes opcional.
+A codificação pode rodar em threads de fundo (Pillow libera o GIL no encoder).
+"""
+
+import io
+import os
+import threading
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+from logger import get_logger
+from render_cache import render_cache
+
+logger = get_logger()
+
+
+@dataclass
+class EncodeProfile:
+    """Perfil de codificação."""
+    name: str
+    format: str
+    ext: str
+    params: Dict = field(default_factory=dict)
+    quality: Optional[int] = None      # None = formato sem qualidade (PNG)
+    min_quality: int = 40              # Piso da busca quando há orçamento de bytes
+    palette: Union[bool, str] = False  # True = sempre paletiza, "auto" = só se for sem perdas
+
+
+PROFILES = {
+    # Feed do Instagram: alta qualidade, sem subamostragem de cor (texto nítido)
+    "instagram_jpeg": EncodeProfile("instagram_jpeg", "JPEG", ".jpg",
+                                    {"subsampling": 0, "optimize": True}, quality=95),
+    # Web/ZIP: progressivo + tabelas Huffman otimizadas
+    "jpeg_progressive": EncodeProfile("jpeg_progressive", "JPEG", ".jpg",
+                                      {"subsampling": 2, "optimize": True, "progressive": True}, quality=85),
+    "webp": EncodeProfile("webp", "WEBP", ".webp", {"method": 4}, quality=85),
+    # Slides de cor chapada (fundo sólido + texto): paleta de até 256 cores
+    "png_palette": EncodeProfile("png_palette", "PNG", ".png", {"optimize": True}, palette=True),
+    # PNG comum, mas paletizado quando a imagem cabe em 256 cores sem perdas
+    "png_auto": EncodeProfile("png_auto", "PNG", ".png", {"compress_level": 6}, palette="auto"),
+    # Previews em baixa resolução: WebP com o método mais rápido
+    "preview_webp": EncodeProfile("preview_webp", "WEBP", ".webp", {"method": 0}, quality=70),
+}
+
+DEFAULT_PROFILE = "instagram_jpeg"
+PREVIEW_PROFILE = "preview_webp"
+
+
+def get_profile(profile: Union[str, EncodeProfile, None]) -> EncodeProfile:
+    """Aceita nome ou objeto; nomes desconhecidos caem no perfil padrão."""
+    if isinstance(profile, EncodeProfile):
+        return profile
+    if profile not in PROFILES:
+        if profile is not None:
+            logger.warning(f"⚠️ Perfil de encoder desconhecido '{profile}'. Usando {DEFAULT_PROFILE}.")
+        profile = DEFAULT_PROFILE
+    return PROFILES[profile]
+
+
+def _to_palette(img: Image.Image, colors: int = 256, lossless_only: bool = False) -> Optional[Image.Image]:
+    """Converte para modo P. Com lossless_only, só converte se a imagem já tiver <= colors cores."""
+    # getcolors em "L" devolve inteiros, não tuplas RGB: a paleta é sempre montada em RGB
+    img = img.convert("RGB") if img.mode != "RGB" else img
+    used = img.getcolors(colors)
+    if used is not None:
+        # Paleta exata com as cores presentes: cada pixel vira o índice da sua cor (sem perdas)
+        rgb = np.array([color for _, color in used], dtype=np.uint32).reshape(-1, 3)
+        keys = np.sort((rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2])
+        pixels = np.asarray(img, dtype=np.uint32)
+        packed = (pixels[:, :, 0] << 16) | (pixels[:, :, 1] << 8) | pixels[:, :, 2]
+        paletted = Image.fromarray(np.searchsorted(keys, packed).astype(np.uint8), "P")
+        paletted.putpalette(np.stack([keys >> 16, (keys >> 8) & 255, keys & 255], axis=1).astype(np.uint8).tobytes())
+        return paletted
+    if lossless_only:
+        return None
+    return img.quantize(colors=colors, dither=Image.Dither.FLOYDSTEINBERG)
+
+
+def _encode_once(img: Image.Image, prof: EncodeProfile, quality: Optional[int] = None,
+                 colors: int = 256) -> bytes:
+    out = img.convert("RGB") if img.mode not in ("RGB", "L", "P") else img
+    if prof.palette and out.mode != "P":
+        paletted = _to_palette(out, colors, lossless_only=(prof.palette == "auto"))
+        out = paletted if paletted is not None else out
+
+    params = dict(prof.params)
+    if prof.quality is not None:
+        params["quality"] = quality if quality is not None else prof.quality
+
+    buf = io.BytesIO()
+    out.save(buf, prof.format, **params)
+    return buf.getvalue()
+
+
+def encode(img: Image.Image, profile: Union[str, EncodeProfile] = DEFAULT_PROFILE,
+           max_bytes: Optional[int] = None) -> bytes:
+    """
+    Codifica a imagem segundo o perfil.
+
+    Args:
+        max_bytes: Orçamento por slide. Formatos com qualidade fazem busca binária
+                   pela maior qualidade que cabe; PNG reduz a paleta (256 -> 128 -> 64).
+                   Se nada couber, devolve a menor versão obtida e loga um aviso.
+    """
+    prof = get_profile(profile)
+    data = _encode_once(img, prof)
+    if max_bytes is None or len(data) <= max_bytes:
+        return data
+
+    if prof.quality is not None:
+        lo, hi = prof.min_quality, prof.quality - 1
+        best = None
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            candidate = _encode_once(img, prof, quality=mid)
+            if len(candidate) <= max_bytes:
+                best, lo = candidate, mid + 1
+            else:
+                data, hi = candidate, mid - 1
+        if best is not None:
+            return best
+    else:
+        palette_prof = EncodeProfile(prof.name, prof.format, prof.ext, prof.params, palette=True)
+        for colors in (256, 128, 64):
+            data = _encode_once(img, palette_prof, colors=colors)
+            if len(data) <= max_bytes:
+                return data
+
+    logger.warning(f"⚠️ Orçamento de {max_bytes} bytes não atingido com {prof.name} ({len(data)} bytes).")
+    return data
+
+
+def output_path_for(path: str, profile: Union[str, EncodeProfile] = DEFAULT_PROFILE) -> str:
+    """Troca a extensão do caminho pela extensão do perfil."""
+    return os.path.splitext(path)[0] + get_profile(profile).ext
+
+
+def write_bytes(data: bytes, path: str) -> str:
+    """Grava bytes já codificados (ex: acerto do render_cache)."""
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def save_image(img: Image.Image, path: str, profile: Union[str, EncodeProfile] = DEFAULT_PROFILE,
+               max_bytes: Optional[int] = None, cache_key: Optional[str] = None) -> str:
+    """
+    Codifica e grava; retorna o caminho final (com a extensão do perfil).
+    cache_key: se informado, os bytes também vão para o render_cache.
+    """
+    data = encode(img, profile, max_bytes)
+    if cache_key:
+        render_cache.put(cache_key, data)
+    return write_bytes(data, output_path_for(path, profile))
+
+
+def zip_buffers(items: Iterable[Tuple[str, bytes]]) -> io.BytesIO:
+    """
+    Monta um ZIP em memória a partir de (nome, bytes).
+    Imagens já são comprimidas, então os arquivos entram sem deflate (ZIP_STORED).
+    """
+    memory_file = io.BytesIO()
+    with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_STORED) as zf:
+        for name, data in items:
+            zf.writestr(name, data)
+    memory_file.seek(0)
+    return memory_file
+
+
+def write_zip(items: Iterable[Tuple[str, bytes]], path: str) -> str:
+    """Grava um ZIP (ZIP_STORED) no disco de forma atômica."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as zf:
+        for name, data in items:
+            zf.writestr(name, data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def patch_zip(path: str, changes: Dict[str, Optional[bytes]]) -> str:
+    """
+    Atualiza um ZIP existente: troca/adiciona as entradas de changes (None remove).
+    As demais entradas são copiadas como estão (STORED: sem recomprimir nada);
+    a troca do arquivo é atômica, então um download em andamento nunca vê um ZIP pela metade.
+    """
+    with zipfile.ZipFile(path) as src:
+        kept = [(info.filename, src.read(info)) for info in src.infolist() if info.filename not in changes]
+    added = [(name, data) for name, data in changes.items() if data is not None]
+    return write_zip(sorted(kept + added), path)
+
+
+class EncoderStage:
+    """Codificação em threads de fundo: o render segue para o próximo slide enquanto este é gravado."""
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="encoder")
+
+    def submit(self, img: Image.Image, path: str, profile: Union[str, EncodeProfile] = DEFAULT_PROFILE,
+               max_bytes: Optional[int] = None, cache_key: Optional[str] = None) -> Future:
+        """Agenda save_image; o Future resolve para o caminho final."""
+        return self._executor.submit(save_image, img, path, profile, max_bytes, cache_key)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+# Instância global
+encoder_stage = EncoderStage()
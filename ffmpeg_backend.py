@@ -0,0 +1,444 @@
+"""
+FFmpeg Backend - Renderização nativa da timeline dos vídeos
+Compila cards + Ken Burns + fades + narração/música em um único filter graph do ffmpeg,
+em vez de compor cada frame em Python (o moviepy continua como fallback no video_engine).
+"""
+
+import hashlib
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from error_handler import VideoGenerationError
+from logger import get_logger
+from render_cache import CACHE_DIR, IS_SERVERLESS, RenderCache, make_key
+
+logger = get_logger()
+
+# Versão dos clipes cacheados: mude ao alterar a cadeia de filtros ou os parâmetros do encoder
+SEGMENT_VERSION = "3"
+SEGMENT_CACHE_DIR = os.path.join(os.path.dirname(CACHE_DIR), "segments")
+SEGMENT_CACHE_MB = int(os.environ.get("SEGMENT_CACHE_MB", 256 if IS_SERVERLESS else 2048))
+
+# Trecho de duração fixa do começo (zoom in) ou fim (zoom out) de cada card, independente da
+# narração: é ele que vai para o segment_cache; o restante do card vira um segmento à parte.
+# Curto para caber nos cards curtos (cacheável a partir de CARD_CLIP_SECONDS + transição)
+CARD_CLIP_SECONDS = 2.0
+
+# Duração típica de um card (título + 3-5 ferramentas + CTA em 30-45s de narração): o trecho fixo
+# anda zoom_ratio * CARD_CLIP_SECONDS / CARD_TYPICAL_SECONDS, e o card inteiro nunca passa de 1+zoom_ratio
+CARD_TYPICAL_SECONDS = 6.0
+
+# Threads do libx264 por clipe: fixo (não depende da máquina nem do número de workers) porque
+# a divisão em threads muda o bitstream, e clipes cacheados em execuções diferentes são unidos por cópia
+SEGMENT_THREADS = 4
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+class FFmpegError(VideoGenerationError):
+    """ffmpeg ausente ou terminou com erro (stderr resumido na mensagem)."""
+
+
+def get_ffmpeg_exe() -> Optional[str]:
+    """ffmpeg do sistema ou o binário do imageio-ffmpeg (o mesmo que o moviepy usa)."""
+    exe = shutil.which("ffmpeg")
+    if exe:
+        return exe
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def ffmpeg_command(args: Sequence[str]) -> List[str]:
+    """Linha de comando completa (sobrescrevendo a saída, só erros no stderr)."""
+    exe = get_ffmpeg_exe()
+    if not exe:
+        raise FFmpegError("FFmpeg não encontrado no PATH nem via imageio-ffmpeg")
+    return [exe, "-hide_banner", "-loglevel", "error", "-y", *args]
+
+
+def ffmpeg_failure(returncode: int, stderr: bytes) -> FFmpegError:
+    """FFmpegError com as últimas linhas do stderr."""
+    tail = stderr.decode("utf-8", "replace").strip().splitlines()[-5:]
+    return FFmpegError(f"ffmpeg falhou ({returncode}): {' | '.join(tail)}")
+
+
+def run_ffmpeg(args: Sequence[str]) -> None:
+    """Executa o ffmpeg e levanta FFmpegError se falhar."""
+    proc = subprocess.run(ffmpeg_command(args), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise ffmpeg_failure(proc.returncode, proc.stderr)
+
+
+def probe_duration(path: str) -> float:
+    """Duração de um arquivo de mídia em segundos (lida do cabeçalho pelo próprio ffmpeg)."""
+    exe = get_ffmpeg_exe()
+    if not exe:
+        raise FFmpegError("FFmpeg não encontrado no PATH nem via imageio-ffmpeg")
+    proc = subprocess.run([exe, "-hide_banner", "-i", path], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    match = _DURATION_RE.search(proc.stderr.decode("utf-8", "replace"))
+    if not match:
+        raise FFmpegError(f"Não foi possível ler a duração de {path}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+@dataclass
+class Segment:
+    """
+    Um trecho da timeline: imagem, duração, direção do zoom e fades nas bordas.
+    zoom_from/zoom_to fixam o zoom no início e no fim do trecho (None = 1 <-> 1+zoom_ratio);
+    cacheable marca os trechos de duração fixa, reaproveitáveis entre vídeos.
+    """
+    image: str
+    duration: float
+    zoom_in: bool = True
+    fade_in: bool = False
+    fade_out: bool = False
+    zoom_from: Optional[float] = None
+    zoom_to: Optional[float] = None
+    cacheable: bool = False
+
+
+def hex_color(rgb: Tuple[int, int, int]) -> str:
+    return "0x{:02X}{:02X}{:02X}".format(*rgb)
+
+
+def segment_filter(segment: Segment, width: int, height: int, fps: int, zoom_ratio: float,
+                   transition: float, pad_color: Tuple[int, int, int]) -> str:
+    """
+    Cadeia de filtros de um card: encaixa no quadro (pad com a cor do contexto),
+    Ken Burns via zoompan (centralizado, 1 -> 1+zoom_ratio ou o inverso) e fade de/para preto.
+    """
+    frames = max(1, round(segment.duration * fps))
+    if segment.zoom_from is not None:
+        delta = segment.zoom_to - segment.zoom_from
+        zoom = f"{segment.zoom_from:.6g}{'+' if delta >= 0 else '-'}{abs(delta):.6g}*on/{frames}"
+    elif segment.zoom_in:
+        zoom = f"1+{zoom_ratio}*on/{frames}"
+    else:
+        zoom = f"{1 + zoom_ratio}-{zoom_ratio}*on/{frames}"
+
+    chain = [
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease",
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color={hex_color(pad_color)}",
+        f"zoompan=z='{zoom}':x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':d={frames}:s={width}x{height}:fps={fps}",
+        "setsar=1",
+    ]
+    length = frames / fps
+    if segment.fade_in and transition > 0:
+        chain.append(f"fade=t=in:st=0:d={transition}")
+    if segment.fade_out and transition > 0:
+        chain.append(f"fade=t=out:st={max(length - transition, 0):.3f}:d={transition}")
+    return ",".join(chain)
+
+
+def build_filter_graph(segments: List[Segment], width: int, height: int, fps: int,
+                       zoom_ratio: float = 0.06, transition: float = 0.2,
+                       pad_color: Tuple[int, int, int] = (0, 0, 0),
+                       has_music: bool = False, music_volume: float = 0.18) -> str:
+    """
+    filter_complex da timeline inteira.
+    Entradas esperadas: 0..n-1 = cards, n = narração, n+1 = música (em loop) se has_music.
+    Saídas: [vout] e [aout].
+    """
+    n = len(segments)
+    parts = [f"[{i}:v]{segment_filter(seg, width, height, fps, zoom_ratio, transition, pad_color)}[v{i}]"
+             for i, seg in enumerate(segments)]
+    parts.append("".join(f"[v{i}]" for i in range(n)) + f"concat=n={n}:v=1:a=0,format=yuv420p[vout]")
+    parts.append(audio_filter(n, has_music, music_volume))
+    return ";".join(parts)
+
+
+def audio_filter(narration_index: int, has_music: bool = False, music_volume: float = 0.18) -> str:
+    """
+    Mixagem narração + música -> [aout]. A música é a entrada seguinte à narração;
+    normalize=0 mantém a narração no volume original.
+    """
+    n = narration_index
+    if not has_music:
+        return f"[{n}:a]anull[aout]"
+    return (f"[{n + 1}:a]volume={music_volume}[music];"
+            f"[{n}:a][music]amix=inputs=2:duration=first:dropout_transition=0:normalize=0[aout]")
+
+
+def audio_inputs(audio_path: str, music_path: Optional[str] = None) -> List[str]:
+    """Argumentos de entrada da narração e, se houver, da música em loop."""
+    args = ["-i", audio_path]
+    if music_path:
+        args += ["-stream_loop", "-1", "-i", music_path]
+    return args
+
+
+def image_digest(image: Union[str, np.ndarray, Image.Image]) -> str:
+    """SHA-256 do conteúdo de um card (arquivo ou frame em memória)."""
+    if isinstance(image, str):
+        return file_digest(image)
+    pixels = np.ascontiguousarray(np.asarray(image))
+    digest = hashlib.sha256(str(pixels.shape).encode())
+    digest.update(pixels.tobytes())
+    return digest.hexdigest()
+
+
+def zoom_direction(image: Union[str, np.ndarray, Image.Image]) -> bool:
+    """
+    Direção do Ken Burns derivada do conteúdo do card (True = zoom in): varia entre cards
+    como um sorteio, mas o mesmo card sempre se move igual (rascunho, final e cache).
+    """
+    return int(image_digest(image)[-1], 16) % 2 == 0
+
+
+def plan_segments(images: Sequence, duration: float, fps: int, zoom_in: Sequence[bool],
+                  zoom_ratio: float = 0.06, transition: float = 0.2,
+                  clip_seconds: float = CARD_CLIP_SECONDS,
+                  typical_seconds: float = CARD_TYPICAL_SECONDS) -> List[Segment]:
+    """
+    Timeline em trechos. A duração da narração é dividida igualmente entre os cards. Cada card com sobra vira:
+    - um trecho fixo de clip_seconds entre 1 e 1+zoom_ratio*clip_seconds/typical_seconds
+      (cacheable: não depende da narração)
+    - um trecho variável com o restante (depois do fixo no zoom in, antes no zoom out): na mesma
+      velocidade do fixo em cards de até typical_seconds (zoom final proporcional à duração) e mais
+      devagar nos mais longos, que terminam em 1+zoom_ratio. O zoom nunca passa de 1+zoom_ratio
+    Cards curtos demais para o corte ficam num trecho só, com zoom 1 <-> 1+zoom_ratio.
+    images pode conter caminhos ou índices: o valor só é copiado para Segment.image.
+    """
+    count = len(images)
+    frames = max(1, round(duration / count * fps))
+    clip = round(clip_seconds * fps)
+    typical = max(clip, round(typical_seconds * fps))
+    fade = max(1, math.ceil(transition * fps))
+    mid = 1 + zoom_ratio * clip / typical if typical else 1.0
+
+    segments = []
+    for i, image in enumerate(images):
+        fade_in, fade_out = i > 0, i < count - 1
+        rest = frames - clip
+        if clip <= 0 or rest < fade:
+            segments.append(Segment(image, frames / fps, zoom_in[i], fade_in, fade_out))
+            continue
+        end = mid + zoom_ratio * min(rest, typical - clip) / typical
+        if zoom_in[i]:
+            segments += [Segment(image, clip / fps, True, fade_in, False, 1.0, mid, cacheable=True),
+                         Segment(image, rest / fps, True, False, fade_out, mid, end)]
+        else:
+            segments += [Segment(image, rest / fps, False, fade_in, False, end, mid),
+                         Segment(image, clip / fps, False, False, fade_out, mid, 1.0, cacheable=True)]
+    return segments
+
+
+def _materialize(images: Sequence[Union[str, np.ndarray, Image.Image]], tmp_dir: str) -> List[str]:
+    """Frames em memória viram PPM (sem compressão) para o ffmpeg ler; caminhos passam direto."""
+    paths = []
+    for i, image in enumerate(images):
+        if isinstance(image, str):
+            paths.append(image)
+            continue
+        img = image if isinstance(image, Image.Image) else Image.fromarray(np.asarray(image))
+        path = os.path.join(tmp_dir, f"frame_{i:03d}.ppm")
+        img.convert("RGB").save(path, "PPM")
+        paths.append(path)
+    return paths
+
+
+def render_timeline(
+    images: Sequence[Union[str, np.ndarray, Image.Image]],
+    audio_path: str,
+    output_path: str,
+    width: int,
+    height: int,
+    fps: int,
+    zoom_in: Optional[Sequence[bool]] = None,
+    zoom_ratio: float = 0.06,
+    transition: float = 0.2,
+    pad_color: Tuple[int, int, int] = (0, 0, 0),
+    music_path: Optional[str] = None,
+    music_volume: float = 0.18,
+    preset: str = "ultrafast",
+    crf: int = 23,
+) -> str:
+    """
+    Renderiza o vídeo inteiro com uma única execução do ffmpeg.
+    A duração de cada card é a duração da narração dividida igualmente entre eles.
+    """
+    if not images:
+        raise FFmpegError("Nenhuma imagem válida encontrada!")
+
+    total = probe_duration(audio_path)
+    zoom_in = list(zoom_in) if zoom_in is not None else [zoom_direction(image) for image in images]
+
+    with tempfile.TemporaryDirectory(prefix="ffmpeg_frames_") as tmp_dir:
+        paths = _materialize(images, tmp_dir)
+        segments = plan_segments(paths, total, fps, zoom_in, zoom_ratio, transition)
+        has_music = bool(music_path and os.path.exists(music_path))
+        graph = build_filter_graph(segments, width, height, fps, zoom_ratio, transition,
+                                   pad_color, has_music, music_volume)
+
+        args: List[str] = []
+        for segment in segments:
+            args += ["-i", segment.image]
+        args += audio_inputs(audio_path, music_path if has_music else None)
+        args += [
+            "-filter_complex", graph,
+            "-map", "[vout]", "-map", "[aout]",
+            "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-r", str(fps),
+            "-c:a", "aac", "-t", f"{total:.3f}",
+            "-movflags", "+faststart",
+            output_path,
+        ]
+        logger.info(f"⚙️ FFmpeg: {len(paths)} cards, {total:.1f}s, {width}x{height}@{fps}")
+        run_ffmpeg(args)
+    return output_path
+
+
+# Instância global
+segment_cache = RenderCache(SEGMENT_CACHE_DIR, SEGMENT_CACHE_MB * 1024 * 1024)
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 do conteúdo do arquivo (a mesma imagem em outro caminho gera a mesma chave)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def segment_key(segment: Segment, width: int, height: int, fps: int, zoom_ratio: float,
+                transition: float, pad_color: Tuple[int, int, int], preset: str, crf: int) -> str:
+    """Chave do clipe: conteúdo da imagem + duração em frames + movimento + perfil do encoder."""
+    return make_key(
+        kind="segment",
+        version=SEGMENT_VERSION,
+        image=file_digest(segment.image),
+        frames=max(1, round(segment.duration * fps)),
+        motion=[segment.zoom_in, segment.zoom_from, segment.zoom_to, zoom_ratio,
+                segment.fade_in, segment.fade_out, transition],
+        profile=[width, height, fps, list(pad_color), preset, crf, SEGMENT_THREADS],
+    )
+
+
+def encode_segment(segment: Segment, output_path: str, width: int, height: int, fps: int,
+                   zoom_ratio: float = 0.06, transition: float = 0.2,
+                   pad_color: Tuple[int, int, int] = (0, 0, 0),
+                   preset: str = "ultrafast", crf: int = 23) -> str:
+    """
+    Codifica um único card (sem áudio) num clipe independente.
+    Todos os clipes usam os mesmos parâmetros de encoder e começam num keyframe,
+    então podem ser concatenados (ou reaproveitados do cache) por cópia de stream.
+    """
+    frames = max(1, round(segment.duration * fps))
+    run_ffmpeg([
+        "-i", segment.image,
+        "-vf", segment_filter(segment, width, height, fps, zoom_ratio, transition, pad_color) + ",format=yuv420p",
+        "-frames:v", str(frames), "-an",
+        "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-r", str(fps), "-threads", str(SEGMENT_THREADS),
+        output_path,
+    ])
+    return output_path
+
+
+def concat_and_mux(clips: Sequence[str], audio_path: str, output_path: str, duration: float,
+                   music_path: Optional[str] = None, music_volume: float = 0.18) -> str:
+    """Junta os clipes com o concat demuxer (vídeo por cópia) e mixa narração + música uma única vez."""
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as listing:
+        for clip in clips:
+            escaped = os.path.abspath(clip).replace("'", "'\\''")
+            listing.write(f"file '{escaped}'\n")
+    try:
+        run_ffmpeg([
+            "-f", "concat", "-safe", "0", "-i", listing.name,
+            *audio_inputs(audio_path, music_path),
+            "-filter_complex", audio_filter(1, bool(music_path), music_volume),
+            "-map", "0:v", "-map", "[aout]",
+            "-c:v", "copy", "-c:a", "aac", "-t", f"{duration:.3f}",
+            "-movflags", "+faststart",
+            output_path,
+        ])
+    finally:
+        os.remove(listing.name)
+    return output_path
+
+
+def render_segments(
+    images: Sequence[Union[str, np.ndarray, Image.Image]],
+    audio_path: str,
+    output_path: str,
+    width: int,
+    height: int,
+    fps: int,
+    zoom_in: Optional[Sequence[bool]] = None,
+    zoom_ratio: float = 0.06,
+    transition: float = 0.2,
+    pad_color: Tuple[int, int, int] = (0, 0, 0),
+    music_path: Optional[str] = None,
+    music_volume: float = 0.18,
+    preset: str = "ultrafast",
+    crf: int = 23,
+    workers: int = 4,
+    cache: bool = True,
+) -> str:
+    """
+    Mesma timeline do render_timeline, cortada nos trechos do plan_segments:
+    cada trecho vira um clipe codificado por um ffmpeg próprio (até workers em paralelo),
+    com os fades nas bordas do próprio clipe. Os clipes são unidos por cópia de stream
+    e o áudio é mixado uma única vez no final.
+
+    Args:
+        cache: Reaproveita do segment_cache os trechos fixos dos cards (mesma imagem,
+               movimento e perfil, qualquer narração) e guarda os novos
+    """
+    if not images:
+        raise FFmpegError("Nenhuma imagem válida encontrada!")
+
+    total = probe_duration(audio_path)
+    zoom_in = list(zoom_in) if zoom_in is not None else [zoom_direction(image) for image in images]
+
+    with tempfile.TemporaryDirectory(prefix="ffmpeg_segments_") as tmp_dir:
+        paths = _materialize(images, tmp_dir)
+        segments = plan_segments(paths, total, fps, zoom_in, zoom_ratio, transition)
+        workers = max(1, min(workers, len(segments)))
+
+        clips = [os.path.join(tmp_dir, f"segment_{i:03d}.mp4") for i in range(len(segments))]
+        keys = [segment_key(segment, width, height, fps, zoom_ratio, transition, pad_color, preset, crf)
+                if cache and segment.cacheable else None for segment in segments]
+        missing = []
+        first_by_key = {}
+        for i, key in enumerate(keys):
+            cached = segment_cache.get_path(key) if key else None
+            if cached:
+                clips[i] = cached
+            elif key in first_by_key:
+                clips[i] = clips[first_by_key[key]]  # mesmo card repetido no vídeo: codifica uma vez
+            else:
+                if key:
+                    first_by_key[key] = i
+                missing.append(i)
+
+        logger.info(f"⚙️ FFmpeg: {len(missing)}/{len(segments)} segmentos a codificar "
+                    f"({workers} x {SEGMENT_THREADS} threads), {total:.1f}s, {width}x{height}@{fps}")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="segment") as executor:
+            futures = {
+                i: executor.submit(encode_segment, segments[i], clips[i], width, height, fps, zoom_ratio,
+                                   transition, pad_color, preset, crf)
+                for i in missing
+            }
+            for i, future in futures.items():
+                future.result()
+                if keys[i]:
+                    segment_cache.put_file(keys[i], clips[i])
+
+        has_music = bool(music_path and os.path.exists(music_path))
+        concat_and_mux(clips, audio_path, output_path, total, music_path if has_music else None, music_volume)
+    return output_path
@@ -0,0 +1,82 @@
+"""
+Font Registry - Resolução e cache de fontes FreeType por processo
+Cada lista de candidatas é resolvida uma única vez; faces carregadas ficam em cache por (caminho, tamanho).
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+from PIL import ImageFont
+from logger import get_logger
+
+logger = get_logger()
+
+# Tamanho usado só para testar se a candidata abre
+_PROBE_SIZE = 12
+
+
+class FontRegistry:
+    """
+    Registro global de fontes.
+    Evita os os.path.exists + ImageFont.truetype repetidos a cada get_font.
+    """
+
+    def __init__(self):
+        self._resolved: Dict[Tuple[str, ...], Optional[str]] = {}
+        self._faces: Dict[Tuple[Optional[str], int], ImageFont.ImageFont] = {}
+        self._lock = threading.Lock()
+
+    def _try_open(self, candidate: str) -> bool:
+        """Caminhos são checados no disco; nomes soltos (ex: 'arial.ttf') vão direto ao FreeType."""
+        if (os.sep in candidate or "/" in candidate) and not os.path.exists(candidate):
+            return False
+        try:
+            ImageFont.truetype(candidate, _PROBE_SIZE)
+            return True
+        except Exception:
+            return False
+
+    def resolve(self, candidates: Sequence[str]) -> Optional[str]:
+        """Retorna a primeira candidata utilizável (None = fonte padrão do Pillow)."""
+        key = tuple(candidates)
+        if key in self._resolved:
+            return self._resolved[key]
+
+        chosen = next((c for c in key if self._try_open(c)), None)
+        with self._lock:
+            self._resolved[key] = chosen
+
+        if chosen is None:
+            logger.warning(f"⚠️ Nenhuma fonte encontrada em {len(key)} candidatas. Usando padrão.")
+        elif chosen != key[0]:
+            logger.info(f"🔤 Fonte fallback escolhida: {chosen}")
+        return chosen
+
+    def get_face(self, path: Optional[str], size: int) -> ImageFont.ImageFont:
+        """Face carregada uma vez por (caminho, tamanho)."""
+        key = (path, size)
+        face = self._faces.get(key)
+        if face is None:
+            face = ImageFont.truetype(path, size) if path else ImageFont.load_default()
+            with self._lock:
+                face = self._faces.setdefault(key, face)
+        return face
+
+    def load(self, candidates: Sequence[str], size: int) -> ImageFont.ImageFont:
+        """Atalho: resolve as candidatas e devolve a face no tamanho pedido."""
+        return self.get_face(self.resolve(candidates), size)
+
+    def report(self) -> Dict[Tuple[str, ...], Optional[str]]:
+        """Qual fonte foi escolhida para cada lista de candidatas."""
+        return dict(self._resolved)
+
+    def clear(self):
+        """Esvazia os caches (útil quando fontes são instaladas em runtime)."""
+        with self._lock:
+            self._resolved.clear()
+            self._faces.clear()
+
+
+# Instância global
+font_registry = FontRegistry()
@@ -0,0 +1,278 @@
+"""
+Frame Pipe - Encoder de frames brutos gerados em Python
+Para efeitos que o filter graph do ffmpeg não expressa: os frames são calculados
+em buffers NumPy reutilizáveis de um anel em memória compartilhada (workers em
+processos separados) e um único ffmpeg os consome como rawvideo pelo stdin.
+"""
+
+import os
+import subprocess
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from ffmpeg_backend import (
+    FFmpegError, audio_filter, audio_inputs, ffmpeg_command, ffmpeg_failure, plan_segments, probe_duration,
+    zoom_direction,
+)
+from logger import get_logger
+from render_pool import MAX_WORKERS, pool_context
+
+logger = get_logger()
+
+# Linhas processadas por vez (limita os buffers de rascunho de cada worker a poucos MB)
+BAND_ROWS = 120
+
+# Frames no anel além do número de workers (folga para o ffmpeg consumir enquanto eles calculam)
+RING_SLACK = 4
+
+
+@dataclass(frozen=True)
+class FramePose:
+    """Um frame da timeline: qual card, zoom do Ken Burns e opacidade (fade de/para preto)."""
+    index: int
+    zoom: float
+    alpha: float
+
+
+def frame_schedule(count: int, duration: float, fps: int, zoom_in: Sequence[bool],
+                   zoom_ratio: float = 0.06, transition: float = 0.2) -> Iterator[FramePose]:
+    """
+    Mesma timeline do ffmpeg_backend (plan_segments): duração dividida igualmente entre os cards,
+    zoom centralizado e fades de/para preto nas bordas internas.
+    """
+    for segment in plan_segments(list(range(count)), duration, fps, zoom_in, zoom_ratio, transition):
+        frames = max(1, round(segment.duration * fps))
+        length = frames / fps
+        if segment.zoom_from is not None:
+            start, end = segment.zoom_from, segment.zoom_to
+        else:
+            start, end = (1, 1 + zoom_ratio) if segment.zoom_in else (1 + zoom_ratio, 1)
+        for on in range(frames):
+            alpha = 1.0
+            if transition > 0:
+                t = on / fps
+                if segment.fade_in:
+                    alpha = min(alpha, t / transition)
+                if segment.fade_out:
+                    alpha = min(alpha, (length - t) / transition)
+            yield FramePose(segment.image, start + (end - start) * on / frames, max(0.0, min(alpha, 1.0)))
+
+
+class FrameScratch:
+    """Buffers de rascunho de um worker, alocados uma vez e reaproveitados em todos os frames."""
+
+    def __init__(self, width: int, band: int = BAND_ROWS):
+        self.band = band
+        self.rows = np.empty((band, width, 3), np.uint8)
+        self.rows_next = np.empty((band, width, 3), np.uint8)
+        self.blend = np.empty((band, width, 3), np.float32)
+        self.diff = np.empty((band, width, 3), np.float32)
+        self.cols = np.empty((band, width, 3), np.float32)
+        self.cols_next = np.empty((band, width, 3), np.float32)
+
+
+def _axis_map(size: int, zoom: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Índices vizinhos e pesos da interpolação bilinear de um recorte centralizado de size/zoom."""
+    crop = size / zoom
+    pos = (size - crop) / 2 + (np.arange(size) + 0.5) * (crop / size) - 0.5
+    np.clip(pos, 0, size - 1, out=pos)
+    first = pos.astype(np.intp)
+    second = np.minimum(first + 1, size - 1)
+    return first, second, (pos - first).astype(np.float32)
+
+
+def ken_burns_into(src: np.ndarray, out: np.ndarray, zoom: float, alpha: float,
+                   scratch: FrameScratch) -> np.ndarray:
+    """
+    Recorte centralizado de src ampliado por zoom (bilinear) e escurecido por alpha, escrito em out.
+    Só usa os buffers do scratch: nenhuma alocação do tamanho de um frame.
+    """
+    if zoom == 1 and alpha == 1:
+        np.copyto(out, src)
+        return out
+
+    height = out.shape[0]
+    rows, rows_next, wy = _axis_map(height, zoom)
+    cols, cols_next, wx = _axis_map(out.shape[1], zoom)
+    wx = wx[None, :, None]
+
+    for top in range(0, height, scratch.band):
+        bottom = min(top + scratch.band, height)
+        n = bottom - top
+        a, b = scratch.rows[:n], scratch.rows_next[:n]
+        blend, diff = scratch.blend[:n], scratch.diff[:n]
+        left, right = scratch.cols[:n], scratch.cols_next[:n]
+
+        # Vertical: a + (b - a) * wy
+        np.take(src, rows[top:bottom], axis=0, out=a, mode="clip")
+        np.take(src, rows_next[top:bottom], axis=0, out=b, mode="clip")
+        np.subtract(b, a, out=diff, dtype=np.float32)
+        np.multiply(diff, wy[top:bottom, None, None], out=diff)
+        np.add(diff, a, out=blend)
+
+        # Horizontal: left + (right - left) * wx
+        np.take(blend, cols, axis=1, out=left, mode="clip")
+        np.take(blend, cols_next, axis=1, out=right, mode="clip")
+        np.subtract(right, left, out=right)
+        np.multiply(right, wx, out=right)
+        np.add(left, right, out=left)
+
+        if alpha != 1:
+            np.multiply(left, alpha, out=left)
+        np.add(left, 0.5, out=left)
+        np.copyto(out[top:bottom], left, casting="unsafe")
+    return out
+
+
+def fit_frame(image: Union[str, np.ndarray, Image.Image], width: int, height: int,
+              pad_color: Tuple[int, int, int] = (0, 0, 0)) -> Image.Image:
+    """Encaixa a imagem no quadro mantendo a proporção, com as bordas na cor do contexto."""
+    if isinstance(image, str):
+        img = Image.open(image)
+    elif isinstance(image, Image.Image):
+        img = image
+    else:
+        img = Image.fromarray(np.asarray(image))
+    img = img.convert("RGB")
+    if img.size == (width, height):
+        return img
+
+    scale = min(width / img.width, height / img.height)
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    canvas = Image.new("RGB", (width, height), pad_color)
+    canvas.paste(img.resize(size, Image.BICUBIC), ((width - size[0]) // 2, (height - size[1]) // 2))
+    return canvas
+
+
+class SharedFrames:
+    """Bloco de frames RGB em memória compartilhada (repassado aos workers pelo initializer do pool)."""
+
+    def __init__(self, count: int, height: int, width: int, raw=None):
+        self.shape = (count, height, width, 3)
+        self.raw = raw if raw is not None else pool_context().RawArray("B", count * height * width * 3)
+        self.frames = np.frombuffer(self.raw, np.uint8).reshape(self.shape)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+
+# Estado de cada processo worker (preenchido pelo initializer do pool)
+_worker = {}
+
+
+def _init_worker(sources_raw, ring_raw, sources_shape, ring_shape):
+    count, height, width, _ = sources_shape
+    _worker["sources"] = SharedFrames(count, height, width, sources_raw).frames
+    _worker["ring"] = SharedFrames(ring_shape[0], height, width, ring_raw).frames
+    _worker["scratch"] = FrameScratch(width)
+
+
+def _render_slot(slot: int, index: int, zoom: float, alpha: float) -> int:
+    """Job do worker: calcula um frame direto no slot do anel."""
+    ken_burns_into(_worker["sources"][index], _worker["ring"][slot], zoom, alpha, _worker["scratch"])
+    return slot
+
+
+def write_video(
+    images: Sequence[Union[str, np.ndarray, Image.Image]],
+    audio_path: str,
+    output_path: str,
+    width: int,
+    height: int,
+    fps: int,
+    zoom_in: Optional[Sequence[bool]] = None,
+    zoom_ratio: float = 0.06,
+    transition: float = 0.2,
+    pad_color: Tuple[int, int, int] = (0, 0, 0),
+    music_path: Optional[str] = None,
+    music_volume: float = 0.18,
+    preset: str = "ultrafast",
+    crf: int = 23,
+    workers: Optional[int] = None,
+    slots: Optional[int] = None,
+) -> str:
+    """
+    Gera os frames em Python e os envia como rawvideo para um único ffmpeg.
+
+    Args:
+        workers: Processos que calculam frames (padrão RENDER_WORKERS/núcleos; 1 = no próprio processo)
+        slots: Tamanho do anel de frames (padrão workers + RING_SLACK)
+    """
+    if not images:
+        raise FFmpegError("Nenhuma imagem válida encontrada!")
+
+    total = probe_duration(audio_path)
+    zoom_in = list(zoom_in) if zoom_in is not None else [zoom_direction(image) for image in images]
+    workers = max(1, workers or MAX_WORKERS)
+    slots = slots or workers + RING_SLACK
+
+    # Cards encaixados no quadro uma única vez; os frames só recortam/escalam a partir deles
+    sources = SharedFrames(len(images), height, width)
+    for i, image in enumerate(images):
+        np.copyto(sources.frames[i], np.asarray(fit_frame(image, width, height, pad_color)))
+    ring = SharedFrames(slots, height, width)
+
+    pool = None
+    if workers > 1:
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(), initializer=_init_worker,
+                                       initargs=(sources.raw, ring.raw, sources.shape, ring.shape))
+        except (OSError, NotImplementedError) as e:
+            logger.warning(f"⚠️ Pool de processos indisponível ({e}). Gerando frames em série.")
+    if pool is None:
+        _init_worker(sources.raw, ring.raw, sources.shape, ring.shape)
+
+    has_music = bool(music_path and os.path.exists(music_path))
+    args: List[str] = [
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-framerate", str(fps), "-i", "pipe:0",
+    ]
+    args += audio_inputs(audio_path, music_path if has_music else None)
+    args += [
+        "-filter_complex", audio_filter(1, has_music, music_volume),
+        "-map", "0:v", "-map", "[aout]",
+        "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-t", f"{total:.3f}",
+        "-movflags", "+faststart",
+        output_path,
+    ]
+
+    logger.info(f"⚙️ Frame pipe: {len(images)} cards, {total:.1f}s, {width}x{height}@{fps}, "
+                f"{workers} worker(s), anel de {slots} frames")
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(ffmpeg_command(args), stdin=subprocess.PIPE,
+                                stdout=subprocess.DEVNULL, stderr=stderr)
+        pending: "deque[Future]" = deque()
+        try:
+            for k, pose in enumerate(frame_schedule(len(images), total, fps, zoom_in, zoom_ratio, transition)):
+                if len(pending) == slots:
+                    proc.stdin.write(ring.frames[pending.popleft().result()].data)
+                slot = k % slots
+                if pool is not None:
+                    pending.append(pool.submit(_render_slot, slot, pose.index, pose.zoom, pose.alpha))
+                else:
+                    done = Future()
+                    done.set_result(_render_slot(slot, pose.index, pose.zoom, pose.alpha))
+                    pending.append(done)
+            while pending:
+                proc.stdin.write(ring.frames[pending.popleft().result()].data)
+        except BrokenPipeError:
+            pass  # ffmpeg saiu antes; o erro vem do returncode abaixo
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+            returncode = proc.wait()
+
+        if returncode != 0:
+            stderr.seek(0)
+            raise ffmpeg_failure(returncode, stderr.read())
+    return output_path
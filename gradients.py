@@ -0,0 +1,45 @@
+"""
+Gradients - Fundos em gradiente vertical gerados em uma única operação NumPy
+Cache LRU por (tamanho, cor inicial, cor final); cada chamada recebe uma cópia barata.
+"""
+
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+RGB = Tuple[int, int, int]
+
+
+def hex_to_rgb(color: str) -> RGB:
+    """Converte '#RRGGBB' para tupla RGB."""
+    color = color.lstrip('#')
+    return tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
+
+
+@lru_cache(maxsize=32)
+def _build_gradient(size: Tuple[int, int], color_start: RGB, color_end: RGB) -> Image.Image:
+    """
+    Monta o gradiente inteiro de uma vez.
+    Mesma interpolação dos loops antigos: int(start + (end - start) * y / altura).
+    """
+    width, height = size
+    start = np.array(color_start, dtype=np.float64)
+    end = np.array(color_end, dtype=np.float64)
+    ratio = (np.arange(height, dtype=np.float64) / height)[:, None]
+    rows = (start + (end - start) * ratio).astype(np.int64)
+    rows = np.clip(rows, 0, 255).astype(np.uint8)
+    pixels = np.broadcast_to(rows[:, None, :], (height, width, 3))
+    return Image.fromarray(np.ascontiguousarray(pixels), "RGB")
+
+
+def get_gradient(size: Tuple[int, int], color_start: RGB, color_end: RGB) -> Image.Image:
+    """Retorna uma cópia do gradiente cacheado (pode ser desenhada sem afetar o cache)."""
+    key = (tuple(size), tuple(color_start), tuple(color_end))
+    return _build_gradient(*key).copy()
+
+
+def clear_cache():
+    """Esvazia o cache de gradientes."""
+    _build_gradient.cache_clear()
@@ -5,7 +5,17 @@ Cria imagens estilo TikTok em 1920x1080 (landscape) com texto grande e cores vib
 
 from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
 import os
+import random
+from functools import lru_cache
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
 from logger import get_logger
+from gradients import get_gradient
+from font_registry import font_registry
+import text_layout
+from text_sprites import draw_text, text_bbox
+from encoders import encoder_stage, save_image
+from render_pool import run_jobs
 
 logger = get_logger()
 
@@ -23,6 +33,9 @@ COLORS = {
 # LANDSCAPE 1920x1080
 VIDEO_SIZE = (1920, 1080)
 
+# Perfil de saída dos cards (encoders.PROFILES)
+CARD_PROFILE = "png_auto"
+
 # Contextos visuais para backgrounds
 CONTEXT_COLORS = {
     "tech": {"bg": (20, 25, 40), "accent": (0, 200, 255)},
@@ -36,22 +49,9 @@ CONTEXT_COLORS = {
 def create_gradient_background(size: tuple, color_start: tuple, color_end: tuple) -> Image.Image:
     """
     Cria um gradiente vertical de cor_start para cor_end.
+    Construído uma vez por combinação em gradients; aqui recebemos uma cópia.
     """
-    width, height = size
-    img = Image.new('RGB', size, color_start)
-    
-    for y in range(height):
-        # Calcular cor interpolada
-        ratio = y / height
-        r = int(color_start[0] + (color_end[0] - color_start[0]) * ratio)
-        g = int(color_start[1] + (color_end[1] - color_start[1]) * ratio)
-        b = int(color_start[2] + (color_end[2] - color_start[2]) * ratio)
-        
-        # Desenhar linha horizontal
-        for x in range(width):
-            img.putpixel((x, y), (r, g, b))
-    
-    return img
+    return get_gradient(size, color_start, color_end)
 
 
 def add_visual_elements(img: Image.Image, context: str = "tech") -> Image.Image:
@@ -69,50 +69,54 @@ def add_visual_elements(img: Image.Image, context: str = "tech") -> Image.Image:
         draw.line([(i, 0), (i + 200, img.height)], fill=line_color, width=1)
     
     # Adicionar círculos decorativos nos cantos
-    import random
-    random.seed(42)  # Seed fixa para consistência
+    rng = random.Random(42)  # Seed fixa para consistência (RNG local, sem mexer no random global)
     for _ in range(5):
-        x = random.randint(0, img.width)
-        y = random.randint(0, img.height)
-        radius = random.randint(50, 200)
+        x = rng.randint(0, img.width)
+        y = rng.randint(0, img.height)
+        radius = rng.randint(50, 200)
         circle_color = (accent[0] // 10, accent[1] // 10, accent[2] // 10)
         draw.ellipse([x-radius, y-radius, x+radius, y+radius], fill=circle_color)
     
     return img
 
 
+@lru_cache(maxsize=16)
+def _render_card_background(context: str, size: tuple, end_offset: tuple, boxes: tuple) -> Image.Image:
+    """Gradiente do contexto + decorações (+ caixas fixas), desenhados uma vez por combinação."""
+    bg = CONTEXT_COLORS.get(context, CONTEXT_COLORS["tech"])["bg"]
+    end = tuple(c + d for c, d in zip(bg, end_offset))
+    img = add_visual_elements(create_gradient_background(size, bg, end), context)
+    return composite_boxes(img, boxes)
+
+
+def get_card_background(context: str, end_offset: tuple, size: tuple = VIDEO_SIZE, boxes: tuple = ()) -> Image.Image:
+    """
+    Cópia do fundo pronto do card.
+    end_offset: quanto o fim do degradê clareia em relação ao bg do contexto
+    boxes: caixas glassmorphism de posição fixa ((rect, rgba, radius), ...) já compostas no fundo
+    """
+    return _render_card_background(context, tuple(size), tuple(end_offset), tuple(boxes)).copy()
+
+
 def get_font(size: int, bold: bool = False):
     """
     Tenta carregar uma fonte profissional do sistema.
     Prioriza Segoe UI (Windows) -> Roboto -> Arial.
+    A escolha é feita uma vez por processo no font_registry.
     """
-    # Caminhos comuns de fontes no Windows
     font_candidates = [
+        # Caminhos comuns de fontes no Windows
         "C:/Windows/Fonts/seguiemj.ttf", # Segoe UI Emoji (tem glifos normais tb)
         "C:/Windows/Fonts/segoeui.ttf",  # Segoe UI Standard
         "C:/Windows/Fonts/segoeuib.ttf", # Segoe UI Bold
         "C:/Windows/Fonts/arialbd.ttf",  # Arial Bold
         "C:/Windows/Fonts/arial.ttf",    # Arial
+        # Fallback para nomes (Linux/Mac)
+        "DejaVuSans-Bold",
+        "LiberationSans-Bold",
+        "Arial",
     ]
-    
-    # Tentar carregar do arquivo
-    for path in font_candidates:
-        if os.path.exists(path):
-            try:
-                return ImageFont.truetype(path, size)
-            except:
-                continue
-                
-    # Fallback para nomes (Linux/Mac)
-    font_names = ["DejaVuSans-Bold", "LiberationSans-Bold", "Arial"]
-    for font_name in font_names:
-        try:
-            return ImageFont.truetype(font_name, size)
-        except:
-            continue
-            
-    logger.warning("⚠️ Nenhuma fonte profissional encontrada. Usando padrão.")
-    return ImageFont.load_default()
+    return font_registry.load(font_candidates, size)
 
 
 def draw_text_with_box(draw_obj, xy, text, font, text_color, box_color=(0, 0, 0, 100), padding=20):
@@ -133,65 +137,64 @@ def draw_text_with_box(draw_obj, xy, text, font, text_color, box_color=(0, 0, 0,
     # Mas para "Business Level", vamos fazer o overlay manualmente na função principal.
     # ENTÃO: Esta função apenas desenha o texto com sombra simples por enquanto.
     
-    # Sombra
-    draw_obj.text((x + 4, y + 4), text, font=font, fill=(0, 0, 0))
-    # Texto
-    draw_obj.text((x, y), text, font=font, fill=text_color)
+    # Sombra + texto a partir da mesma máscara cacheada
+    draw_text(draw_obj, (x, y), text, font, text_color, shadow=(0, 0, 0), shadow_offset=(4, 4))
+
+
+def composite_boxes(base_img, boxes):
+    """
+    Compõe várias caixas semitransparentes em uma passada, tocando só a região de cada uma.
+    boxes: Iterável de (rect_coords, color RGBA, radius).
+    
+    Para cada caixa, a máscara do retângulo arredondado (modo L, do tamanho da caixa) recebe
+    o alfa da cor e a cor sólida é colada através dela: mesmo resultado do alpha_composite
+    com overlay de tela cheia, sem converter o frame inteiro para RGBA e de volta.
+    A imagem é modificada no lugar e devolvida.
+    """
+    if base_img.mode != 'RGB':
+        base_img = base_img.convert('RGB')
+    width, height = base_img.size
+    
+    for rect_coords, color, radius in boxes:
+        x1, y1, x2, y2 = (int(round(c)) for c in rect_coords)
+        # Região afetada (o retângulo inclui x2/y2), limitada ao frame
+        left, top = max(x1, 0), max(y1, 0)
+        right, bottom = min(x2 + 1, width), min(y2 + 1, height)
+        if left >= right or top >= bottom:
+            continue
+        
+        alpha = color[3] if len(color) > 3 else 255
+        mask = Image.new('L', (right - left, bottom - top), 0)
+        ImageDraw.Draw(mask).rounded_rectangle((x1 - left, y1 - top, x2 - left, y2 - top), radius=radius, fill=alpha)
+        base_img.paste(tuple(color[:3]), (left, top, right, bottom), mask)
+    return base_img
 
 
 def add_glassmorphism_box(base_img, rect_coords, color=(0, 0, 0, 100), radius=20):
     """
     Adiciona uma caixa com transparência (Glassmorphism).
     rect_coords: (x1, y1, x2, y2)
+    Só a região da caixa é composta (ver composite_boxes); base_img é modificada no lugar.
     """
-    # Criar camada temporária para transparência
-    overlay = Image.new('RGBA', base_img.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
-    
-    # Desenhar retângulo arredondado
-    draw.rounded_rectangle(rect_coords, radius=radius, fill=color)
-    
-    # Compor
-    base_img = base_img.convert('RGBA')
-    out = Image.alpha_composite(base_img, overlay)
-    return out.convert('RGB')
+    return composite_boxes(base_img, [(rect_coords, color, radius)])
 
 
-def create_title_card(title: str, output_path: str, context: str = "tech") -> str:
-    """Cria uma imagem de título para o início do vídeo - LANDSCAPE 1920x1080."""
-    colors = CONTEXT_COLORS.get(context, CONTEXT_COLORS["tech"])
-    
-    # Criar gradiente base
-    img = create_gradient_background(VIDEO_SIZE, colors["bg"], 
-                                     (colors["bg"][0]+20, colors["bg"][1]+10, colors["bg"][2]+30))
-    
-    # Adicionar elementos visuais
-    img = add_visual_elements(img, context)
+def render_title_card(title: str, context: str = "tech") -> Image.Image:
+    """Desenha o card de título (início do vídeo) em memória - LANDSCAPE 1920x1080."""
+    # Gradiente base + elementos visuais (camada cacheada por contexto)
+    img = get_card_background(context, (20, 10, 30))
     
     draw = ImageDraw.Draw(img)
     font = get_font(90)
     
     # Quebrar texto
-    words = title.split()
-    lines = []
-    current_line = ""
-    for word in words:
-        test_line = current_line + " " + word if current_line else word
-        bbox = draw.textbbox((0, 0), test_line, font=font)
-        if bbox[2] - bbox[0] < VIDEO_SIZE[0] - 300: # Margem maior
-            current_line = test_line
-        else:
-            if current_line: lines.append(current_line)
-            current_line = word
-    if current_line: lines.append(current_line)
+    line_height = 110
+    boxes = text_layout.layout_text(title, font, VIDEO_SIZE[0] - 300, line_height, # Margem maior
+                                    align="center", box_width=VIDEO_SIZE[0])
     
     # Calcular dimensões do bloco de texto
-    line_height = 110
-    total_height = len(lines) * line_height
-    max_width = 0
-    for line in lines:
-        bbox = draw.textbbox((0, 0), line, font=font)
-        max_width = max(max_width, bbox[2] - bbox[0])
+    total_height = len(boxes) * line_height
+    max_width = max((box.width for box in boxes), default=0)
     
     start_y = (VIDEO_SIZE[1] - total_height) // 2
     
@@ -209,32 +212,27 @@ def create_title_card(title: str, output_path: str, context: str = "tech") -> st
     draw = ImageDraw.Draw(img)
     
     # Desenhar texto
-    for i, line in enumerate(lines):
-        bbox = draw.textbbox((0, 0), line, font=font)
-        text_width = bbox[2] - bbox[0]
-        x = (VIDEO_SIZE[0] - text_width) // 2
-        y = start_y + i * line_height
-        
+    for box in boxes:
         # Texto com cor de destaque ou branco
-        draw.text((x, y), line, font=font, fill=COLORS["text_primary"])
+        draw.text((box.x, start_y + box.y), box.text, font=font, fill=COLORS["text_primary"])
     
-    img.save(output_path, quality=95)
+    return img
+
+
+def create_title_card(title: str, output_path: str, context: str = "tech") -> str:
+    """Cria uma imagem de título para o início do vídeo - LANDSCAPE 1920x1080."""
+    output_path = save_image(render_title_card(title, context), output_path, CARD_PROFILE)
     logger.info(f"✅ Imagem título 1920x1080 criada: {output_path}")
     return output_path
 
 
-def create_tool_card(tool_name: str, tool_desc: str, number: int, 
-                     output_path: str, context: str = "tech") -> str:
-    """Cria uma imagem para cada ferramenta - LANDSCAPE 1920x1080."""
+def render_tool_card(tool_name: str, tool_desc: str, number: int, context: str = "tech") -> Image.Image:
+    """Desenha o card de uma ferramenta em memória - LANDSCAPE 1920x1080."""
     colors = CONTEXT_COLORS.get(context, CONTEXT_COLORS["tech"])
     
-    img = create_gradient_background(VIDEO_SIZE, colors["bg"],
-                                     (colors["bg"][0]+15, colors["bg"][1]+10, colors["bg"][2]+25))
-    img = add_visual_elements(img, context)
-    
-    # Adicionar Box Glassmorphism para o conteúdo
+    # Fundo + Box Glassmorphism do conteúdo (posição fixa: vem pronto do cache)
     content_box = (100, 200, 1820, 880)
-    img = add_glassmorphism_box(img, content_box, color=(0, 0, 0, 120))
+    img = get_card_background(context, (15, 10, 25), boxes=((content_box, (0, 0, 0, 120), 20),))
     
     draw = ImageDraw.Draw(img)
     
@@ -253,30 +251,26 @@ def create_tool_card(tool_name: str, tool_desc: str, number: int,
     font_desc = get_font(60)
     
     # Quebrar descrição simples
-    desc_words = tool_desc.split()
-    desc_lines = []
-    curr_d = ""
-    for w in desc_words:
-        test_d = curr_d + " " + w if curr_d else w
-        if draw.textbbox((0,0), test_d, font=font_desc)[2] < 1200:
-             curr_d = test_d
-        else:
-             desc_lines.append(curr_d)
-             curr_d = w
-    if curr_d: desc_lines.append(curr_d)
+    desc_lines = text_layout.wrap_text(tool_desc, font_desc, 1200)
     
     desc_y = VIDEO_SIZE[1]//2 + 20
     for line in desc_lines:
         draw.text((550, desc_y), line, font=font_desc, fill=COLORS["text_secondary"])
         desc_y += 70
     
-    img.save(output_path, quality=95)
+    return img
+
+
+def create_tool_card(tool_name: str, tool_desc: str, number: int, 
+                     output_path: str, context: str = "tech") -> str:
+    """Cria uma imagem para cada ferramenta - LANDSCAPE 1920x1080."""
+    output_path = save_image(render_tool_card(tool_name, tool_desc, number, context), output_path, CARD_PROFILE)
     logger.info(f"✅ Imagem ferramenta 1920x1080 criada: {output_path}")
     return output_path
 
 
-def create_cta_card(cta_text: str, output_path: str, context: str = "tech") -> str:
-    """Cria uma imagem de CTA (Call to Action) para o final - LANDSCAPE 1920x1080."""
+def render_cta_card(cta_text: str, context: str = "tech") -> Image.Image:
+    """Desenha o card de CTA (Call to Action) em memória - LANDSCAPE 1920x1080."""
     colors = CONTEXT_COLORS.get(context, CONTEXT_COLORS["tech"])
     
     # Background com cor de destaque vibrante
@@ -297,63 +291,121 @@ def create_cta_card(cta_text: str, output_path: str, context: str = "tech") -> s
     font = get_font(90)
     
     # Texto
-    bbox = draw.textbbox((0,0), cta_text, font=font)
+    bbox = text_bbox(cta_text, font)
     w = bbox[2] - bbox[0]
     h = bbox[3] - bbox[1]
     
     x = (VIDEO_SIZE[0] - w) // 2
     y = (VIDEO_SIZE[1] - h) // 2
     
-    draw.text((x, y), cta_text, font=font, fill=(255, 255, 255))
+    draw_text(draw, (x, y), cta_text, font, (255, 255, 255))
     
-    img.save(output_path, quality=95)
+    return img
+
+
+def create_cta_card(cta_text: str, output_path: str, context: str = "tech") -> str:
+    """Cria uma imagem de CTA (Call to Action) para o final - LANDSCAPE 1920x1080."""
+    output_path = save_image(render_cta_card(cta_text, context), output_path, CARD_PROFILE)
     logger.info(f"✅ Imagem CTA 1920x1080 criada: {output_path}")
     return output_path
 
 
-def generate_all_images_for_video(video: dict, output_dir: str, context: str = "tech") -> list:
-    """
-    Gera todas as imagens necessárias para um vídeo em 1920x1080.
-    
-    Returns:
-        Lista de caminhos das imagens na ordem correta.
-    """
-    video_id = video["id"]
-    images = []
-    
-    # Pasta para este vídeo
-    video_assets_dir = os.path.join(output_dir, f"video_{video_id}")
-    os.makedirs(video_assets_dir, exist_ok=True)
-    
-    # Determinar contexto baseado no título
-    title_lower = video.get("title", "").lower()
+def detect_context(title: str) -> str:
+    """Contexto visual (paleta de cores) a partir do título do vídeo."""
+    title_lower = title.lower()
     if "ia" in title_lower or "ai" in title_lower:
-        context = "ai"
+        return "ai"
     elif "produtiv" in title_lower:
-        context = "productivity"
+        return "productivity"
     elif "dinheiro" in title_lower or "renda" in title_lower:
-        context = "money"
+        return "money"
     elif "design" in title_lower:
-        context = "design"
+        return "design"
+    return "tech"
+
+
+def _render_card(kind: str, output_path: str, context: str, in_memory: bool = False, **kwargs):
+    """
+    Job do render_pool: um card (função de módulo para ser picklable).
+    Devolve o caminho do PNG, ou com in_memory o array RGB (H, W, 3) uint8 sem tocar no disco.
+    """
+    if kind == "title":
+        img = render_title_card(kwargs["title"], context)
+    elif kind == "tool":
+        img = render_tool_card(kwargs["name"], kwargs["desc"], kwargs["number"], context)
     else:
-        context = "tech"
+        img = render_cta_card(kwargs["cta_text"], context)
+    
+    if in_memory:
+        return np.asarray(img)
+    output_path = save_image(img, output_path, CARD_PROFILE)
+    logger.info(f"✅ Card {kind} 1920x1080 criado: {output_path}")
+    return output_path
+
+
+def _log_archive_error(future: Future):
+    if future.exception() is not None:
+        logger.warning(f"⚠️ Falha ao arquivar card: {future.exception()}")
+
+
+def _card_jobs(video: dict, output_dir: str) -> list:
+    """Jobs de todos os cards do vídeo, com os caminhos de saída determinísticos."""
+    video_assets_dir = os.path.join(output_dir, f"video_{video['id']}")
+    os.makedirs(video_assets_dir, exist_ok=True)
+    context = detect_context(video.get("title", ""))
     
     # 1. Título/Hook
-    title_path = os.path.join(video_assets_dir, "00_title.png")
-    create_title_card(video["title"], title_path, context)
-    images.append(title_path)
+    jobs = [{"kind": "title", "output_path": os.path.join(video_assets_dir, "00_title.png"),
+             "context": context, "title": video["title"]}]
     
     # 2. Ferramentas
     for i, tool in enumerate(video["tools"], 1):
         tool_path = os.path.join(video_assets_dir, f"{i:02d}_tool_{tool['name'].lower().replace(' ', '_').replace('.', '_')}.png")
-        create_tool_card(tool["name"], tool["desc"], i, tool_path, context)
-        images.append(tool_path)
+        jobs.append({"kind": "tool", "output_path": tool_path, "context": context,
+                     "name": tool["name"], "desc": tool["desc"], "number": i})
     
     # 3. CTA
-    cta_path = os.path.join(video_assets_dir, "99_cta.png")
-    create_cta_card(video["cta"], cta_path, context)
-    images.append(cta_path)
+    jobs.append({"kind": "cta", "output_path": os.path.join(video_assets_dir, "99_cta.png"),
+                 "context": context, "cta_text": video["cta"]})
+    return jobs
+
+
+def generate_all_images_for_video(video: dict, output_dir: str, context: str = "tech", parallel: bool = True,
+                                  in_memory: bool = False, archive: bool = True) -> list:
+    """
+    Gera todas as imagens necessárias para um vídeo em 1920x1080.
+    O contexto é detectado pelo título; parallel=True distribui os cards pelo render_pool.
     
-    logger.info(f"📸 {len(images)} imagens 1920x1080 geradas para vídeo {video_id}")
+    Args:
+        in_memory: Devolve arrays RGB (aceitos direto pelo video_engine) em vez de caminhos,
+                   tirando o encode/decode de PNG do caminho crítico do vídeo
+        archive: Com in_memory, ainda grava os PNGs (em segundo plano, via encoder_stage)
     
-    return images
\ No newline at end of file
+    Returns:
+        Lista de caminhos (ou arrays RGB) na ordem correta.
+    """
+    jobs = _card_jobs(video, output_dir)
+    for job in jobs:
+        job["in_memory"] = in_memory
+    images = run_jobs(_render_card, jobs, parallel=parallel)
+    
+    if in_memory and archive:
+        for job, frame in zip(jobs, images):
+            encoder_stage.submit(Image.fromarray(frame), job["output_path"], CARD_PROFILE).add_done_callback(_log_archive_error)
+    
+    logger.info(f"📸 {len(images)} imagens 1920x1080 geradas para vídeo {video['id']}")
+    return images
+
+
+# Coordena os jobs do pool sem bloquear quem chamou (ex: o event loop enquanto o TTS roda)
+_card_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cards")
+
+
+def submit_all_images_for_video(video: dict, output_dir: str, parallel: bool = True,
+                                in_memory: bool = False, archive: bool = True) -> Future:
+    """
+    Agenda generate_all_images_for_video e devolve um Future com a lista de caminhos (ou arrays RGB).
+    Em código async: images = await asyncio.wrap_future(future).
+    """
+    return _card_executor.submit(generate_all_images_for_video, video, output_dir, parallel=parallel,
+                                 in_memory=in_memory, archive=archive)
@@ -8,12 +8,13 @@ VIRAL BOT v3.0 - Gerador Automático de Vídeos Virais para TikTok/Instagram
 """
 
 import asyncio
+import json
 import os
 import sys
 import shutil
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict
-from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
 
 # Configurar encoding para Windows
 if sys.platform == "win32":
@@ -25,10 +26,11 @@ from tqdm import tqdm
 
 # Imports locais
 from logger import get_logger
+import config
 from content_modeler import ContentModeler, generate_modeled_content
 from tts_engine import generate_audio
-from image_generator import generate_all_images_for_video
-from video_engine import create_video_from_images_and_audio
+from image_generator import submit_all_images_for_video
+from video_engine import create_video_from_images_and_audio, zoom_directions, DEFAULT_VIDEO_PROFILE
 from trend_researcher import research_before_creating, TrendResearcher
 
 # Configurar Logger
@@ -44,6 +46,10 @@ except ImportError:
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output")
 ASSETS_DIR = os.path.join(OUTPUT_DIR, "assets")
 
+# Renderizações finais em segundo plano (uma por vez) enquanto os rascunhos são revisados
+_final_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="final_render")
+final_renders: Dict[str, Future] = {}
+
 
 def setup():
     """Cria diretórios necessários e valida ambiente."""
@@ -103,13 +109,14 @@ def get_narration_text(video: Dict) -> str:
     return " ".join(lines)
 
 
-async def generate_single_video(video: Dict) -> str:
+async def generate_single_video(video: Dict, profile: str = DEFAULT_VIDEO_PROFILE) -> str:
     """
     Gera um único vídeo completo com processamento paralelo.
+    profile: "final" (1920x1080@30) ou "draft" (rascunho 540p@15 para conferir o ritmo).
     """
     video_id = video["id"]
     niche_slug = video.get("niche", "default").replace(" ", "_").lower()[:20]
-    video_path = os.path.join(OUTPUT_DIR, f"{niche_slug}_{video_id}_final.mp4")
+    video_path = os.path.join(OUTPUT_DIR, f"{niche_slug}_{video_id}_{profile}.mp4")
     
     if os.path.exists(video_path):
         logger.info(f"⏭️ Vídeo {video_id} já existe! Pulando geração.")
@@ -122,29 +129,62 @@ async def generate_single_video(video: Dict) -> str:
     
     # Processamento Paralelo: Áudio + Imagens
     logger.info("⚡ Iniciando geração paralela (Áudio + Imagens)...")
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        # Geração de Áudio (Thread 1)
-        if not os.path.exists(audio_path):
-            audio_task = asyncio.create_task(generate_audio(script, audio_path, voice="masculina", rate="+15%"))
-        else:
-            audio_task = None
-            
-        # Geração de Imagens (Thread 2)
-        # Como generate_all_images_for_video é síncrono, rodamos no executor
-        image_future = executor.submit(generate_all_images_for_video, video, ASSETS_DIR)
-        
-        if audio_task:
-            await audio_task
-        
-        images = image_future.result()
+    # Cards renderizam no render_pool enquanto o TTS roda no event loop
+    # e seguem em memória (arrays RGB) para o video_engine; PNGs só com ARCHIVE_CARDS
+    image_future = submit_all_images_for_video(video, ASSETS_DIR, in_memory=True, archive=config.ARCHIVE_CARDS)
+    
+    if not os.path.exists(audio_path):
+        await generate_audio(script, audio_path, voice="masculina", rate="+15%")
+    
+    # Aguarda sem bloquear o event loop
+    images = await asyncio.wrap_future(image_future)
 
-    logger.info(f"🎥 Montando vídeo final...")
-    create_video_from_images_and_audio(images, audio_path, video_path)
+    # Direções do Ken Burns do rascunho aprovado (salvas no roteiro) valem também para a final
+    zoom_in = video.get("zoom_in")
+    if not zoom_in or len(zoom_in) != len(images):
+        zoom_in = zoom_directions(images)
+    
+    logger.info(f"🎥 Montando vídeo ({profile})...")
+    create_video_from_images_and_audio(images, audio_path, video_path, profile=profile, zoom_in=zoom_in)
+    
+    if profile != DEFAULT_VIDEO_PROFILE:
+        # Roteiro ao lado do rascunho: a versão final é renderizada a partir dele após a aprovação
+        with open(os.path.splitext(video_path)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump({**video, "zoom_in": zoom_in}, f, ensure_ascii=False, default=str)
     
     return video_path
 
 
-async def run_full_pipeline(num_videos: int = 5, use_trends: bool = True, niche: str = "ai_tools", progress_callback=None) -> List[str]:
+def load_draft(draft_path: str) -> Dict:
+    """Roteiro salvo junto ao rascunho."""
+    with open(os.path.splitext(draft_path)[0] + ".json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def render_final(draft_path: str) -> str:
+    """Renderiza a versão final (1920x1080@30, com música) de um rascunho aprovado."""
+    logger.info(f"✅ Rascunho aprovado: {os.path.basename(draft_path)}")
+    return await generate_single_video(load_draft(draft_path), profile=DEFAULT_VIDEO_PROFILE)
+
+
+def submit_final_render(draft_path: str) -> Future:
+    """
+    Agenda a renderização final em segundo plano; o Future resolve para o caminho do vídeo.
+    Uma renderização que falhou é reagendada (nova tentativa) em vez de devolver o erro antigo.
+    """
+    future = final_renders.get(draft_path)
+    if future is None or final_render_failed(future):
+        future = final_renders[draft_path] = _final_executor.submit(asyncio.run, render_final(draft_path))
+    return future
+
+
+def final_render_failed(future: Future) -> bool:
+    """True se a renderização final terminou com erro (ou foi cancelada) e pode ser tentada de novo."""
+    return future.done() and (future.cancelled() or future.exception() is not None)
+
+
+async def run_full_pipeline(num_videos: int = 5, use_trends: bool = True, niche: str = "ai_tools", progress_callback=None,
+                            profile: str = DEFAULT_VIDEO_PROFILE, background_final: bool = False) -> List[str]:
     """
     Pipeline completo v3.0:
     0. BUSCA AVANÇADA de tendências no TikTok
@@ -156,6 +196,9 @@ async def run_full_pipeline(num_videos: int = 5, use_trends: bool = True, niche:
         use_trends: Se deve buscar trends
         niche: Nicho do conteúdo
         progress_callback: Função async para reportar progresso. Recebe dict.
+        profile: "final" ou "draft" (rascunhos rápidos; a final sai com render_final após aprovação)
+        background_final: Com profile="draft", já agenda a renderização final de cada
+                          rascunho em segundo plano (ver final_renders)
     """
     print("\n" + "🚀"*30)
     print("     VIRAL BOT v3.0 - INICIANDO")
@@ -238,9 +281,11 @@ async def run_full_pipeline(num_videos: int = 5, use_trends: bool = True, niche:
                     try: os.remove(os.path.join(ASSETS_DIR, f))
                     except: pass
                     
-            video_path = await generate_single_video(video)
+            video_path = await generate_single_video(video, profile=profile)
             generated_videos.append(video_path)
             logger.info(f"✅ Vídeo {video['id']} concluído!")
+            if background_final and profile != DEFAULT_VIDEO_PROFILE:
+                submit_final_render(video_path)
         except Exception as e:
             logger.error(f"❌ Erro no vídeo {video['id']}: {e}")
             continue
@@ -275,6 +320,8 @@ async def main():
     num_videos = 5
     use_trends = True
     niche = "ai_tools"
+    profile = DEFAULT_VIDEO_PROFILE
+    background_final = False
     
     for arg in args:
         if arg.startswith("--num="):
@@ -283,6 +330,14 @@ async def main():
             niche = arg.split("=")[1].strip('"').strip("'")
         elif arg == "--no-trends":
             use_trends = False
+        elif arg == "--draft":
+            profile = "draft"
+        elif arg == "--background-final":
+            background_final = True
+        elif arg.startswith("--approve="):
+            path = await render_final(arg.split("=", 1)[1])
+            logger.info(f"🎉 Vídeo final: {path}")
+            return
         elif arg == "--help":
             print("""
 VIRAL BOT v3.0 - Gerador de Vídeos Virais
@@ -293,12 +348,24 @@ Opções:
   --num=N       Número de vídeos a gerar (padrão: 5)
   --niche="TOPICO" Nicho para pesquisa e geração (padrão: ai_tools)
   --no-trends   Não pesquisar trends, usar roteiros fixos
+  --draft       Rascunhos rápidos (540p, 15 fps, sem música) para conferir o ritmo
+  --background-final  Com --draft, renderiza as versões finais em segundo plano
+  --approve=RASCUNHO.mp4  Renderiza a versão final de um rascunho aprovado
   --help        Mostrar esta ajuda
             """)
             return
     
     # Executar pipeline
-    videos = await run_full_pipeline(num_videos, use_trends, niche=niche)
+    videos = await run_full_pipeline(num_videos, use_trends, niche=niche,
+                                     profile=profile, background_final=background_final)
+    
+    if background_final and final_renders:
+        logger.info(f"⏳ Aguardando {len(final_renders)} renderizações finais em segundo plano...")
+        for future in list(final_renders.values()):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"❌ Erro na renderização final: {e}")
     
     if len(videos) == num_videos:
         logger.info("🎉 SUCESSO! Todos os vídeos foram gerados!")
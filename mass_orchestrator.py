@@ -1,11 +1,12 @@
 import os
 import json
-from carousel_generator import create_slide, OUTPUT_DIR
+from carousel_generator import generate_carousel_batch, OUTPUT_DIR
 from gemini_integration import generate_carousel_content
 
-def generate_full_carousel(topic: str, name: str, cover_image_path: str = None):
+def build_carousel_spec(topic: str, name: str, cover_image_path: str = None):
     """
-    Gera um carrossel completo (5 slides) a partir de um tema.
+    Monta o spec de um carrossel (5 slides) a partir de um tema.
+    Retorna None se o Gemini não devolver conteúdo.
     """
     print(f"\n🎬 Iniciando carrossel: {topic}")
     
@@ -14,32 +15,31 @@ def generate_full_carousel(topic: str, name: str, cover_image_path: str = None):
     
     if not slides_text:
         print(f"⚠️ Falha ao obter conteúdo para {topic}")
-        return False
+        return None
     
-    # 2. Criar diretório
-    carousel_dir = os.path.join(OUTPUT_DIR, name)
-    os.makedirs(carousel_dir, exist_ok=True)
-    
-    total = len(slides_text)
-    
-    # 3. Gerar slides
+    # 2. Slides: imagem apenas no slide 1 (Capa)
+    slides = []
     for i, content in enumerate(slides_text, 1):
-        output_path = os.path.join(carousel_dir, f"{i:02d}_slide.png")
-        # Imagem apenas no slide 1 (Capa)
-        img_to_use = cover_image_path if i == 1 else None
-        
         # Extrair texto do item (pode vir como dict ou str)
         slide_text = content.get("text", "") if isinstance(content, dict) else str(content)
-        
-        create_slide(
-            slide_text, 
-            i, 
-            total, 
-            style="caverna", 
-            output_path=output_path, 
-            image_path=img_to_use
-        )
-        print(f"  ✅ Slide {i}/{total} pronto")
+        slides.append({"text": slide_text, "image_path": cover_image_path if i == 1 else None})
+    
+    return {"name": name, "slides": slides, "theme": "caverna"}
+
+def generate_full_carousel(topic: str, name: str, cover_image_path: str = None):
+    """
+    Gera um carrossel completo (5 slides) a partir de um tema.
+    """
+    spec = build_carousel_spec(topic, name, cover_image_path)
+    if spec is None:
+        return False
+    
+    # 3. Gerar slides
+    for result in generate_carousel_batch([spec]):
+        if result.error:
+            print(f"❌ Carrossel '{name}' com erros: {result.error}")
+            return False
+        print(f"  ✅ {len(result.paths)} slides prontos")
         
     print(f"✨ Carrossel '{name}' finalizado com sucesso!")
     return True
@@ -54,29 +54,41 @@ if __name__ == "__main__":
     total_generated = 0
     errors = 0
     
-    # Iterar por todos os nichos e temas
-    for nicho, temas in TEMAS_POR_NICHO.items():
-        print(f"\n📌 Processando Nicho: {nicho.upper()}")
+    def iter_specs():
+        """Busca o conteúdo tema a tema; o render dos anteriores segue no pool enquanto isso."""
+        global errors
         
-        for tema in temas:
-            # Sanitizar nome da pasta
-            safe_name = f"{nicho}_{tema[:20]}".replace(" ", "_").replace(":", "").lower()
-            
-            # Verificar se já existe para não duplicar (opcional, pode querer forçar)
-            final_dir = os.path.join(OUTPUT_DIR, safe_name)
-            if os.path.exists(final_dir):
-                print(f"  ⏭️  Pular {safe_name} (Já existe)")
-                continue
+        # Iterar por todos os nichos e temas
+        for nicho, temas in TEMAS_POR_NICHO.items():
+            print(f"\n📌 Processando Nicho: {nicho.upper()}")
             
-            # Gerar
-            success = generate_full_carousel(tema, safe_name)
-            
-            if success:
-                total_generated += 1
+            for tema in temas:
+                # Sanitizar nome da pasta
+                safe_name = f"{nicho}_{tema[:20]}".replace(" ", "_").replace(":", "").lower()
+                
+                # Verificar se já existe para não duplicar (opcional, pode querer forçar)
+                final_dir = os.path.join(OUTPUT_DIR, safe_name)
+                if os.path.exists(final_dir):
+                    print(f"  ⏭️  Pular {safe_name} (Já existe)")
+                    continue
+                
+                spec = build_carousel_spec(tema, safe_name)
+                if spec is None:
+                    errors += 1
+                    continue
+                
+                yield spec
                 # Pequena pausa para evitar Rate Limit da API do Gemini se for muito rápido
                 time.sleep(2)
-            else:
-                errors += 1
+    
+    # Um único job: todos os slides de todos os temas no mesmo pool aquecido
+    for result in generate_carousel_batch(iter_specs()):
+        if result.error:
+            errors += 1
+            print(f"  ❌ {result.name}: {result.error}")
+        else:
+            total_generated += 1
+            print(f"  ✅ {result.name} pronto ({len(result.paths)} slides)")
                 
     print("\n" + "="*40)
     print(f"🏁 FIM DO PROCESSO")
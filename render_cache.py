@@ -0,0 +1,171 @@
+"""
+Render Cache - Cache de slides endereçado por conteúdo
+Chave = hash de (slide normalizado, tema, template, versão do renderer, perfil de saída).
+Um acerto devolve os bytes já codificados; o disco é limitado por despejo LRU.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import unicodedata
+from typing import Any, Optional
+
+from logger import get_logger
+
+logger = get_logger()
+
+# Detectar ambiente serverless (Vercel)
+IS_SERVERLESS = bool(os.environ.get('VERCEL') or os.environ.get('AWS_LAMBDA_FUNCTION_NAME'))
+
+if IS_SERVERLESS:
+    CACHE_DIR = "/tmp/cache/renders"
+    DEFAULT_MAX_MB = 64
+else:
+    CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache", "renders")
+    DEFAULT_MAX_MB = 512
+
+MAX_BYTES = int(os.environ.get("RENDER_CACHE_MB", DEFAULT_MAX_MB)) * 1024 * 1024
+
+
+def _normalize(value: Any) -> Any:
+    """
+    Normaliza strings para NFC recursivamente (mesmo texto em outra forma Unicode, mesma chave).
+    Espaços e quebras de linha ficam como estão: o renderer desenha o texto cru.
+    """
+    if isinstance(value, str):
+        return unicodedata.normalize("NFC", value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def file_signature(path: Optional[str]) -> Optional[list]:
+    """(caminho, mtime, tamanho) de um arquivo de entrada, para invalidar a chave quando ele muda."""
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_mtime_ns, stat.st_size]
+
+
+def make_key(**parts) -> str:
+    """SHA-256 do JSON canônico das partes (slide, tema, template, versão, perfil...)."""
+    payload = json.dumps(_normalize(parts), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def seed_for(key: str) -> int:
+    """Semente do grão derivada da chave: mesma entrada, mesmos bytes."""
+    return int(key[:16], 16)
+
+
+class RenderCache:
+    """Cache em disco (um arquivo por chave) com despejo LRU por tamanho total."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._written_since_scan = max_bytes  # força varredura no primeiro put
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Bytes cacheados ou None. Um acerto atualiza o mtime (ordem LRU)."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, None)
+            return data
+        except OSError:
+            return None
+
+    def get_path(self, key: str) -> Optional[str]:
+        """Caminho do arquivo cacheado (para quem lê direto do disco, ex: ffmpeg) ou None."""
+        path = self._path(key)
+        try:
+            os.utime(path, None)
+            return path
+        except OSError:
+            return None
+
+    def put(self, key: str, data: bytes):
+        """Grava de forma atômica e despeja os mais antigos se passar do limite."""
+        self._store(key, len(data), lambda f: f.write(data))
+
+    def put_file(self, key: str, src_path: str):
+        """Como put, mas copia um arquivo já gravado (ex: clipe do ffmpeg) sem carregá-lo na memória."""
+        try:
+            size = os.path.getsize(src_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Render cache indisponível: {e}")
+            return
+        with open(src_path, "rb") as src:
+            self._store(key, size, lambda f: shutil.copyfileobj(src, f))
+
+    def _store(self, key: str, size: int, write):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Render cache indisponível: {e}")
+            return
+
+        with self._lock:
+            self._written_since_scan += size
+            # Só varre o diretório depois de ~10% do limite escrito
+            if self._written_since_scan >= self.max_bytes // 10:
+                self._written_since_scan = 0
+                self.evict()
+
+    def evict(self):
+        """Remove os arquivos menos usados até ficar abaixo de 90% do limite."""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        logger.info(f"🗑️ Render cache: {removed} arquivos despejados (LRU)")
+
+    def clear(self):
+        """Apaga todo o cache."""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                try:
+                    os.remove(os.path.join(root, name))
+                except OSError:
+                    pass
+
+
+# Instância global
+render_cache = RenderCache()
@@ -0,0 +1,154 @@
+"""
+Render Pool - Pool de processos compartilhado para renderização de slides/cards
+Um único pool por processo, dimensionado para a máquina; resultados voltam na ordem dos jobs.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from error_handler import ImageGenerationError
+from logger import get_logger
+
+logger = get_logger()
+
+# Tamanho do pool (RENDER_WORKERS sobrescreve o número de núcleos)
+MAX_WORKERS = int(os.environ.get("RENDER_WORKERS", 0)) or (os.cpu_count() or 1)
+
+# Workers não nascem de fork: o pool é criado sob demanda com outras threads vivas
+# (encoder_stage, executor de cards) e um fork herdaria locks presos por elas
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+class RenderError(ImageGenerationError):
+    """Um ou mais jobs falharam; os resultados dos demais são preservados."""
+
+    def __init__(self, errors: Dict[int, Exception], results: List[Any]):
+        self.errors = errors
+        self.results = results
+        failed = ", ".join(str(i) for i in sorted(errors))
+        super().__init__(f"{len(errors)} job(s) de renderização falharam (índices: {failed})")
+
+
+def get_render_pool() -> Optional[ProcessPoolExecutor]:
+    """Pool global criado sob demanda (None se o ambiente não suportar multiprocessing)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=pool_context())
+            except (OSError, NotImplementedError) as e:
+                # Ex: Lambda/Vercel sem /dev/shm
+                logger.warning(f"⚠️ Pool de processos indisponível ({e}). Renderizando em série.")
+                return None
+        return _pool
+
+
+def pool_context():
+    """Contexto de multiprocessing dos pools de render (forkserver, ou spawn onde não houver)."""
+    return multiprocessing.get_context(START_METHOD)
+
+
+def shutdown_render_pool():
+    """Encerra o pool global (os workers levam seus caches junto)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Descarta um pool quebrado (worker morto); o próximo get_render_pool cria outro."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def replace_render_pool(broken: ProcessPoolExecutor) -> Optional[ProcessPoolExecutor]:
+    """Troca um pool quebrado por um novo (None se o ambiente não permitir recriá-lo)."""
+    _discard_pool(broken)
+    return get_render_pool()
+
+
+def _run_in_pool(pool: ProcessPoolExecutor, fn: Callable, jobs: List[dict], indices: List[int],
+                 results: List[Any], errors: Dict[int, Exception]) -> bool:
+    """Executa os jobs indicados no pool; devolve False se o pool quebrou no caminho."""
+    broken = False
+    futures = {}
+    for i in indices:
+        try:
+            futures[i] = pool.submit(fn, **jobs[i])
+        except BrokenProcessPool as e:
+            errors[i] = e
+            broken = True
+    for i, future in futures.items():
+        try:
+            results[i] = future.result()
+        except BrokenProcessPool as e:
+            errors[i] = e
+            broken = True
+        except Exception as e:
+            errors[i] = e
+    return not broken
+
+
+def run_jobs(fn: Callable, jobs: List[dict], parallel: bool = True) -> List[Any]:
+    """
+    Executa fn(**job) para cada job e devolve os resultados na ordem original.
+
+    fn precisa ser uma função de módulo (picklable). No modo em série, fn pode
+    devolver um Future (ex: codificação em segundo plano); ele é aguardado no
+    final, então o job seguinte renderiza enquanto o anterior é gravado.
+    Se algum job falhar,
+    todos os outros terminam e um RenderError é levantado com os resultados
+    parciais (None nas posições que falharam). Se um worker morrer (OOM, segfault),
+    o pool é recriado e os jobs afetados são tentados mais uma vez.
+    """
+    results: List[Any] = [None] * len(jobs)
+    errors: Dict[int, Exception] = {}
+
+    pool = get_render_pool() if parallel and len(jobs) > 1 else None
+    if pool is None:
+        for i, job in enumerate(jobs):
+            try:
+                results[i] = fn(**job)
+            except Exception as e:
+                errors[i] = e
+    else:
+        if not _run_in_pool(pool, fn, jobs, list(range(len(jobs))), results, errors):
+            retry = sorted(i for i, e in errors.items() if isinstance(e, BrokenProcessPool))
+            logger.warning(f"⚠️ Pool de processos quebrado. Recriando e repetindo {len(retry)} job(s).")
+            for i in retry:
+                del errors[i]
+            pool = replace_render_pool(pool)
+            if pool is None:
+                for i in retry:
+                    try:
+                        results[i] = fn(**jobs[i])
+                    except Exception as e:
+                        errors[i] = e
+            elif not _run_in_pool(pool, fn, jobs, retry, results, errors):
+                _discard_pool(pool)
+
+    for i, result in enumerate(results):
+        if isinstance(result, Future):
+            try:
+                results[i] = result.result()
+            except Exception as e:
+                results[i] = None
+                errors[i] = e
+
+    if errors:
+        for i, e in sorted(errors.items()):
+            logger.error(f"❌ Job {i} falhou: {e}")
+        raise RenderError(errors, results)
+    return results
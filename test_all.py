@@ -141,6 +141,38 @@ class TestThumbnail(unittest.TestCase):
         img = gen.create_gradient_background((100, 100))
         self.assertEqual(img.size, (100, 100))
 
+    def test_platform_set(self):
+        import tempfile
+        from PIL import Image
+        from thumbnail_generator import ThumbnailGenerator
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = ThumbnailGenerator(tmp).create_platform_set("5 IAs GRÁTIS", "Teste")
+            self.assertEqual(set(paths), set(ThumbnailGenerator.SIZES))
+            for platform, path in paths.items():
+                self.assertEqual(Image.open(path).size, ThumbnailGenerator.SIZES[platform])
+    
+    def test_platform_set_renders_once_per_ratio(self):
+        import tempfile
+        from unittest import mock
+        from PIL import Image
+        from thumbnail_generator import ThumbnailGenerator
+        
+        class Generator(ThumbnailGenerator):
+            SIZES = {"tiktok": (1080, 1920), "story_copy": (1080, 1920), "reels_small": (540, 960),
+                     "youtube": (1280, 720)}
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            gen = Generator(tmp)
+            with mock.patch.object(gen, "render_viral_thumbnail", wraps=gen.render_viral_thumbnail) as render:
+                paths = gen.create_platform_set("5 IAs GRÁTIS")
+            # 9:16 (3 plataformas) num render só, no maior tamanho; 16:9 à parte
+            self.assertEqual(sorted(call.args[2] for call in render.call_args_list), [(1080, 1920), (1280, 720)])
+            for platform, path in paths.items():
+                self.assertEqual(Image.open(path).size, Generator.SIZES[platform])
+            master = Image.open(paths["tiktok"]).convert("RGB").resize((540, 960), Image.Resampling.LANCZOS,
+                                                                          reducing_gap=3.0)
+            self.assertEqual(Image.open(paths["reels_small"]).convert("RGB").tobytes(), master.tobytes())
+
     def test_image_generator_glassmorphism(self):
         """Testa se a geração de imagens com glassmorphism funciona."""
         output = os.path.join(self.test_dir, "test_glassmorphism.png")
@@ -149,6 +181,569 @@ class TestThumbnail(unittest.TestCase):
         self.assertTrue(os.path.getsize(path) > 0)
 
 
+class TestPostProcessing(unittest.TestCase):
+    """Testes para post_processing.py"""
+    
+    def test_seed_reproducible(self):
+        from PIL import Image
+        from post_processing import apply_post_processing
+        img = Image.new('RGB', (200, 250), (12, 12, 14))
+        a = apply_post_processing(img, seed=7)
+        b = apply_post_processing(img, seed=7)
+        self.assertEqual(a.size, (200, 250))
+        self.assertEqual(a.tobytes(), b.tobytes())
+    
+    def test_vignette_darkens_border(self):
+        from PIL import Image
+        from post_processing import apply_post_processing
+        img = Image.new('RGB', (400, 400), (200, 200, 200))
+        out = apply_post_processing(img, grain=False, glitch=False)
+        self.assertLess(out.getpixel((0, 0))[0], 200)
+        self.assertEqual(out.getpixel((200, 200)), (200, 200, 200))
+
+
+class TestGradients(unittest.TestCase):
+    """Testes para gradients.py"""
+    
+    def test_gradient_endpoints(self):
+        from gradients import get_gradient
+        img = get_gradient((10, 100), (0, 0, 0), (100, 200, 50))
+        self.assertEqual(img.getpixel((0, 0)), (0, 0, 0))
+        self.assertEqual(img.getpixel((5, 50)), (50, 100, 25))
+    
+    def test_gradient_returns_copy(self):
+        from gradients import get_gradient
+        a = get_gradient((10, 10), (1, 2, 3), (4, 5, 6))
+        a.putpixel((0, 0), (255, 255, 255))
+        b = get_gradient((10, 10), (1, 2, 3), (4, 5, 6))
+        self.assertEqual(b.getpixel((0, 0)), (1, 2, 3))
+
+
+class TestFontRegistry(unittest.TestCase):
+    """Testes para font_registry.py"""
+    
+    def test_face_is_cached(self):
+        from font_registry import FontRegistry
+        registry = FontRegistry()
+        bebas = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "fonts", "BebasNeue-Regular.ttf")
+        a = registry.load(["C:/nao/existe.ttf", bebas], 40)
+        b = registry.load(["C:/nao/existe.ttf", bebas], 40)
+        self.assertIs(a, b)
+        self.assertEqual(registry.report()[("C:/nao/existe.ttf", bebas)], bebas)
+    
+    def test_missing_fonts_fallback(self):
+        from font_registry import FontRegistry
+        registry = FontRegistry()
+        self.assertIsNone(registry.resolve(["C:/nao/existe.ttf"]))
+        self.assertIsNotNone(registry.load(["C:/nao/existe.ttf"], 20))
+
+
+class TestTextLayout(unittest.TestCase):
+    """Testes para text_layout.py"""
+    
+    def setUp(self):
+        from font_registry import font_registry
+        bebas = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "fonts", "BebasNeue-Regular.ttf")
+        self.font = font_registry.load([bebas], 60)
+    
+    def test_measure_matches_pillow(self):
+        from text_layout import measure
+        text = "O CODIGO DA DISCIPLINA"
+        self.assertAlmostEqual(measure(text, self.font), self.font.getlength(text), places=3)
+    
+    def test_wrap_respects_width(self):
+        from text_layout import wrap_text
+        text = "Dominio proprio nao e sobre forca de vontade e sobre hackear a simulacao " * 4
+        lines = wrap_text(text, self.font, 400)
+        self.assertGreater(len(lines), 1)
+        self.assertEqual(" ".join(lines), " ".join(text.split()))
+        for line in lines:
+            self.assertLessEqual(self.font.getlength(line), 400)
+    
+    def test_layout_center(self):
+        from text_layout import layout_text
+        boxes = layout_text("CURA", self.font, 1000, 80, origin=(0, 10), align="center", box_width=1080)
+        self.assertEqual(len(boxes), 1)
+        self.assertEqual(boxes[0].y, 10)
+        self.assertEqual(boxes[0].x, (1080 - boxes[0].width) // 2)
+
+
+class TestThemeLayers(unittest.TestCase):
+    """Testes das camadas de tema cacheadas (carousel_engine / carousel_generator)"""
+    
+    def test_theme_base_has_footer(self):
+        from carousel_engine import get_theme_base, THEMES, SIZE
+        img = get_theme_base(THEMES["empire"], "content")
+        self.assertEqual(img.size, SIZE)
+        self.assertEqual(img.getpixel((SIZE[0] // 2, SIZE[1] - 5)), THEMES["empire"]["bar_bg"])
+        self.assertEqual(img.getpixel((SIZE[0] // 2, SIZE[1] // 2)), THEMES["empire"]["bg_base"])
+    
+    def test_theme_base_is_copy(self):
+        from carousel_engine import get_theme_base, THEMES
+        a = get_theme_base(THEMES["alert"], "cta")
+        a.paste((255, 255, 255), (0, 0, 200, 200))
+        b = get_theme_base(THEMES["alert"], "cta")
+        self.assertEqual(b.getpixel((10, 10)), THEMES["alert"]["bg_base"])
+    
+    def test_caverna_base_fallback_gradient(self):
+        from carousel_generator import get_caverna_base, CAROUSEL_SIZE
+        img = get_caverna_base()
+        self.assertEqual(img.getpixel((0, 0)), (30, 30, 30))
+        self.assertEqual(img.getpixel((0, CAROUSEL_SIZE[1] - 1)), (0, 0, 0))
+
+
+class TestRenderPool(unittest.TestCase):
+    """Testes para render_pool.py"""
+    
+    def test_run_jobs_keeps_order(self):
+        from render_pool import run_jobs
+        from utils import format_size
+        jobs = [{"bytes_size": 1024 ** k} for k in range(1, 4)]
+        self.assertEqual(run_jobs(format_size, jobs, parallel=True), ["1.0 KB", "1.0 MB", "1.0 GB"])
+    
+    def test_run_jobs_partial_failure(self):
+        from render_pool import run_jobs, RenderError
+        from utils import format_size
+        jobs = [{"bytes_size": 1024}, {"bytes_size": "x"}, {"bytes_size": 2048}]
+        with self.assertRaises(RenderError) as ctx:
+            run_jobs(format_size, jobs, parallel=False)
+        self.assertEqual(list(ctx.exception.errors), [1])
+        self.assertEqual(ctx.exception.results, ["1.0 KB", None, "2.0 KB"])
+    
+    def test_broken_pool_is_replaced(self):
+        import render_pool
+        from concurrent.futures.process import BrokenProcessPool
+        from utils import format_size
+        
+        class BrokenPool:
+            def submit(self, fn, **kwargs):
+                raise BrokenProcessPool("worker morto")
+            
+            def shutdown(self, wait=True, cancel_futures=False):
+                pass
+        
+        render_pool.shutdown_render_pool()
+        render_pool._pool = BrokenPool()
+        try:
+            jobs = [{"bytes_size": 1024}, {"bytes_size": 2048}]
+            self.assertEqual(render_pool.run_jobs(format_size, jobs), ["1.0 KB", "2.0 KB"])
+            self.assertNotIsInstance(render_pool._pool, BrokenPool)
+        finally:
+            render_pool.shutdown_render_pool()
+
+
+class TestEncoders(unittest.TestCase):
+    """Testes para encoders.py"""
+    
+    def test_palette_png_is_lossless(self):
+        import io
+        from PIL import Image, ImageDraw
+        from encoders import encode
+        img = Image.new('RGB', (120, 80), (0, 0, 0))
+        ImageDraw.Draw(img).text((10, 10), "CAVERNA", fill=(255, 215, 0))
+        out = Image.open(io.BytesIO(encode(img, "png_palette"))).convert('RGB')
+        self.assertEqual(out.tobytes(), img.tobytes())
+    
+    def test_palette_accepts_grayscale(self):
+        import io
+        from PIL import Image, ImageDraw
+        from encoders import encode
+        img = Image.new('L', (60, 40), 0)
+        ImageDraw.Draw(img).rectangle((10, 10, 30, 30), fill=200)
+        for profile in ("png_auto", "png_palette"):
+            out = Image.open(io.BytesIO(encode(img, profile))).convert('L')
+            self.assertEqual(out.tobytes(), img.tobytes())
+    
+    def test_byte_budget(self):
+        from PIL import Image
+        from encoders import encode
+        img = Image.effect_noise((256, 256), 40).convert('RGB')
+        full = encode(img, "jpeg_progressive")
+        budget = len(full) // 2
+        self.assertLessEqual(len(encode(img, "jpeg_progressive", max_bytes=budget)), budget)
+    
+    def test_output_extension_follows_profile(self):
+        from encoders import output_path_for
+        self.assertEqual(output_path_for("out/01_slide.png", "webp"), "out/01_slide.webp")
+        self.assertEqual(output_path_for("out/slide_1.jpg", "png_auto"), "out/slide_1.png")
+
+
+class TestInMemoryRender(unittest.TestCase):
+    """Testes da API de renderização em memória"""
+    
+    def test_carousel_zip_in_memory(self):
+        import zipfile
+        from carousel_generator import render_carousel_zip
+        buf = render_carousel_zip([{"text": "A Matrix"}, {"text": "Acorde"}], "caverna", profile="webp")
+        names = zipfile.ZipFile(buf).namelist()
+        self.assertEqual(names, ["01_slide.webp", "02_slide.webp"])
+    
+    def test_engine_bytes(self):
+        from carousel_engine import render_carousel_bytes
+        items = list(render_carousel_bytes({"slides": [{"type": "cta", "text": "CURA"}]}))
+        self.assertEqual(items[0][0], "slide_1.jpg")
+        self.assertTrue(items[0][1].startswith(b"\xff\xd8"))
+
+
+class TestRenderCache(unittest.TestCase):
+    """Testes para render_cache.py"""
+    
+    def setUp(self):
+        import tempfile
+        from render_cache import RenderCache
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(self.tmp.name, max_bytes=1000)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_key_normalizes_text(self):
+        from render_cache import make_key
+        a = make_key(slide={"text": "Ação hoje"}, theme="empire")
+        b = make_key(theme="empire", slide={"text": "Aça\u0303o hoje"})
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, make_key(slide={"text": "Ação hoje"}, theme="alert"))
+        # Espaços e quebras de linha mudam o layout desenhado, então mudam a chave
+        self.assertNotEqual(a, make_key(slide={"text": "Ação  hoje"}, theme="empire"))
+        self.assertNotEqual(a, make_key(slide={"text": "Ação\nhoje"}, theme="empire"))
+    
+    def test_put_get(self):
+        self.assertIsNone(self.cache.get("ab" * 32))
+        self.cache.put("ab" * 32, b"slide")
+        self.assertEqual(self.cache.get("ab" * 32), b"slide")
+        self.assertTrue(self.cache.get_path("ab" * 32).endswith("ab" * 32))
+        self.assertIsNone(self.cache.get_path("cd" * 32))
+    
+    def test_lru_eviction(self):
+        import time
+        for i in range(6):
+            self.cache.put(f"{i:02d}" * 32, b"x" * 300)
+            time.sleep(0.01)
+        self.cache.evict()
+        self.assertIsNone(self.cache.get("00" * 32))
+        self.assertEqual(self.cache.get("05" * 32), b"x" * 300)
+
+
+class TestCarouselBatch(unittest.TestCase):
+    """Testes para carousel_generator.generate_carousel_batch"""
+    
+    def test_batch_streams_all_carousels(self):
+        import tempfile
+        from carousel_generator import generate_carousel_batch
+        with tempfile.TemporaryDirectory() as tmp:
+            specs = (
+                {"name": os.path.join(tmp, f"c{k}"), "slides": [{"text": f"Slide {j} tema {k}"} for j in range(3)]}
+                for k in range(3)
+            )
+            results = list(generate_carousel_batch(specs, parallel=True))
+            self.assertEqual(sorted(r.name for r in results), [os.path.join(tmp, f"c{k}") for k in range(3)])
+            for r in results:
+                self.assertIsNone(r.error)
+                self.assertEqual([os.path.basename(p) for p in r.paths], ["01_slide.png", "02_slide.png", "03_slide.png"])
+                self.assertTrue(all(os.path.exists(p) for p in r.paths))
+    
+    def test_batch_survives_broken_pool(self):
+        import tempfile
+        import render_pool
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+        from carousel_generator import generate_carousel_batch
+        
+        class BrokenPool:
+            """Worker morto: os jobs já aceitos falham com BrokenProcessPool."""
+            def submit(self, fn, **kwargs):
+                future = Future()
+                future.set_exception(BrokenProcessPool("worker morto"))
+                return future
+            
+            def shutdown(self, wait=True, cancel_futures=False):
+                pass
+        
+        render_pool.shutdown_render_pool()
+        render_pool._pool = BrokenPool()
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                specs = [{"name": os.path.join(tmp, f"c{k}"), "slides": [{"text": f"Slide {j}"} for j in range(2)]}
+                         for k in range(2)]
+                results = list(generate_carousel_batch(specs, parallel=True))
+                self.assertEqual(len(results), 2)
+                for r in results:
+                    self.assertIsNone(r.error)
+                    self.assertTrue(all(os.path.exists(p) for p in r.paths))
+            self.assertNotIsInstance(render_pool._pool, BrokenPool)
+        finally:
+            render_pool.shutdown_render_pool()
+
+
+class TestFittedCover(unittest.TestCase):
+    """Testes para carousel_generator.get_fitted_cover"""
+    
+    def test_cover_fit_and_cache(self):
+        import tempfile
+        from PIL import Image
+        from carousel_generator import get_fitted_cover
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "capa.jpg")
+            Image.new('RGB', (2400, 1200), (200, 50, 50)).save(path, quality=90)
+            a = get_fitted_cover(path, (1080, 810))
+            self.assertEqual(a.size, (1080, 810))
+            self.assertIs(get_fitted_cover(path, (1080, 810)), a)
+
+
+class TestTextSprites(unittest.TestCase):
+    """Testes para text_sprites"""
+    
+    def test_sprite_matches_draw_text(self):
+        from PIL import Image, ImageDraw, ImageChops
+        from carousel_engine import get_font
+        from text_sprites import draw_text, sprite_cache, text_bbox
+        font = get_font("cta", condensada=True)
+        expected = Image.new('RGB', (600, 200), (20, 20, 20))
+        actual = expected.copy()
+        d = ImageDraw.Draw(expected)
+        d.text((48, 38), "VOCÊ (TOPO)", font=font, fill=(0, 0, 0))
+        d.text((40, 30), "VOCÊ (TOPO)", font=font, fill=(255, 255, 255))
+        draw_text(ImageDraw.Draw(actual), (40, 30), "VOCÊ (TOPO)", font, (255, 255, 255),
+                  shadow=(0, 0, 0), shadow_offset=(8, 8))
+        self.assertIsNone(ImageChops.difference(expected, actual).getbbox())
+        self.assertEqual(text_bbox("VOCÊ (TOPO)", font), d.textbbox((0, 0), "VOCÊ (TOPO)", font=font))
+        self.assertIs(sprite_cache.get("VOCÊ (TOPO)", font), sprite_cache.get("VOCÊ (TOPO)", font))
+        
+        # Coordenadas fracionárias são arredondadas, não truncadas
+        rounded = Image.new('RGB', (600, 200), (20, 20, 20))
+        draw_text(ImageDraw.Draw(rounded), (40.6, 29.7), "VOCÊ (TOPO)", font, (255, 255, 255))
+        reference = Image.new('RGB', (600, 200), (20, 20, 20))
+        draw_text(ImageDraw.Draw(reference), (41, 30), "VOCÊ (TOPO)", font, (255, 255, 255))
+        self.assertIsNone(ImageChops.difference(rounded, reference).getbbox())
+
+
+class TestFitText(unittest.TestCase):
+    """Testes para text_layout.fit_text"""
+    
+    def test_fit_shrinks_long_text(self):
+        from carousel_engine import fit_font
+        short = fit_font("title", "FOCO", (1020, 700), condensada=True, line_height=165)
+        self.assertEqual(short.size, 200)
+        self.assertTrue(short.fits)
+        long_title = "A VERDADE QUE NINGUÉM TE CONTA SOBRE DISCIPLINA FOCO E CONSTÂNCIA NO DIA A DIA"
+        fit = fit_font("title", long_title, (1020, 700), condensada=True, line_height=165)
+        self.assertLess(fit.size, 200)
+        self.assertLessEqual(fit.height, 700)
+        self.assertTrue(all(box.width <= 1020 for box in fit.lines))
+        self.assertIs(fit_font("title", long_title, (1020, 700), condensada=True, line_height=165), fit)
+    
+    def test_fit_single_line(self):
+        from carousel_engine import fit_font
+        fit = fit_font("header", "UM TÍTULO MUITO LONGO PARA UMA LINHA SÓ", (920, 110),
+                       condensada=True, max_lines=1)
+        self.assertEqual(len(fit.lines), 1)
+
+
+class TestPreviewRender(unittest.TestCase):
+    """Testes para o modo preview dos carrosséis"""
+    
+    def test_engine_preview_is_small_webp(self):
+        import io
+        from PIL import Image
+        from carousel_engine import render_carousel_preview
+        content = {"slides": [{"type": "cover", "title": "FOCO"}, {"type": "cta", "text": "COMENTE"}]}
+        previews = list(render_carousel_preview(content))
+        self.assertEqual(len(previews), 2)
+        name, data = previews[0]
+        self.assertTrue(name.endswith(".webp"))
+        with Image.open(io.BytesIO(data)) as img:
+            self.assertEqual(img.size, (270, 338))
+    
+    def test_downscale(self):
+        from PIL import Image
+        from post_processing import downscale
+        img = Image.new('RGB', (1080, 1350))
+        self.assertEqual(downscale(img, 0.25).size, (270, 338))
+        self.assertEqual(downscale(img, 0.3).size, (324, 405))
+        self.assertIs(downscale(img, 1.0), img)
+
+
+class TestCarouselEdit(unittest.TestCase):
+    """Testes para carousel_generator.edit_slide / edit_carousel"""
+    
+    def test_edit_rerenders_one_slide_and_patches_zip(self):
+        import tempfile
+        import zipfile
+        from carousel_generator import edit_carousel, edit_slide, generate_carousel, get_carousel_zip
+        with tempfile.TemporaryDirectory() as tmp:
+            name = os.path.join(tmp, "edit")
+            paths = generate_carousel([{"text": f"Slide {j}"} for j in range(3)], "caverna", name)
+            zip_path = get_carousel_zip(name)
+            before = [open(p, 'rb').read() for p in paths]
+            
+            paths = edit_slide(name, 2, text="Slide corrigido")
+            after = [open(p, 'rb').read() for p in paths]
+            self.assertEqual(after[0], before[0])
+            self.assertNotEqual(after[1], before[1])
+            with zipfile.ZipFile(zip_path) as zf:
+                self.assertEqual(zf.read("02_slide.png"), after[1])
+            
+            paths = edit_carousel(name, [{"text": "Slide 0"}, {"text": "Slide corrigido"}])
+            with zipfile.ZipFile(zip_path) as zf:
+                self.assertEqual(zf.namelist(), ["01_slide.png", "02_slide.png"])
+            self.assertFalse(os.path.exists(os.path.join(name, "03_slide.png")))
+
+
+class TestVideoCards(unittest.TestCase):
+    """Testes para image_generator.generate_all_images_for_video"""
+    
+    def test_cards_future_keeps_order(self):
+        import tempfile
+        from image_generator import generate_all_images_for_video, submit_all_images_for_video
+        video = {"id": 7, "title": "Ferramentas de IA", "cta": "Siga para mais",
+                 "tools": [{"name": "Tool A", "desc": "Faz A"}, {"name": "Tool.B", "desc": "Faz B"}]}
+        with tempfile.TemporaryDirectory() as tmp:
+            images = submit_all_images_for_video(video, tmp).result(timeout=120)
+            self.assertEqual([os.path.basename(p) for p in images],
+                             ["00_title.png", "01_tool_tool_a.png", "02_tool_tool_b.png", "99_cta.png"])
+            self.assertTrue(all(os.path.exists(p) for p in images))
+            self.assertEqual(generate_all_images_for_video(video, tmp, parallel=False), images)
+    
+    def test_cards_in_memory(self):
+        import tempfile
+        from PIL import Image
+        from image_generator import generate_all_images_for_video
+        video = {"id": 8, "title": "Renda extra", "cta": "Siga", "tools": [{"name": "Tool A", "desc": "Faz A"}]}
+        with tempfile.TemporaryDirectory() as tmp:
+            frames = generate_all_images_for_video(video, tmp, parallel=False, in_memory=True, archive=False)
+            self.assertEqual(len(frames), 3)
+            self.assertEqual(frames[0].shape, (1080, 1920, 3))
+            self.assertEqual(os.listdir(os.path.join(tmp, "video_8")), [])
+            path = generate_all_images_for_video(video, tmp, parallel=False)[0]
+            self.assertEqual(Image.open(path).convert('RGB').tobytes(), frames[0].tobytes())
+
+
+class TestGlassmorphism(unittest.TestCase):
+    """Testes para image_generator.composite_boxes"""
+    
+    def test_matches_full_frame_composite(self):
+        from PIL import Image, ImageChops, ImageDraw
+        from image_generator import composite_boxes
+        base = Image.new('RGB', (400, 300), (40, 90, 200))
+        boxes = [((20, 30, 250, 200), (0, 0, 0, 160), 20), ((-10, 150, 500, 320), (255, 200, 0, 90), 40)]
+        expected = base.convert('RGBA')
+        for rect, color, radius in boxes:
+            overlay = Image.new('RGBA', base.size, (0, 0, 0, 0))
+            ImageDraw.Draw(overlay).rounded_rectangle(rect, radius=radius, fill=color)
+            expected = Image.alpha_composite(expected, overlay)
+        actual = composite_boxes(base.copy(), boxes)
+        self.assertIsNone(ImageChops.difference(expected.convert('RGB'), actual).getbbox())
+
+
+class TestCardBackground(unittest.TestCase):
+    """Testes para image_generator.get_card_background"""
+    
+    def test_cached_and_keeps_global_random(self):
+        import random
+        from image_generator import get_card_background
+        random.seed(123)
+        expected = random.random()
+        random.seed(123)
+        a = get_card_background("money", (15, 10, 25))
+        self.assertEqual(random.random(), expected)
+        b = get_card_background("money", (15, 10, 25))
+        self.assertIsNot(a, b)
+        self.assertEqual(a.tobytes(), b.tobytes())
+
+
+class TestFFmpegBackend(unittest.TestCase):
+    """Testes para ffmpeg_backend (montagem do filter graph, sem executar o ffmpeg)"""
+    
+    def test_filter_graph(self):
+        from ffmpeg_backend import Segment, build_filter_graph
+        segments = [Segment("a.png", 2.0, True, fade_out=True), Segment("b.png", 2.0, False, fade_in=True)]
+        graph = build_filter_graph(segments, 1920, 1080, 30, has_music=True)
+        self.assertIn("zoompan=z='1+0.06*on/60'", graph)
+        self.assertIn("zoompan=z='1.06-0.06*on/60'", graph)
+        self.assertIn("fade=t=out:st=1.800:d=0.2", graph)
+        self.assertIn("[v0][v1]concat=n=2:v=1:a=0", graph)
+        self.assertIn("[2:a][music]amix", graph)
+        self.assertTrue(graph.endswith("[aout]"))
+    
+    def test_segment_key(self):
+        import os
+        import tempfile
+        from ffmpeg_backend import Segment, segment_key
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, name) for name in ("a.png", "b.png")]
+            for path in paths:
+                with open(path, "wb") as f:
+                    f.write(b"card")
+            args = (1920, 1080, 30, 0.06, 0.2, (0, 0, 0), "ultrafast", 23)
+            key = segment_key(Segment(paths[0], 2.0), *args)
+            self.assertEqual(key, segment_key(Segment(paths[1], 2.0), *args))
+            self.assertNotEqual(key, segment_key(Segment(paths[0], 2.0, zoom_in=False), *args))
+            self.assertNotEqual(key, segment_key(Segment(paths[0], 3.0), *args))
+            # Threads do x264 mudam o bitstream: fazem parte da chave
+            import ffmpeg_backend
+            threads = ffmpeg_backend.SEGMENT_THREADS
+            try:
+                ffmpeg_backend.SEGMENT_THREADS = threads + 1
+                self.assertNotEqual(key, segment_key(Segment(paths[0], 2.0), *args))
+            finally:
+                ffmpeg_backend.SEGMENT_THREADS = threads
+    
+    def test_plan_segments_fixed_clip(self):
+        from ffmpeg_backend import plan_segments
+        short = plan_segments(["a", "b"], 12.0, 30, [True, False])
+        long = plan_segments(["a", "b"], 19.0, 30, [True, False])
+        fixed = [seg for seg in short if seg.cacheable]
+        self.assertEqual(fixed, [seg for seg in long if seg.cacheable])
+        self.assertEqual([(seg.zoom_from, seg.zoom_to) for seg in fixed], [(1.0, 1.02), (1.02, 1.0)])
+        self.assertEqual(sum(round(seg.duration * 30) for seg in long), 2 * round(9.5 * 30))
+        self.assertTrue(long[0].fade_out is False and long[1].fade_out and long[2].fade_in)
+        # Card curto demais para o corte: um trecho só, como antes
+        self.assertEqual(len(plan_segments(["a", "b"], 4.0, 30, [True, False])), 2)
+    
+    def test_plan_segments_short_cards_hit_cache(self):
+        from ffmpeg_backend import plan_segments
+        # 13s de narração em 4 cards (3,25s cada) e 15s na regravação: mesmos trechos fixos
+        first = plan_segments(list("abcd"), 13.0, 30, [True, False, True, False])
+        second = plan_segments(list("abcd"), 15.0, 30, [True, False, True, False])
+        fixed = [seg for seg in first if seg.cacheable]
+        self.assertEqual(len(fixed), 4)
+        self.assertEqual(fixed, [seg for seg in second if seg.cacheable])
+    
+    def test_plan_segments_zoom_is_clamped(self):
+        from ffmpeg_backend import plan_segments
+        for duration in (13.0, 24.0, 120.0):
+            segments = plan_segments(["a", "b"], duration, 30, [True, False])
+            zooms = [z for seg in segments for z in (seg.zoom_from, seg.zoom_to) if z is not None]
+            self.assertLessEqual(max(zooms), 1.06 + 1e-9)
+        # Card longo termina exatamente no máximo antigo
+        self.assertAlmostEqual(plan_segments(["a", "b"], 120.0, 30, [True, False])[1].zoom_to, 1.06)
+    
+    def test_audio_filter(self):
+        from ffmpeg_backend import audio_filter
+        self.assertEqual(audio_filter(1), "[1:a]anull[aout]")
+        self.assertIn("[2:a]volume=0.18[music];[1:a][music]amix", audio_filter(1, has_music=True))
+
+
+class TestFramePipe(unittest.TestCase):
+    """Testes para frame_pipe (geração dos frames, sem executar o ffmpeg)"""
+    
+    def test_schedule_and_ken_burns(self):
+        import numpy as np
+        from frame_pipe import FrameScratch, frame_schedule, ken_burns_into
+        poses = list(frame_schedule(2, 2.0, 10, [True, False], transition=0.2))
+        self.assertEqual(len(poses), 20)
+        self.assertEqual((poses[0].zoom, poses[0].alpha), (1.0, 1.0))
+        self.assertAlmostEqual(poses[10].zoom, 1.06)
+        self.assertEqual(poses[10].alpha, 0.0)
+        
+        src = np.random.RandomState(0).randint(0, 256, (50, 80, 3), dtype=np.uint8)
+        out = np.empty_like(src)
+        scratch = FrameScratch(80, band=16)
+        self.assertTrue((ken_burns_into(src, out, 1.0 + 1e-12, 1.0, scratch) == src).all())
+        ken_burns_into(src, out, 1.06, 0.0, scratch)
+        self.assertEqual(out.max(), 0)
+
+
 class TestIntegration(unittest.TestCase):
     """Testes de integração"""
     
@@ -189,6 +784,26 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestAnalytics))
     suite.addTests(loader.loadTestsFromTestCase(TestErrorHandler))
     suite.addTests(loader.loadTestsFromTestCase(TestThumbnail))
+    suite.addTests(loader.loadTestsFromTestCase(TestPostProcessing))
+    suite.addTests(loader.loadTestsFromTestCase(TestGradients))
+    suite.addTests(loader.loadTestsFromTestCase(TestFontRegistry))
+    suite.addTests(loader.loadTestsFromTestCase(TestTextLayout))
+    suite.addTests(loader.loadTestsFromTestCase(TestThemeLayers))
+    suite.addTests(loader.loadTestsFromTestCase(TestRenderPool))
+    suite.addTests(loader.loadTestsFromTestCase(TestEncoders))
+    suite.addTests(loader.loadTestsFromTestCase(TestInMemoryRender))
+    suite.addTests(loader.loadTestsFromTestCase(TestRenderCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestCarouselBatch))
+    suite.addTests(loader.loadTestsFromTestCase(TestFittedCover))
+    suite.addTests(loader.loadTestsFromTestCase(TestTextSprites))
+    suite.addTests(loader.loadTestsFromTestCase(TestFitText))
+    suite.addTests(loader.loadTestsFromTestCase(TestPreviewRender))
+    suite.addTests(loader.loadTestsFromTestCase(TestCarouselEdit))
+    suite.addTests(loader.loadTestsFromTestCase(TestVideoCards))
+    suite.addTests(loader.loadTestsFromTestCase(TestGlassmorphism))
+    suite.addTests(loader.loadTestsFromTestCase(TestCardBackground))
+    suite.addTests(loader.loadTestsFromTestCase(TestFFmpegBackend))
+    suite.addTests(loader.loadTestsFromTestCase(TestFramePipe))
     suite.addTests(loader.loadTestsFromTestCase(TestIntegration))
     
     # Executar
@@ -0,0 +1,232 @@
+"""
+Text Layout - Quebra de linha rápida com avanços de glifo cacheados
+Mede cada palavra uma vez por fonte e quebra as linhas com somas prefixadas + busca binária,
+em vez de chamar textbbox na linha inteira a cada palavra.
+fit_text escolhe o maior tamanho de fonte que cabe numa caixa (busca binária, memoizada).
+"""
+
+import threading
+import weakref
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PIL import ImageFont
+from font_registry import font_registry
+
+
+@dataclass
+class LineBox:
+    """Linha pronta para desenhar: texto, posição e largura medida."""
+    text: str
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+class FontMetrics:
+    """Cache de avanços por palavra e kerning por par de caracteres para uma fonte."""
+
+    def __init__(self, font: ImageFont.ImageFont):
+        self.font = font
+        self._advances: Dict[str, float] = {}
+        self._kerning: Dict[Tuple[str, str], float] = {}
+        self.space = font.getlength(" ")
+
+    def advance(self, word: str) -> float:
+        adv = self._advances.get(word)
+        if adv is None:
+            adv = self._advances[word] = self.font.getlength(word)
+        return adv
+
+    def kern(self, left: str, right: str) -> float:
+        pair = (left, right)
+        k = self._kerning.get(pair)
+        if k is None:
+            k = self._kerning[pair] = self.advance(left + right) - self.advance(left) - self.advance(right)
+        return k
+
+    def join(self, left_word: str, right_word: str) -> float:
+        """Avanço do espaço entre duas palavras, incluindo o kerning das bordas."""
+        return self.space + self.kern(left_word[-1], " ") + self.kern(" ", right_word[0])
+
+
+_metrics: "weakref.WeakKeyDictionary[ImageFont.ImageFont, FontMetrics]" = weakref.WeakKeyDictionary()
+_metrics_lock = threading.Lock()
+
+
+def get_metrics(font: ImageFont.ImageFont) -> FontMetrics:
+    """FontMetrics compartilhado da fonte (criado na primeira medição)."""
+    metrics = _metrics.get(font)
+    if metrics is None:
+        with _metrics_lock:
+            metrics = _metrics.setdefault(font, FontMetrics(font))
+    return metrics
+
+
+def measure(text: str, font: ImageFont.ImageFont) -> float:
+    """Largura (avanço) de um texto de uma linha usando os caches."""
+    words = text.split()
+    if not words:
+        return 0.0
+    metrics = get_metrics(font)
+    width = metrics.advance(words[0])
+    for prev, word in zip(words, words[1:]):
+        width += metrics.join(prev, word) + metrics.advance(word)
+    return width
+
+
+def _positions(words: List[str], metrics: FontMetrics) -> Tuple[List[float], List[float]]:
+    """
+    pos[k] = posição do fim da palavra k-1 numa linha única; joins[k] = espaço antes da palavra k.
+    Largura das palavras s..e-1 = pos[e] - pos[s] - joins[s].
+    """
+    pos = [0.0]
+    joins = [0.0]
+    for k, word in enumerate(words):
+        if k > 0:
+            joins.append(metrics.join(words[k - 1], word))
+        pos.append(pos[-1] + joins[k] + metrics.advance(word))
+    return pos, joins
+
+
+def _break_lines(text: str, font: ImageFont.ImageFont, max_width: float) -> List[Tuple[str, float]]:
+    """Quebra gulosa: para cada início de linha, a busca binária acha a última palavra que cabe."""
+    words = text.split()
+    if not words:
+        return []
+
+    pos, joins = _positions(words, get_metrics(font))
+    lines = []
+    start = 0
+    while start < len(words):
+        limit = pos[start] + joins[start] + max_width
+        end = max(bisect_right(pos, limit, lo=start + 1) - 1, start + 1)
+        lines.append((" ".join(words[start:end]), pos[end] - pos[start] - joins[start]))
+        start = end
+    return lines
+
+
+def wrap_text(text: str, font: ImageFont.ImageFont, max_width: float) -> List[str]:
+    """Quebra o texto em linhas que cabem em max_width (palavras maiores ficam sozinhas)."""
+    return [line for line, _ in _break_lines(text, font, max_width)]
+
+
+def layout_text(
+    text: str,
+    font: ImageFont.ImageFont,
+    max_width: float,
+    line_height: int,
+    origin: Tuple[int, int] = (0, 0),
+    align: str = "left",
+    box_width: int = None,
+) -> List[LineBox]:
+    """
+    Quebra e posiciona as linhas.
+
+    Args:
+        origin: (x, y) do canto superior esquerdo do bloco
+        align: "left" ou "center" (centraliza dentro de box_width, padrão max_width)
+        box_width: Largura da área de alinhamento
+    """
+    x0, y0 = origin
+    box_width = box_width if box_width is not None else max_width
+    boxes = []
+    for i, (line, advance) in enumerate(_break_lines(text, font, max_width)):
+        width = int(round(advance))
+        x = x0 + (int(box_width) - width) // 2 if align == "center" else x0
+        boxes.append(LineBox(line, x, y0 + i * line_height, width, line_height))
+    return boxes
+
+
+@dataclass(frozen=True)
+class FitResult:
+    """Tamanho escolhido e linhas posicionadas relativas ao canto da caixa (memoizado: não modifique)."""
+    size: int
+    font: ImageFont.ImageFont
+    line_height: int
+    lines: Tuple[LineBox, ...]
+    fits: bool
+
+    @property
+    def height(self) -> int:
+        return len(self.lines) * self.line_height
+
+
+def _try_size(text: str, font: ImageFont.ImageFont, box: Tuple[int, int], line_height: int,
+              max_lines: Optional[int]) -> Optional[List[Tuple[str, float]]]:
+    """Linhas quebradas se couberem na caixa (largura, altura e número de linhas), senão None."""
+    width, height = box
+    lines = _break_lines(text, font, width)
+    if max_lines is not None and len(lines) > max_lines:
+        return None
+    if len(lines) * line_height > height or any(advance > width for _, advance in lines):
+        return None
+    return lines
+
+
+@lru_cache(maxsize=1024)
+def _fit(text: str, candidates: Tuple[str, ...], box: Tuple[int, int], max_size: int, min_size: int,
+         line_height: int, max_lines: Optional[int], align: str) -> FitResult:
+    def height_for(size: int) -> int:
+        return max(1, round(line_height * size / max_size))
+
+    # Caso comum: o tamanho de projeto já cabe (uma única medição)
+    best, best_lines = None, None
+    lines = _try_size(text, font_registry.load(candidates, max_size), box, height_for(max_size), max_lines)
+    if lines is not None:
+        best, best_lines = max_size, lines
+    else:
+        lo, hi = min_size, max_size - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            lines = _try_size(text, font_registry.load(candidates, mid), box, height_for(mid), max_lines)
+            if lines is not None:
+                best, best_lines, lo = mid, lines, mid + 1
+            else:
+                hi = mid - 1
+
+    fits = best is not None
+    size = best if fits else min_size
+    font = font_registry.load(candidates, size)
+    if not fits:
+        best_lines = _break_lines(text, font, box[0])
+        if max_lines is not None:
+            best_lines = best_lines[:max_lines]
+
+    lh = height_for(size)
+    boxes = []
+    for i, (line, advance) in enumerate(best_lines):
+        width = int(round(advance))
+        x = (box[0] - width) // 2 if align == "center" else 0
+        boxes.append(LineBox(line, x, i * lh, width, lh))
+    return FitResult(size, font, lh, tuple(boxes), fits)
+
+
+def fit_text(
+    text: str,
+    candidates: Sequence[str],
+    box: Tuple[int, int],
+    max_size: int,
+    min_size: int = 24,
+    line_height: int = None,
+    max_lines: int = None,
+    align: str = "left",
+) -> FitResult:
+    """
+    Maior tamanho de fonte (entre min_size e max_size) cujo texto quebrado cabe na caixa.
+
+    Cada tentativa usa os avanços cacheados, então a busca binária custa ~log2(max-min)
+    quebras de linha; o resultado é memoizado por (texto, caixa, fonte, parâmetros).
+
+    Args:
+        candidates: Lista de fontes do font_registry (a mesma usada no get_font)
+        box: (largura, altura) disponíveis
+        line_height: Altura de linha no max_size (escala junto com a fonte; padrão = max_size)
+        max_lines: Limite de linhas (1 = encolhe em vez de quebrar)
+        align: "left" ou "center" dentro da largura da caixa
+    """
+    return _fit(text, tuple(candidates), tuple(box), max_size, min(min_size, max_size),
+                line_height or max_size, max_lines, align)
@@ -0,0 +1,137 @@
+"""
+Text Sprites - Cache de máscaras de texto rasterizadas
+Cada (fonte, tamanho, texto, contorno) é rasterizado uma única vez numa máscara "L";
+sombra, contorno e preenchimento são compostos a partir dela com draw.bitmap.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Limite de memória das máscaras (headlines Bebas de 600px chegam a ~0,5 MB cada)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class TextSprite:
+    """Máscara do texto e deslocamento da tinta em relação à origem do draw.text."""
+    mask: Image.Image
+    offset: Tuple[int, int]
+
+    @property
+    def bbox(self) -> Tuple[int, int, int, int]:
+        """Mesmo resultado de draw.textbbox((0, 0), texto, font=fonte)."""
+        x0, y0 = self.offset
+        return (x0, y0, x0 + self.mask.width, y0 + self.mask.height)
+
+    @property
+    def width(self) -> int:
+        return self.mask.width
+
+
+def _font_key(font: ImageFont.ImageFont) -> Hashable:
+    """(caminho, tamanho) para FreeType; fontes sem caminho usam o próprio objeto."""
+    path = getattr(font, "path", None)
+    if isinstance(path, str):
+        return (path, getattr(font, "size", None))
+    return font
+
+
+class TextSpriteCache:
+    """LRU de sprites limitado por bytes, compartilhado pelo processo inteiro."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._sprites: "OrderedDict[tuple, TextSprite]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _rasterize(self, text: str, font: ImageFont.ImageFont, stroke_width: int) -> TextSprite:
+        x0, y0, x1, y1 = font.getbbox(text, stroke_width=stroke_width)
+        mask = Image.new("L", (max(x1 - x0, 1), max(y1 - y0, 1)), 0)
+        ImageDraw.Draw(mask).text((-x0, -y0), text, font=font, fill=255, stroke_width=stroke_width)
+        return TextSprite(mask, (x0, y0))
+
+    def get(self, text: str, font: ImageFont.ImageFont, stroke_width: int = 0) -> TextSprite:
+        """Sprite do texto (rasteriza na primeira vez)."""
+        key = (_font_key(font), text, stroke_width)
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is not None:
+                self._sprites.move_to_end(key)
+                return sprite
+
+        sprite = self._rasterize(text, font, stroke_width)
+        size = sprite.mask.width * sprite.mask.height
+        with self._lock:
+            if key not in self._sprites:
+                self._sprites[key] = sprite
+                self._bytes += size
+                while self._bytes > self.max_bytes and len(self._sprites) > 1:
+                    _, old = self._sprites.popitem(last=False)
+                    self._bytes -= old.mask.width * old.mask.height
+        return sprite
+
+    def stats(self) -> dict:
+        return {"sprites": len(self._sprites), "bytes": self._bytes}
+
+    def clear(self):
+        with self._lock:
+            self._sprites.clear()
+            self._bytes = 0
+
+
+# Instância global
+sprite_cache = TextSpriteCache()
+
+
+def text_bbox(text: str, font: ImageFont.ImageFont) -> Tuple[int, int, int, int]:
+    """textbbox na origem, aproveitando (e aquecendo) o sprite que vai ser desenhado."""
+    return sprite_cache.get(text, font).bbox
+
+
+def draw_text(
+    draw: ImageDraw.ImageDraw,
+    xy: Tuple[int, int],
+    text: str,
+    font: ImageFont.ImageFont,
+    fill,
+    shadow=None,
+    shadow_offset: Tuple[int, int] = (4, 4),
+    stroke_width: int = 0,
+    stroke_fill=None,
+):
+    """
+    Equivalente a draw.text (âncora "la") com sombra e contorno opcionais,
+    compostos a partir de máscaras cacheadas.
+
+    Args:
+        shadow: Cor da sombra (None = sem sombra)
+        shadow_offset: Deslocamento (dx, dy) da sombra
+        stroke_width: Largura do contorno (desenhado com stroke_fill, padrão fill)
+    """
+    # Arredonda (não trunca) coordenadas fracionárias da centralização: erro máximo de meio pixel
+    x, y = round(xy[0]), round(xy[1])
+    if "\n" in text:
+        # Multilinha fica com o draw.text (espaçamento entre linhas do Pillow)
+        if shadow is not None:
+            draw.text((x + shadow_offset[0], y + shadow_offset[1]), text, font=font, fill=shadow,
+                      stroke_width=stroke_width, stroke_fill=shadow)
+        draw.text((x, y), text, font=font, fill=fill, stroke_width=stroke_width,
+                  stroke_fill=stroke_fill if stroke_fill is not None else fill)
+        return
+
+    body = sprite_cache.get(text, font)
+    outline = sprite_cache.get(text, font, stroke_width) if stroke_width else body
+
+    if shadow is not None:
+        ox, oy = outline.offset
+        draw.bitmap((x + shadow_offset[0] + ox, y + shadow_offset[1] + oy), outline.mask, fill=shadow)
+    if stroke_width:
+        ox, oy = outline.offset
+        draw.bitmap((x + ox, y + oy), outline.mask, fill=stroke_fill if stroke_fill is not None else fill)
+    bx, by = body.offset
+    draw.bitmap((x + bx, y + by), body.mask, fill=fill)
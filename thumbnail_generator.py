@@ -4,8 +4,14 @@ Cria thumbnails atraentes para maximizar CTR
 """
 
 import os
-from typing import Optional, Tuple
+import shutil
+from fractions import Fraction
+from typing import Dict, List, Optional, Sequence, Tuple
 from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
+from gradients import get_gradient, hex_to_rgb
+from font_registry import font_registry
+from text_sprites import draw_text
+from render_pool import run_jobs
 
 
 class ThumbnailGenerator:
@@ -38,14 +44,8 @@ class ThumbnailGenerator:
         os.makedirs(output_dir, exist_ok=True)
     
     def _get_font(self, size: int) -> ImageFont.FreeTypeFont:
-        """Obtém fonte para texto."""
-        try:
-            return ImageFont.truetype("arial.ttf", size)
-        except:
-            try:
-                return ImageFont.truetype("C:/Windows/Fonts/arialbd.ttf", size)
-            except:
-                return ImageFont.load_default()
+        """Obtém fonte para texto (cacheada no font_registry)."""
+        return font_registry.load(["arial.ttf", "C:/Windows/Fonts/arialbd.ttf"], size)
     
     def create_gradient_background(
         self,
@@ -53,26 +53,10 @@ class ThumbnailGenerator:
         color1: str = None,
         color2: str = None
     ) -> Image.Image:
-        """Cria fundo com gradiente."""
-        width, height = size
+        """Cria fundo com gradiente (cacheado em gradients)."""
         color1 = color1 or self.COLORS["gradient_start"]
         color2 = color2 or self.COLORS["gradient_end"]
-        
-        # Converter cores hex para RGB
-        r1, g1, b1 = tuple(int(color1.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-        r2, g2, b2 = tuple(int(color2.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-        
-        img = Image.new('RGB', size)
-        draw = ImageDraw.Draw(img)
-        
-        for y in range(height):
-            ratio = y / height
-            r = int(r1 + (r2 - r1) * ratio)
-            g = int(g1 + (g2 - g1) * ratio)
-            b = int(b1 + (b2 - b1) * ratio)
-            draw.line([(0, y), (width, y)], fill=(r, g, b))
-        
-        return img
+        return get_gradient(size, hex_to_rgb(color1), hex_to_rgb(color2))
     
     def add_text_with_shadow(
         self,
@@ -84,16 +68,10 @@ class ThumbnailGenerator:
         shadow_color: str = "#000000",
         shadow_offset: Tuple[int, int] = (4, 4)
     ) -> Image.Image:
-        """Adiciona texto com sombra."""
+        """Adiciona texto com sombra (as duas camadas vêm do mesmo sprite cacheado)."""
         draw = ImageDraw.Draw(img)
         font = self._get_font(font_size)
-        
-        # Sombra
-        shadow_pos = (position[0] + shadow_offset[0], position[1] + shadow_offset[1])
-        draw.text(shadow_pos, text, font=font, fill=shadow_color)
-        
-        # Texto principal
-        draw.text(position, text, font=font, fill=color)
+        draw_text(draw, position, text, font, color, shadow=shadow_color, shadow_offset=shadow_offset)
         
         return img
     
@@ -132,7 +110,24 @@ class ThumbnailGenerator:
             Caminho da thumbnail
         """
         size = self.SIZES.get(platform, self.SIZES["tiktok"])
+        img = self.render_viral_thumbnail(title, subtitle, size, style)
+        
+        # Salvar
+        output_name = output_name or f"thumbnail_{platform}.png"
+        output_path = os.path.join(self.output_dir, output_name)
+        img.save(output_path, "PNG", quality=95)
         
+        print(f"✅ Thumbnail criada: {output_path}")
+        return output_path
+    
+    def render_viral_thumbnail(
+        self,
+        title: str,
+        subtitle: str = "",
+        size: Tuple[int, int] = SIZES["tiktok"],
+        style: str = "gradient"
+    ) -> Image.Image:
+        """Desenha a thumbnail viral em memória no tamanho pedido."""
         # Criar background
         if style == "gradient":
             img = self.create_gradient_background(size)
@@ -164,14 +159,52 @@ class ThumbnailGenerator:
         # Adicionar emojis decorativos
         self.add_emoji_badge(img, "🔥", (size[0] - 150, 50), 100)
         self.add_emoji_badge(img, "⚡", (50, size[1] - 200), 80)
+        return img
+    
+    def create_platform_set(
+        self,
+        title: str,
+        subtitle: str = "",
+        platforms: Optional[Sequence[str]] = None,
+        style: str = "gradient",
+        name: str = "thumbnail"
+    ) -> Dict[str, str]:
+        """
+        Cria a thumbnail do mesmo título para várias plataformas de SIZES.
         
-        # Salvar
-        output_name = output_name or f"thumbnail_{platform}.png"
-        output_path = os.path.join(self.output_dir, output_name)
-        img.save(output_path, "PNG", quality=95)
+        Plataformas com a mesma proporção compartilham um único render: o maior canvas
+        é desenhado uma vez e os menores são reamostrados dele (tamanhos iguais só copiam o arquivo).
+        Proporções diferentes mudam o layout (posição do título e dos badges) e são renderizadas à parte.
         
-        print(f"✅ Thumbnail criada: {output_path}")
-        return output_path
+        Returns:
+            {plataforma: caminho}
+        """
+        platforms = list(platforms or self.SIZES)
+        groups: Dict[Tuple[int, int], List[str]] = {}
+        for platform in platforms:
+            w, h = self.SIZES.get(platform, self.SIZES["tiktok"])
+            ratio = Fraction(w, h)
+            groups.setdefault((ratio.numerator, ratio.denominator), []).append(platform)
+        
+        paths: Dict[str, str] = {}
+        for group in groups.values():
+            group.sort(key=lambda p: self.SIZES.get(p, self.SIZES["tiktok"])[0], reverse=True)
+            largest = self.SIZES.get(group[0], self.SIZES["tiktok"])
+            master = self.render_viral_thumbnail(title, subtitle, largest, style)
+            rendered: Dict[Tuple[int, int], str] = {}
+            for platform in group:
+                size = self.SIZES.get(platform, self.SIZES["tiktok"])
+                output_path = os.path.join(self.output_dir, f"{name}_{platform}.png")
+                if size in rendered:
+                    shutil.copyfile(rendered[size], output_path)
+                else:
+                    img = master if size == largest else master.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+                    img.save(output_path, "PNG")
+                    rendered[size] = output_path
+                paths[platform] = output_path
+        
+        print(f"✅ Thumbnails criadas ({len(paths)} plataformas): {name}")
+        return paths
     
     def create_from_video(
         self,
@@ -224,6 +257,28 @@ class ThumbnailGenerator:
         print(f"✅ Thumbnail extraída: {output_path}")
         return output_path
     
+    def batch_create_platforms(
+        self,
+        videos: list,
+        platforms: Optional[Sequence[str]] = None,
+        parallel: bool = True
+    ) -> List[Dict[str, str]]:
+        """
+        Cria o conjunto de plataformas para cada vídeo (dicts com "title").
+        Os títulos são distribuídos pelo render_pool; resultados na ordem dos vídeos.
+        """
+        jobs = [
+            {
+                "output_dir": self.output_dir,
+                "title": video.get("title", f"Video {i}")[:30],
+                "subtitle": f"Vídeo {i}",
+                "platforms": list(platforms or self.SIZES),
+                "name": f"thumb_video_{i}",
+            }
+            for i, video in enumerate(videos, 1)
+        ]
+        return run_jobs(_create_platform_set, jobs, parallel=parallel)
+    
     def batch_create(self, videos: list) -> list:
         """Cria thumbnails para todos os vídeos."""
         thumbnails = []
@@ -248,6 +303,11 @@ class ThumbnailGenerator:
         return thumbnails
 
 
+def _create_platform_set(output_dir: str, **kwargs) -> Dict[str, str]:
+    """Job do render_pool (função de módulo para ser picklable)."""
+    return ThumbnailGenerator(output_dir).create_platform_set(**kwargs)
+
+
 # Instância global
 thumbnail_gen = ThumbnailGenerator()
 
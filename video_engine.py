@@ -6,6 +6,8 @@ Baseado nas tendências TikTok 2024
 
 import os
 import random
+from dataclasses import dataclass
+from typing import Union
 from moviepy.editor import (
     ImageClip, AudioFileClip, VideoFileClip, concatenate_videoclips, 
     CompositeVideoClip, ColorClip, CompositeAudioClip, vfx
@@ -13,6 +15,8 @@ from moviepy.editor import (
 from moviepy.video.fx.all import resize, fadein, fadeout
 import numpy as np
 from logger import get_logger
+import ffmpeg_backend
+import frame_pipe
 
 logger = get_logger()
 
@@ -21,6 +25,62 @@ VIDEO_WIDTH = 1920
 VIDEO_HEIGHT = 1080
 FPS = 30
 
+
+@dataclass(frozen=True)
+class VideoProfile:
+    """Perfil de renderização: resolução, fps, música e parâmetros do encoder."""
+    name: str
+    width: int
+    height: int
+    fps: int
+    music: bool = True
+    preset: str = "ultrafast"
+    crf: int = 23
+    segmented: bool = True  # False = passada única (sem cortar em segmentos nem usar o cache)
+
+
+VIDEO_PROFILES = {
+    "final": VideoProfile("final", VIDEO_WIDTH, VIDEO_HEIGHT, FPS),
+    # Rascunho para conferir o ritmo: 540p, 15 fps, só narração, encoder no modo mais rápido
+    "draft": VideoProfile("draft", 960, 540, 15, music=False, crf=30, segmented=False),
+}
+
+DEFAULT_VIDEO_PROFILE = "final"
+
+
+def get_video_profile(profile: Union[str, VideoProfile, None]) -> VideoProfile:
+    """Aceita nome ou objeto; nomes desconhecidos caem no perfil final."""
+    if isinstance(profile, VideoProfile):
+        return profile
+    if profile not in VIDEO_PROFILES:
+        if profile is not None:
+            logger.warning(f"⚠️ Perfil de vídeo desconhecido '{profile}'. Usando {DEFAULT_VIDEO_PROFILE}.")
+        profile = DEFAULT_VIDEO_PROFILE
+    return VIDEO_PROFILES[profile]
+
+
+# Backend de renderização: "auto" (ffmpeg nativo, moviepy se falhar), "ffmpeg", "pipe"
+# (frames gerados em Python e enviados ao ffmpeg por pipe) ou "moviepy"
+VIDEO_BACKEND = os.environ.get("VIDEO_BACKEND", "auto")
+
+# Cards codificados em paralelo no backend ffmpeg (cada um num processo ffmpeg com SEGMENT_THREADS threads);
+# 1 = um único filter graph para o vídeo inteiro
+SEGMENT_WORKERS = int(os.environ.get("SEGMENT_WORKERS", 0)) or max(1, (os.cpu_count() or 1) // 4)
+
+# Reaproveita o trecho fixo (ffmpeg_backend.CARD_CLIP_SECONDS) de cada card já codificado:
+# o mesmo CTA/card de contexto entre vídeos do lote, com qualquer duração de narração
+SEGMENT_CACHE = os.environ.get("SEGMENT_CACHE", "true").lower() == "true"
+
+# Cores do gradiente de fundo por contexto
+BACKGROUND_COLORS = {
+    "tech": [(20, 30, 80), (60, 20, 140)],      # Azul/roxo tech
+    "ai": [(30, 10, 60), (20, 80, 160)],        # Roxo/azul AI
+    "productivity": [(10, 40, 30), (40, 90, 80)], # Verde produtividade
+    "money": [(40, 30, 10), (100, 90, 30)],      # Dourado
+    "design": [(60, 20, 40), (120, 50, 90)],    # Rosa/magenta
+    "default": [(20, 20, 40), (60, 40, 80)],    # Roxo escuro
+}
+
 # Diretórios
 ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
 MUSIC_DIR = os.path.join(ASSETS_DIR, "music")
@@ -46,7 +106,7 @@ def get_background_music() -> str:
     return None
 
 
-def apply_ken_burns(clip, duration, zoom_ratio=0.08):
+def apply_ken_burns(clip, duration, zoom_ratio=0.08, zoom_in=None):
     """
     Aplica efeito Ken Burns com zoom dinâmico.
     
@@ -54,11 +114,13 @@ def apply_ken_burns(clip, duration, zoom_ratio=0.08):
         clip: Clip de imagem
         duration: Duração do clip
         zoom_ratio: Quanto zoom aplicar (0.08 = 8%)
+        zoom_in: Direção do zoom (None = aleatória)
     """
     w, h = clip.size
     
-    # Direção aleatória do zoom
-    zoom_in = random.choice([True, False])
+    # Direção do zoom (aleatória se não vier do conteúdo do card)
+    if zoom_in is None:
+        zoom_in = random.choice([True, False])
     
     def zoom_effect(get_frame, t):
         progress = t / duration
@@ -113,17 +175,7 @@ def create_dynamic_background(width: int, height: int, duration: float,
     """
     Cria background com gradiente REAL.
     """
-    # Cores mais vibrantes e dinâmicas
-    context_colors = {
-        "tech": [(20, 30, 80), (60, 20, 140)],      # Azul/roxo tech
-        "ai": [(30, 10, 60), (20, 80, 160)],        # Roxo/azul AI
-        "productivity": [(10, 40, 30), (40, 90, 80)], # Verde produtividade
-        "money": [(40, 30, 10), (100, 90, 30)],      # Dourado
-        "design": [(60, 20, 40), (120, 50, 90)],    # Rosa/magenta
-        "default": [(20, 20, 40), (60, 40, 80)],    # Roxo escuro
-    }
-    
-    colors = context_colors.get(context, context_colors["default"])
+    colors = BACKGROUND_COLORS.get(context, BACKGROUND_COLORS["default"])
     
     # Gerar imagem de gradiente
     try:
@@ -178,10 +230,17 @@ def create_video_from_images_and_audio(
     output_path: str,
     transition_duration: float = 0.2,  # Transições mais rápidas
     context: str = "tech",
-    add_music: bool = True
+    add_music: bool = True,
+    backend: str = None,
+    profile: Union[str, VideoProfile] = DEFAULT_VIDEO_PROFILE,
+    zoom_in: list = None
 ) -> str:
     """
     Cria um vídeo DINÂMICO com transições rápidas e zoom Ken Burns.
+    images: caminhos de arquivo ou frames RGB em memória (arrays H x W x 3 / PIL.Image).
+    backend: "auto" (padrão VIDEO_BACKEND), "ffmpeg", "pipe" ou "moviepy".
+    profile: "final" (1920x1080@30) ou "draft" (960x540@15, sem música).
+    zoom_in: Direção do Ken Burns de cada imagem (None = derivada do conteúdo do card).
     
     NOVIDADES v3.0:
     - Zoom Ken Burns em cada imagem
@@ -189,7 +248,88 @@ def create_video_from_images_and_audio(
     - Música mais alta (18%)
     - Efeitos de fade in/out
     """
-    logger.info(f"🎬 Montando vídeo DINÂMICO 1920x1080 com {len(images)} imagens...")
+    backend = backend or VIDEO_BACKEND
+    prof = get_video_profile(profile)
+    add_music = add_music and prof.music
+    if zoom_in is None:
+        zoom_in = zoom_directions(images)
+    native = {"auto": _render_with_ffmpeg, "ffmpeg": _render_with_ffmpeg, "pipe": _render_with_pipe}.get(backend)
+    if native and ffmpeg_backend.get_ffmpeg_exe():
+        try:
+            return native(images, audio_path, output_path, transition_duration, context, add_music, prof, zoom_in)
+        except ffmpeg_backend.FFmpegError as e:
+            if backend != "auto":
+                raise
+            logger.warning(f"⚠️ Backend ffmpeg falhou ({e}). Usando moviepy.")
+    return _render_with_moviepy(images, audio_path, output_path, transition_duration, context, add_music, prof,
+                                zoom_in)
+
+
+def zoom_directions(images: list) -> list:
+    """Direção do Ken Burns de cada imagem, derivada do conteúdo (imagens ausentes ficam com zoom in)."""
+    return [ffmpeg_backend.zoom_direction(image) if not isinstance(image, str) or os.path.exists(image) else True
+            for image in images]
+
+
+def _timeline_args(images, transition_duration, context, add_music, prof: VideoProfile, zoom_in: list) -> tuple:
+    """Imagens válidas + parâmetros da timeline comuns aos backends nativos."""
+    valid = []
+    directions = []
+    for image, direction in zip(images, zoom_in):
+        if isinstance(image, str) and not os.path.exists(image):
+            logger.warning(f"⚠️ Imagem não encontrada: {image}")
+            continue
+        valid.append(image)
+        directions.append(direction)
+    
+    params = dict(
+        zoom_in=directions,
+        zoom_ratio=0.06,
+        transition=transition_duration,
+        pad_color=BACKGROUND_COLORS.get(context, BACKGROUND_COLORS["default"])[0],
+        music_path=get_background_music() if add_music else None,
+        music_volume=0.18,
+        preset=prof.preset,
+        crf=prof.crf,
+    )
+    return valid, params
+
+
+def _render_with_ffmpeg(images, audio_path, output_path, transition_duration, context, add_music,
+                        prof: VideoProfile, zoom_in: list) -> str:
+    """
+    Timeline do moviepy no ffmpeg (zoompan + fade + amix), em trechos do plan_segments. Com mais de
+    um núcleo disponível ou com o cache de segmentos ligado, cada trecho vira um clipe (codificado em
+    paralelo ou, nos trechos fixos dos cards, lido do cache) e os clipes são unidos por cópia de stream.
+    """
+    valid, params = _timeline_args(images, transition_duration, context, add_music, prof, zoom_in)
+    logger.info(f"🎬 Montando vídeo DINÂMICO {prof.width}x{prof.height} com {len(valid)} imagens "
+                f"(ffmpeg, perfil {prof.name})...")
+    if prof.segmented and (SEGMENT_WORKERS > 1 or SEGMENT_CACHE) and len(valid) > 1:
+        ffmpeg_backend.render_segments(valid, audio_path, output_path, prof.width, prof.height, prof.fps,
+                                       workers=SEGMENT_WORKERS, cache=SEGMENT_CACHE, **params)
+    else:
+        ffmpeg_backend.render_timeline(valid, audio_path, output_path, prof.width, prof.height, prof.fps, **params)
+    logger.info(f"✅ Vídeo DINÂMICO salvo: {output_path}")
+    return output_path
+
+
+def _render_with_pipe(images, audio_path, output_path, transition_duration, context, add_music,
+                      prof: VideoProfile, zoom_in: list) -> str:
+    """Frames calculados em Python (anel em memória compartilhada) e enviados ao ffmpeg como rawvideo."""
+    valid, params = _timeline_args(images, transition_duration, context, add_music, prof, zoom_in)
+    logger.info(f"🎬 Montando vídeo DINÂMICO {prof.width}x{prof.height} com {len(valid)} imagens "
+                f"(frame pipe, perfil {prof.name})...")
+    frame_pipe.write_video(valid, audio_path, output_path, prof.width, prof.height, prof.fps, **params)
+    logger.info(f"✅ Vídeo DINÂMICO salvo: {output_path}")
+    return output_path
+
+
+def _render_with_moviepy(images, audio_path, output_path, transition_duration, context, add_music,
+                         prof: VideoProfile, zoom_in: list) -> str:
+    """Backend original: CompositeVideoClip do moviepy (fallback)."""
+    width, height = prof.width, prof.height
+    logger.info(f"🎬 Montando vídeo DINÂMICO {width}x{height} com {len(images)} imagens...")
     
     # Carregar áudio
     audio = AudioFileClip(audio_path)
@@ -202,39 +342,43 @@ def create_video_from_images_and_audio(
     logger.info(f"🔄 Aplicando efeito Ken Burns + transições rápidas...")
     
     # Criar background
-    background = create_dynamic_background(VIDEO_WIDTH, VIDEO_HEIGHT, total_duration, context)
+    background = create_dynamic_background(width, height, total_duration, context)
     
     # Criar clips de imagem com efeitos dinâmicos
     clips = []
     current_time = 0
     
-    for i, img_path in enumerate(images):
-        if not os.path.exists(img_path):
-            logger.warning(f"⚠️ Imagem não encontrada: {img_path}")
-            continue
+    for i, image in enumerate(images):
+        if isinstance(image, str):
+            if not os.path.exists(image):
+                logger.warning(f"⚠️ Imagem não encontrada: {image}")
+                continue
+        else:
+            # Frame em memória (array RGB do image_generator): sem ida e volta por PNG
+            image = np.asarray(image)
         
         # Criar clip da imagem
-        clip = ImageClip(img_path, duration=duration_per_image)
+        clip = ImageClip(image, duration=duration_per_image)
         
         # Aplicar Ken Burns (zoom dinâmico)
-        clip = apply_ken_burns(clip, duration_per_image, zoom_ratio=0.06)
+        clip = apply_ken_burns(clip, duration_per_image, zoom_ratio=0.06, zoom_in=zoom_in[i])
         
         # Redimensionar mantendo proporção
-        img_ratio = clip.w / clip.h if hasattr(clip, 'w') else 1920/1080
-        target_ratio = VIDEO_WIDTH / VIDEO_HEIGHT
+        img_ratio = clip.w / clip.h if hasattr(clip, 'w') else width/height
+        target_ratio = width / height
         
         if img_ratio > target_ratio:
-            new_width = VIDEO_WIDTH
-            new_height = int(VIDEO_WIDTH / img_ratio)
+            new_width = width
+            new_height = int(width / img_ratio)
         else:
-            new_height = VIDEO_HEIGHT
-            new_width = int(VIDEO_HEIGHT * img_ratio)
+            new_height = height
+            new_width = int(height * img_ratio)
         
         clip = clip.resize((new_width, new_height))
         
         # Centralizar
-        x_pos = (VIDEO_WIDTH - new_width) // 2
-        y_pos = (VIDEO_HEIGHT - new_height) // 2
+        x_pos = (width - new_width) // 2
+        y_pos = (height - new_height) // 2
         clip = clip.set_position((x_pos, y_pos))
         
         # Adicionar transições rápidas
@@ -253,7 +397,7 @@ def create_video_from_images_and_audio(
         raise ValueError("Nenhuma imagem válida encontrada!")
     
     # Compor vídeo final
-    final_video = CompositeVideoClip([background] + clips, size=(VIDEO_WIDTH, VIDEO_HEIGHT))
+    final_video = CompositeVideoClip([background] + clips, size=(width, height))
     
     # Adicionar áudio de narração
     final_video = final_video.set_audio(audio)
@@ -267,11 +411,12 @@ def create_video_from_images_and_audio(
     logger.info(f"💾 Renderizando vídeo DINÂMICO para: {output_path}")
     final_video.write_videofile(
         output_path,
-        fps=FPS,
+        fps=prof.fps,
         codec="libx264",
         audio_codec="aac",
-        preset="ultrafast",  # MODO TURBO: Muito mais rápido
+        preset=prof.preset,  # MODO TURBO: ultrafast nos dois perfis
         threads=8,           # Usar mais threads
+        ffmpeg_params=["-crf", str(prof.crf)],
         logger=None
     )
     
@@ -283,7 +428,8 @@ def create_video_from_images_and_audio(
     return output_path
 
 
-def render_single_video(video_id: int, images: list, audio_path: str, output_dir: str) -> str:
+def render_single_video(video_id: int, images: list, audio_path: str, output_dir: str,
+                        profile: str = DEFAULT_VIDEO_PROFILE) -> str:
     """Renderiza um único vídeo dinâmico."""
-    output_path = os.path.join(output_dir, f"video_{video_id}_final.mp4")
-    return create_video_from_images_and_audio(images, audio_path, output_path)
+    output_path = os.path.join(output_dir, f"video_{video_id}_{profile}.mp4")
+    return create_video_from_images_and_audio(images, audio_path, output_path, profile=profile)
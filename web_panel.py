@@ -6,11 +6,12 @@ Fabrica de Carrosseis Virais com IA + Autenticacao Firebase
 from flask import Flask, render_template_string, request, jsonify, send_from_directory, send_file, redirect, url_for, session
 import os
 import sys
-import io
-import zipfile
 import threading
 import json
+import io
+import base64
 from datetime import datetime
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Configurar Pastas e Logger antes de tudo
@@ -19,7 +20,13 @@ from logger import get_logger
 logger = get_logger()
 
 from gemini_integration import generate_carousel_content, get_temas_para_nicho, TEMAS_POR_NICHO
-from carousel_generator import generate_carousel
+from carousel_generator import (generate_carousel, render_carousel_preview, render_carousel_zip, edit_slide,
+                                get_carousel_zip, PREVIEW_SCALE, SLIDE_EXTENSIONS)
+from encoders import PREVIEW_PROFILE, encode
+from error_handler import ImageGenerationError
+from post_processing import downscale
+from PIL import Image
+from werkzeug.utils import safe_join
 
 try:
     import firebase_admin
@@ -67,6 +74,7 @@ else:
     OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output")
     CAROUSEL_DIR = os.path.join(OUTPUT_DIR, "carousels")
 
+
 try:
     os.makedirs(CAROUSEL_DIR, exist_ok=True)
 except Exception as e:
@@ -304,7 +312,7 @@ HTML_TEMPLATE = '''
             grid.innerHTML = '';
             
             data.carousels.forEach(c => {
-                const cover = `/carousel/${c.folder}/${c.files[0]}`;
+                const cover = `/carousel_thumb/${c.folder}/${c.files[0]}`;
                 const div = document.createElement('div');
                 div.className = 'bento-card overflow-hidden group relative';
                 div.innerHTML = `
@@ -456,6 +464,16 @@ def get_google_credentials():
         return Credentials(**session['google_credentials'])
     return None
 
+def client_slides(value):
+    """
+    Slides devolvidos pelo cliente (preview -> download): so o texto e aproveitado.
+    Qualquer outro campo (ex.: image_path) faria o servidor abrir arquivos arbitrarios.
+    Retorna None se o valor nao for uma lista de dicts com 'text' em string.
+    """
+    if not isinstance(value, list) or not all(isinstance(s, dict) and isinstance(s.get('text'), str) for s in value):
+        return None
+    return [{"text": str(s["text"])} for s in value]
+
 @app.route('/generate_carousel', methods=['POST'])
 def handle_generate():
     if not verify_firebase_token() and FIREBASE_ENABLED:
@@ -479,6 +497,27 @@ def handle_generate():
         # Detectar ambiente Vercel (Serverless) - Nao usar threads
         is_vercel = os.environ.get('VERCEL') or os.environ.get('AWS_LAMBDA_FUNCTION_NAME')
         
+        if data.get('preview'):
+            # Preview em baixa resolucao (WebP em data URI); devolve os slides para o download reaproveitar
+            slides = client_slides(data.get('slides')) if 'slides' in data else \
+                generate_carousel_content(topic, nicho, count, credentials=oauth_creds)
+            if slides is None: return jsonify({"success": False, "message": "Slides invalidos."}), 400
+            if not slides: return jsonify({"success": False, "message": "Falha na geracao."})
+            previews = [f"data:image/webp;base64,{base64.b64encode(webp).decode('ascii')}"
+                        for _, webp in render_carousel_preview(slides, "caverna")]
+            return jsonify({"success": True, "slides": slides, "previews": previews})
+        
+        if data.get('zip'):
+            # ZIP direto da memoria: sem gravar/ler slides no /tmp (limite de 512 MB no serverless)
+            # Slides vindos de um preview sao renderizados em alta sem chamar a IA de novo
+            slides = client_slides(data.get('slides')) if 'slides' in data else \
+                generate_carousel_content(topic, nicho, count, credentials=oauth_creds)
+            if slides is None: return jsonify({"success": False, "message": "Slides invalidos."}), 400
+            if not slides: return jsonify({"success": False, "message": "Falha na geracao."})
+            name = f"{nicho}_{topic[:15]}_{datetime.now().strftime('%H%M')}".replace(' ', '_')
+            return send_file(render_carousel_zip(slides, "caverna"), mimetype='application/zip',
+                             as_attachment=True, download_name=f'{name}.zip')
+        
         if is_vercel:
             # Sincrono
             slides = generate_carousel_content(topic, nicho, count, credentials=oauth_creds)
@@ -522,7 +561,7 @@ def list_carousels():
         for folder in sorted(os.listdir(CAROUSEL_DIR), reverse=True):
             folder_path = os.path.join(CAROUSEL_DIR, folder)
             if os.path.isdir(folder_path):
-                files = sorted([f for f in os.listdir(folder_path) if f.endswith('.png')])
+                files = sorted([f for f in os.listdir(folder_path) if f.endswith(SLIDE_EXTENSIONS)])
                 if files:
                     carousels.append({"folder": folder, "files": files})
     return jsonify({"carousels": carousels})
@@ -531,21 +570,50 @@ def list_carousels():
 def serve_image(folder, filename):
     return send_from_directory(os.path.join(CAROUSEL_DIR, folder), filename)
 
+@app.route('/carousel_thumb/<folder>/<filename>')
+def serve_thumbnail(folder, filename):
+    """Miniatura WebP do slide para a galeria (o arquivo em alta so vai no download)."""
+    path = safe_join(CAROUSEL_DIR, folder, filename)
+    if path is None or not os.path.isfile(path):
+        return "Not Found", 404
+    # Cache pela versao do arquivo: edicoes mudam o mtime e geram outra miniatura
+    webp = thumbnail_bytes(path, os.stat(path).st_mtime_ns)
+    return send_file(io.BytesIO(webp), mimetype='image/webp', max_age=3600)
+
+@lru_cache(maxsize=256)
+def thumbnail_bytes(path, mtime_ns):
+    """WebP reduzido do slide (decodificado uma vez por versao do arquivo)."""
+    with Image.open(path) as src:
+        src.draft("RGB", (src.width // 4, src.height // 4))  # JPEG decodifica direto em 1/4
+        img = src.convert("RGB")
+    if img.width > 400:
+        img = downscale(img, PREVIEW_SCALE)
+    return encode(img, PREVIEW_PROFILE)
+
 @app.route('/download_carousel/<folder>')
 def download_carousel(folder):
-    folder_path = os.path.join(CAROUSEL_DIR, folder)
-    if not os.path.exists(folder_path):
+    folder_path = safe_join(CAROUSEL_DIR, folder)
+    if folder_path is None or not os.path.isdir(folder_path):
         return "Not Found", 404
     
-    memory_file = io.BytesIO()
-    with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for file in sorted(os.listdir(folder_path)):
-            if file.endswith('.png'):
-                file_path = os.path.join(folder_path, file)
-                zf.write(file_path, file)
+    # ZIP cacheado na pasta (edicoes remendam o arquivo em vez de remontar tudo)
+    return send_file(get_carousel_zip(folder), mimetype='application/zip', as_attachment=True,
+                     download_name=f'{folder}.zip')
+
+@app.route('/edit_slide/<folder>', methods=['POST'])
+def handle_edit_slide(folder):
+    if not verify_firebase_token() and FIREBASE_ENABLED:
+        return jsonify({"success": False, "message": "Unauthorized (Firebase)"}), 401
+    
+    if safe_join(CAROUSEL_DIR, folder) is None:
+        return "Not Found", 404
     
-    memory_file.seek(0)
-    return send_file(memory_file, mimetype='application/zip', as_attachment=True, download_name=f'{folder}.zip')
+    data = request.json or {}
+    try:
+        paths = edit_slide(folder, int(data.get('index', 0)), text=data.get('text'))
+    except (ImageGenerationError, ValueError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify({"success": True, "folder": folder, "files": [os.path.basename(p) for p in paths]})
 
 if __name__ == '__main__':
     print("="*60)